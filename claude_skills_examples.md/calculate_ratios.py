@@ -3,8 +3,420 @@ Financial ratio calculation module.
 Provides functions to calculate key financial metrics and ratios.
 """
 
+import ast
 import json
-from typing import Dict, Any
+import keyword
+from functools import lru_cache
+from json.encoder import encode_basestring_ascii as _encode_string
+from typing import Dict, Any, List, Mapping, Callable, Optional, Tuple, Iterable, Iterator, TextIO
+
+import numpy as np
+
+# Ratios produced by FinancialRatioCalculator.calculate_all_ratios, by category
+RATIO_CATEGORIES = {
+    "profitability": ("roe", "roa", "gross_margin", "operating_margin", "net_margin"),
+    "liquidity": ("current_ratio", "quick_ratio", "cash_ratio"),
+    "leverage": ("debt_to_equity", "interest_coverage", "debt_service_coverage"),
+    "efficiency": (
+        "asset_turnover",
+        "inventory_turnover",
+        "receivables_turnover",
+        "days_sales_outstanding",
+    ),
+    "valuation": (
+        "pe_ratio",
+        "eps",
+        "pb_ratio",
+        "book_value_per_share",
+        "ps_ratio",
+        "ev_to_ebitda",
+        "peg_ratio",
+    ),
+}
+
+# Column order of the matrix returned by calculate_ratios_batch
+BATCH_RATIO_COLUMNS = tuple(name for names in RATIO_CATEGORIES.values() for name in names)
+
+# Input fields read by the calculator, by statement
+RATIO_INPUT_FIELDS = {
+    "income_statement": (
+        "revenue",
+        "cost_of_goods_sold",
+        "operating_income",
+        "ebit",
+        "ebitda",
+        "interest_expense",
+        "net_income",
+    ),
+    "balance_sheet": (
+        "total_assets",
+        "current_assets",
+        "cash_and_equivalents",
+        "accounts_receivable",
+        "inventory",
+        "current_liabilities",
+        "total_debt",
+        "current_portion_long_term_debt",
+        "shareholders_equity",
+    ),
+    "market_data": ("share_price", "shares_outstanding", "earnings_growth_rate"),
+}
+
+
+# Ratios whose balance-sheet inputs are averaged over the window in calculate_ratio_history
+AVERAGE_BALANCE_RATIOS = (
+    "roe",
+    "roa",
+    "asset_turnover",
+    "inventory_turnover",
+    "receivables_turnover",
+    "days_sales_outstanding",
+)
+
+# Statement each input field is read from
+_INPUT_STATEMENTS = {
+    field: statement for statement, fields in RATIO_INPUT_FIELDS.items() for field in fields
+}
+
+# Quantities shared by several ratios: name -> expression over inputs and other entries
+RATIO_INTERMEDIATES = {
+    "gross_profit": "revenue - cost_of_goods_sold",
+    "quick_assets": "current_assets - inventory",
+    "total_debt_service": "interest_expense + current_portion_long_term_debt",
+    "market_cap": "share_price * shares_outstanding",
+    "enterprise_value": "market_cap + total_debt - cash_and_equivalents",
+}
+
+# Ratio formulas: name -> expression over inputs, intermediates and other ratios.
+# divide() is safe_divide (0 for a zero denominator); when_positive(x, value)
+# yields value only where x > 0 (the ratio is omitted, or NaN in batches, otherwise)
+RATIO_FORMULAS = {
+    "roe": "divide(net_income, shareholders_equity)",
+    "roa": "divide(net_income, total_assets)",
+    "gross_margin": "divide(gross_profit, revenue)",
+    "operating_margin": "divide(operating_income, revenue)",
+    "net_margin": "divide(net_income, revenue)",
+    "current_ratio": "divide(current_assets, current_liabilities)",
+    "quick_ratio": "divide(quick_assets, current_liabilities)",
+    "cash_ratio": "divide(cash_and_equivalents, current_liabilities)",
+    "debt_to_equity": "divide(total_debt, shareholders_equity)",
+    "interest_coverage": "divide(ebit, interest_expense)",
+    "debt_service_coverage": "divide(operating_income, total_debt_service)",
+    "asset_turnover": "divide(revenue, total_assets)",
+    "inventory_turnover": "divide(cost_of_goods_sold, inventory)",
+    "receivables_turnover": "divide(revenue, accounts_receivable)",
+    "days_sales_outstanding": "divide(365, receivables_turnover)",
+    "eps": "divide(net_income, shares_outstanding)",
+    "pe_ratio": "divide(share_price, eps)",
+    "book_value_per_share": "divide(shareholders_equity, shares_outstanding)",
+    "pb_ratio": "divide(share_price, book_value_per_share)",
+    "ps_ratio": "divide(market_cap, revenue)",
+    "ev_to_ebitda": "divide(enterprise_value, ebitda)",
+    "peg_ratio": "when_positive(earnings_growth_rate, divide(pe_ratio, earnings_growth_rate * 100))",
+}
+
+# Names available to formulas besides registry entries
+_FORMULA_FUNCTIONS = ("divide", "when_positive")
+_RESERVED_NAMES = (
+    frozenset(_FORMULA_FUNCTIONS)
+    | set(RATIO_INPUT_FIELDS)
+    | {"data", "evaluate", "field", "n", "np", "omitted", "out", "result"}
+)
+
+# Syntax a formula may use: arithmetic and comparisons over names and numbers,
+# plus calls to the formula functions
+_FORMULA_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Compare,
+    ast.Constant,
+    ast.Name,
+    ast.Call,
+    ast.Load,
+    ast.operator,
+    ast.unaryop,
+    ast.cmpop,
+)
+
+
+def _formula_names(expression: str) -> List[str]:
+    """Registry names an expression refers to, in first-use order (rejects other syntax)."""
+    names = []
+    for node in ast.walk(ast.parse(expression, mode="eval")):
+        if not isinstance(node, _FORMULA_NODES):
+            raise ValueError(f"Unsupported syntax in formula: {type(node).__name__}")
+        if isinstance(node, ast.Constant) and type(node.value) not in (int, float):
+            raise ValueError(f"Unsupported constant in formula: {node.value!r}")
+        if isinstance(node, ast.Call) and (
+            not isinstance(node.func, ast.Name)
+            or node.func.id not in _FORMULA_FUNCTIONS
+            or node.keywords
+        ):
+            raise ValueError(f"Formulas may only call {' and '.join(_FORMULA_FUNCTIONS)}")
+        if isinstance(node, ast.Name) and node.id not in _FORMULA_FUNCTIONS:
+            if node.id not in names:
+                names.append(node.id)
+    return names
+
+
+def register_ratio(name: str, expression: str, intermediate: bool = False):
+    """
+    Add (or replace) a ratio or shared intermediate in the registry.
+
+    Args:
+        name: Identifier for the new entry
+        expression: Python expression over inputs, intermediates and ratios,
+            using divide() and when_positive()
+        intermediate: Register as a shared intermediate rather than a ratio
+    """
+    if (
+        not name.isidentifier()
+        or keyword.iskeyword(name)
+        or name in _RESERVED_NAMES
+        or name in _INPUT_STATEMENTS
+    ):
+        raise ValueError(f"Invalid ratio name: {name}")
+
+    registry = RATIO_INTERMEDIATES if intermediate else RATIO_FORMULAS
+    previous = [(r, r.pop(name)) for r in (RATIO_FORMULAS, RATIO_INTERMEDIATES) if name in r]
+    registry[name] = expression
+    try:
+        plan_ratios([name])
+    except (ValueError, SyntaxError):
+        # Leave the registry as it was
+        del registry[name]
+        for r, old in previous:
+            r[name] = old
+        raise
+    compile_ratios.cache_clear()
+
+
+def _formula(name: str) -> Optional[str]:
+    """Expression registered for a ratio or intermediate."""
+    return RATIO_FORMULAS.get(name, RATIO_INTERMEDIATES.get(name))
+
+
+def plan_ratios(names: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Order the work needed to compute a set of ratios.
+
+    Args:
+        names: Ratios (or intermediates) to compute
+
+    Returns:
+        (inputs read, formulas in dependency order); each shared
+        intermediate appears once however many ratios use it
+    """
+    inputs, steps, visiting = [], [], set()
+
+    def visit(name: str):
+        if name in steps or name in inputs:
+            return
+        if name in _INPUT_STATEMENTS:
+            inputs.append(name)
+            return
+        expression = _formula(name)
+        if expression is None:
+            raise ValueError(f"Unknown ratio: {name}")
+        if name in visiting:
+            raise ValueError(f"Circular ratio definition: {name}")
+        visiting.add(name)
+        for dependency in _formula_names(expression):
+            visit(dependency)
+        visiting.discard(name)
+        steps.append(name)
+
+    for name in names:
+        visit(name)
+    return inputs, steps
+
+
+class _Omitted:
+    """Marker for a when_positive() ratio whose condition failed."""
+
+
+_OMITTED = _Omitted()
+
+
+def _safe_divide(numerator: float, denominator: float, default: float = 0.0) -> float:
+    if denominator == 0:
+        return default
+    return numerator / denominator
+
+
+def _when_positive(condition: float, value: Any) -> Any:
+    return value if condition > 0 else _OMITTED
+
+
+def _safe_divide_batch(
+    numerator: Any, denominator: Any, default: float = 0.0, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Element-wise safe_divide (callers suppress the zero-division warnings)."""
+    out = np.divide(numerator, denominator, out=out)
+    out[denominator == 0] = default
+    return out
+
+
+def _when_positive_batch(condition: np.ndarray, value: np.ndarray) -> np.ndarray:
+    return np.where(condition > 0, value, np.nan)
+
+
+def _top_level_call(name: str) -> Optional[str]:
+    """Function a formula applies last (divide / when_positive), if any."""
+    body = ast.parse(_formula(name), mode="eval").body
+    if isinstance(body, ast.Call) and isinstance(body.func, ast.Name):
+        return body.func.id
+    return None
+
+
+@lru_cache(maxsize=None)
+def compile_ratios(
+    names: Tuple[str, ...] = (),
+    batch: bool = False,
+    groups: Optional[Tuple[Tuple[str, Tuple[str, ...]], ...]] = None,
+) -> Callable:
+    """
+    Compile a set of ratios into one evaluation function.
+
+    The planned formulas are generated as straight-line code, so every
+    intermediate is computed once and only the inputs the ratios need are read.
+
+    Args:
+        names: Ratios (or intermediates) to compute
+        batch: Compile for columnar arrays instead of one company
+        groups: ((label, names), ...) to compute instead of names; scalar
+            results are then nested by label
+
+    Returns:
+        Scalar: function(financial_data) -> {name: value} over the nested
+        statement dicts, leaving out when_positive() ratios whose condition
+        failed. Batch: function(table) -> (n_companies, n_ratios) array over a
+        dict of one array per input field (missing fields are 0), with NaN
+        where a when_positive() condition failed
+    """
+    if groups is not None:
+        names = tuple(name for _, group in groups for name in group)
+    inputs, steps = plan_ratios(list(names))
+
+    if batch:
+        lines = [
+            "def evaluate(data):",
+            "    n = len(next(iter(data.values()))) if data else 0",
+            "    def field(name):",
+            "        return np.asarray(data[name], dtype=float) if name in data else np.zeros(n)",
+        ]
+        lines += [f"    {name} = field({name!r})" for name in inputs]
+        # One contiguous row per ratio; top-level divisions write straight into their row
+        lines.append(f"    out = np.empty(({len(names)}, n))")
+        lines.append('    with np.errstate(divide="ignore", invalid="ignore"):')
+        rows = {name: names.index(name) for name in names}
+        direct = {name for name in rows if name in steps and _top_level_call(name) == "divide"}
+        for name in steps:
+            expression = _formula(name)
+            if name in direct:
+                tree = ast.parse(expression, mode="eval")
+                tree.body.keywords.append(
+                    ast.keyword("out", ast.parse(f"out[{rows[name]}]", mode="eval").body)
+                )
+                expression = ast.unparse(tree)
+            lines.append(f"        {name} = {expression}")
+        lines += [
+            f"    out[{row}] = {name}"
+            for row, name in enumerate(names)
+            if name not in direct or rows[name] != row
+        ]
+        lines.append("    return out.T")
+        namespace = {"np": np, "divide": _safe_divide_batch, "when_positive": _when_positive_batch}
+    else:
+        statements = dict.fromkeys(_INPUT_STATEMENTS[name] for name in inputs)
+        lines = ["def evaluate(data):"]
+        lines += [f"    {statement} = data.get({statement!r}, {{}})" for statement in statements]
+        lines += [f"    {name} = {_INPUT_STATEMENTS[name]}.get({name!r}, 0)" for name in inputs]
+        lines += [f"    {name} = {_formula(name)}" for name in steps]
+
+        def literal(group: Tuple[str, ...]) -> str:
+            return "{" + ", ".join(f"{name!r}: {name}" for name in group) + "}"
+
+        if groups is None:
+            lines.append(f"    result = {literal(names)}")
+            paths = [(name, f"[{name!r}]") for name in names]
+        else:
+            entries = ", ".join(f"{label!r}: {literal(group)}" for label, group in groups)
+            lines.append(f"    result = {{{entries}}}")
+            paths = [(name, f"[{label!r}][{name!r}]") for label, group in groups for name in group]
+        for name, path in paths:
+            if name in steps and _top_level_call(name) == "when_positive":
+                lines.append(f"    if {name} is omitted:")
+                lines.append(f"        del result{path}")
+        lines.append("    return result")
+        namespace = {"divide": _safe_divide, "when_positive": _when_positive, "omitted": _OMITTED}
+
+    exec(compile("\n".join(lines), f"<ratios {', '.join(names)}>", "exec"), namespace)
+    return namespace["evaluate"]
+
+
+_INFINITY = float("inf")
+
+# Interpretation rules by ratio, built once at import
+_RATIO_INTERPRETATIONS = {
+    "current_ratio": lambda v: (
+        "Strong liquidity"
+        if v > 2
+        else "Adequate liquidity"
+        if v > 1.5
+        else "Potential liquidity concerns"
+        if v > 1
+        else "Liquidity issues"
+    ),
+    "debt_to_equity": lambda v: (
+        "Low leverage"
+        if v < 0.5
+        else "Moderate leverage"
+        if v < 1
+        else "High leverage"
+        if v < 2
+        else "Very high leverage"
+    ),
+    "roe": lambda v: (
+        "Excellent returns"
+        if v > 0.20
+        else "Good returns"
+        if v > 0.15
+        else "Average returns"
+        if v > 0.10
+        else "Below average returns"
+        if v > 0
+        else "Negative returns"
+    ),
+    "pe_ratio": lambda v: (
+        "Potentially undervalued"
+        if 0 < v < 15
+        else "Fair value"
+        if 15 <= v < 25
+        else "Growth premium"
+        if 25 <= v < 40
+        else "High valuation"
+        if v >= 40
+        else "N/A (negative earnings)"
+        if v <= 0
+        else "N/A"
+    ),
+}
+
+
+def _format_value(value: float, format_type: str = "ratio") -> str:
+    """Format a ratio value for display (see FinancialRatioCalculator.format_ratio)."""
+    if format_type == "percentage":
+        return f"{value * 100:.2f}%"
+    elif format_type == "times":
+        return f"{value:.2f}x"
+    elif format_type == "days":
+        return f"{value:.1f} days"
+    elif format_type == "currency":
+        return f"${value:.2f}"
+    else:
+        return f"{value:.2f}"
 
 
 class FinancialRatioCalculator:
@@ -30,222 +442,72 @@ class FinancialRatioCalculator:
             return default
         return numerator / denominator
 
-    def calculate_profitability_ratios(self) -> Dict[str, float]:
-        """Calculate profitability ratios."""
-        ratios = {}
-
-        # ROE (Return on Equity)
-        net_income = self.income_statement.get("net_income", 0)
-        shareholders_equity = self.balance_sheet.get("shareholders_equity", 0)
-        ratios["roe"] = self.safe_divide(net_income, shareholders_equity)
-
-        # ROA (Return on Assets)
-        total_assets = self.balance_sheet.get("total_assets", 0)
-        ratios["roa"] = self.safe_divide(net_income, total_assets)
+    def evaluate_ratios(self, names: List[str]) -> Dict[str, float]:
+        """
+        Calculate selected ratios, reading only the inputs they need.
 
-        # Gross Margin
-        revenue = self.income_statement.get("revenue", 0)
-        cogs = self.income_statement.get("cost_of_goods_sold", 0)
-        gross_profit = revenue - cogs
-        ratios["gross_margin"] = self.safe_divide(gross_profit, revenue)
+        Args:
+            names: Ratio (or intermediate) names from the registry
 
-        # Operating Margin
-        operating_income = self.income_statement.get("operating_income", 0)
-        ratios["operating_margin"] = self.safe_divide(operating_income, revenue)
+        Returns:
+            Dictionary of ratio values (when_positive ratios whose condition failed are left out)
+        """
+        return compile_ratios(tuple(names))(self._statements())
 
-        # Net Margin
-        ratios["net_margin"] = self.safe_divide(net_income, revenue)
+    def _statements(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            "income_statement": self.income_statement,
+            "balance_sheet": self.balance_sheet,
+            "market_data": self.market_data,
+        }
 
-        return ratios
+    def calculate_profitability_ratios(self) -> Dict[str, float]:
+        """Calculate profitability ratios."""
+        return self.evaluate_ratios(RATIO_CATEGORIES["profitability"])
 
     def calculate_liquidity_ratios(self) -> Dict[str, float]:
         """Calculate liquidity ratios."""
-        ratios = {}
-
-        current_assets = self.balance_sheet.get("current_assets", 0)
-        current_liabilities = self.balance_sheet.get("current_liabilities", 0)
-
-        # Current Ratio
-        ratios["current_ratio"] = self.safe_divide(current_assets, current_liabilities)
-
-        # Quick Ratio (Acid Test)
-        inventory = self.balance_sheet.get("inventory", 0)
-        quick_assets = current_assets - inventory
-        ratios["quick_ratio"] = self.safe_divide(quick_assets, current_liabilities)
-
-        # Cash Ratio
-        cash = self.balance_sheet.get("cash_and_equivalents", 0)
-        ratios["cash_ratio"] = self.safe_divide(cash, current_liabilities)
-
-        return ratios
+        return self.evaluate_ratios(RATIO_CATEGORIES["liquidity"])
 
     def calculate_leverage_ratios(self) -> Dict[str, float]:
         """Calculate leverage/solvency ratios."""
-        ratios = {}
-
-        total_debt = self.balance_sheet.get("total_debt", 0)
-        shareholders_equity = self.balance_sheet.get("shareholders_equity", 0)
-
-        # Debt-to-Equity Ratio
-        ratios["debt_to_equity"] = self.safe_divide(total_debt, shareholders_equity)
-
-        # Interest Coverage Ratio
-        ebit = self.income_statement.get("ebit", 0)
-        interest_expense = self.income_statement.get("interest_expense", 0)
-        ratios["interest_coverage"] = self.safe_divide(ebit, interest_expense)
-
-        # Debt Service Coverage Ratio
-        net_operating_income = self.income_statement.get("operating_income", 0)
-        total_debt_service = interest_expense + self.balance_sheet.get(
-            "current_portion_long_term_debt", 0
-        )
-        ratios["debt_service_coverage"] = self.safe_divide(net_operating_income, total_debt_service)
-
-        return ratios
+        return self.evaluate_ratios(RATIO_CATEGORIES["leverage"])
 
     def calculate_efficiency_ratios(self) -> Dict[str, float]:
         """Calculate efficiency/activity ratios."""
-        ratios = {}
-
-        revenue = self.income_statement.get("revenue", 0)
-        total_assets = self.balance_sheet.get("total_assets", 0)
-
-        # Asset Turnover
-        ratios["asset_turnover"] = self.safe_divide(revenue, total_assets)
-
-        # Inventory Turnover
-        cogs = self.income_statement.get("cost_of_goods_sold", 0)
-        inventory = self.balance_sheet.get("inventory", 0)
-        ratios["inventory_turnover"] = self.safe_divide(cogs, inventory)
-
-        # Receivables Turnover
-        accounts_receivable = self.balance_sheet.get("accounts_receivable", 0)
-        ratios["receivables_turnover"] = self.safe_divide(revenue, accounts_receivable)
-
-        # Days Sales Outstanding
-        ratios["days_sales_outstanding"] = self.safe_divide(365, ratios["receivables_turnover"])
-
-        return ratios
+        return self.evaluate_ratios(RATIO_CATEGORIES["efficiency"])
 
     def calculate_valuation_ratios(self) -> Dict[str, float]:
         """Calculate valuation ratios."""
-        ratios = {}
-
-        share_price = self.market_data.get("share_price", 0)
-        shares_outstanding = self.market_data.get("shares_outstanding", 0)
-        market_cap = share_price * shares_outstanding
-
-        # P/E Ratio
-        net_income = self.income_statement.get("net_income", 0)
-        eps = self.safe_divide(net_income, shares_outstanding)
-        ratios["pe_ratio"] = self.safe_divide(share_price, eps)
-        ratios["eps"] = eps
-
-        # P/B Ratio
-        book_value = self.balance_sheet.get("shareholders_equity", 0)
-        book_value_per_share = self.safe_divide(book_value, shares_outstanding)
-        ratios["pb_ratio"] = self.safe_divide(share_price, book_value_per_share)
-        ratios["book_value_per_share"] = book_value_per_share
-
-        # P/S Ratio
-        revenue = self.income_statement.get("revenue", 0)
-        ratios["ps_ratio"] = self.safe_divide(market_cap, revenue)
-
-        # EV/EBITDA
-        ebitda = self.income_statement.get("ebitda", 0)
-        total_debt = self.balance_sheet.get("total_debt", 0)
-        cash = self.balance_sheet.get("cash_and_equivalents", 0)
-        enterprise_value = market_cap + total_debt - cash
-        ratios["ev_to_ebitda"] = self.safe_divide(enterprise_value, ebitda)
-
-        # PEG Ratio (if growth rate available)
-        earnings_growth = self.market_data.get("earnings_growth_rate", 0)
-        if earnings_growth > 0:
-            ratios["peg_ratio"] = self.safe_divide(ratios["pe_ratio"], earnings_growth * 100)
-
-        return ratios
+        return self.evaluate_ratios(RATIO_CATEGORIES["valuation"])
 
     def calculate_all_ratios(self) -> Dict[str, Any]:
-        """Calculate all financial ratios."""
-        return {
-            "profitability": self.calculate_profitability_ratios(),
-            "liquidity": self.calculate_liquidity_ratios(),
-            "leverage": self.calculate_leverage_ratios(),
-            "efficiency": self.calculate_efficiency_ratios(),
-            "valuation": self.calculate_valuation_ratios(),
-        }
+        """Calculate all financial ratios (one compiled pass shares every intermediate)."""
+        evaluate = compile_ratios(groups=tuple(RATIO_CATEGORIES.items()))
+        return evaluate(self._statements())
+
+    def format_ratio(self, name: str, value: float, format_type: str = "ratio") -> str:
+        """Format ratio value for display."""
+        return _format_value(value, format_type)
 
     def interpret_ratio(self, ratio_name: str, value: float) -> str:
         """Provide interpretation for a specific ratio."""
-        interpretations = {
-            "current_ratio": lambda v: (
-                "Strong liquidity"
-                if v > 2
-                else "Adequate liquidity"
-                if v > 1.5
-                else "Potential liquidity concerns"
-                if v > 1
-                else "Liquidity issues"
-            ),
-            "debt_to_equity": lambda v: (
-                "Low leverage"
-                if v < 0.5
-                else "Moderate leverage"
-                if v < 1
-                else "High leverage"
-                if v < 2
-                else "Very high leverage"
-            ),
-            "roe": lambda v: (
-                "Excellent returns"
-                if v > 0.20
-                else "Good returns"
-                if v > 0.15
-                else "Average returns"
-                if v > 0.10
-                else "Below average returns"
-                if v > 0
-                else "Negative returns"
-            ),
-            "pe_ratio": lambda v: (
-                "Potentially undervalued"
-                if 0 < v < 15
-                else "Fair value"
-                if 15 <= v < 25
-                else "Growth premium"
-                if 25 <= v < 40
-                else "High valuation"
-                if v >= 40
-                else "N/A (negative earnings)"
-                if v <= 0
-                else "N/A"
-            ),
-        }
-
-        if ratio_name in interpretations:
-            return interpretations[ratio_name](value)
+        interpret = _RATIO_INTERPRETATIONS.get(ratio_name)
+        if interpret is not None:
+            return interpret(value)
         return "No interpretation available"
 
-    def format_ratio(self, name: str, value: float, format_type: str = "ratio") -> str:
-        """Format ratio value for display."""
-        if format_type == "percentage":
-            return f"{value * 100:.2f}%"
-        elif format_type == "times":
-            return f"{value:.2f}x"
-        elif format_type == "days":
-            return f"{value:.1f} days"
-        elif format_type == "currency":
-            return f"${value:.2f}"
-        else:
-            return f"{value:.2f}"
-
 
-def calculate_ratios_from_data(financial_data: Dict[str, Any]) -> Dict[str, Any]:
+def calculate_ratios_from_data(
+    financial_data: Dict[str, Any], formatted: bool = True
+) -> Dict[str, Any]:
     """
     Main function to calculate all ratios from financial data.
 
     Args:
         financial_data: Dictionary with financial statement data
+        formatted: Include each ratio's display string; with False it is left
+            out and encode_ratio_results fills it in while writing
 
     Returns:
         Dictionary with calculated ratios and interpretations
@@ -258,11 +520,14 @@ def calculate_ratios_from_data(financial_data: Dict[str, Any]) -> Dict[str, Any]
     for category, category_ratios in ratios.items():
         interpretations[category] = {}
         for ratio_name, value in category_ratios.items():
-            interpretations[category][ratio_name] = {
-                "value": value,
-                "formatted": calculator.format_ratio(ratio_name, value),
-                "interpretation": calculator.interpret_ratio(ratio_name, value),
-            }
+            entry = {"value": value}
+            if formatted:
+                entry["formatted"] = _format_value(value)
+            interpret = _RATIO_INTERPRETATIONS.get(ratio_name)
+            entry["interpretation"] = (
+                interpret(value) if interpret is not None else "No interpretation available"
+            )
+            interpretations[category][ratio_name] = entry
 
     return {
         "ratios": ratios,
@@ -306,6 +571,335 @@ def generate_summary(ratios: Dict[str, Any]) -> str:
     return " ".join(summary_parts) if summary_parts else "Insufficient data for summary."
 
 
+# JSON encoding of calculate_ratios_from_data results
+
+
+def _encode_value(value: Any, level: int, indent: Optional[int]) -> str:
+    """One JSON value as json.dumps would write it at this nesting level."""
+    if type(value) is float:
+        if value != value:
+            return "NaN"
+        if value == _INFINITY or value == -_INFINITY:
+            return "Infinity" if value > 0 else "-Infinity"
+        return float.__repr__(value)
+    if type(value) is str:
+        return _encode_string(value)
+    text = json.dumps(value, indent=indent)
+    return text.replace("\n", "\n" + " " * (indent * level)) if indent is not None else text
+
+
+class _KeyPrefixes(dict):
+    """'"key": ' with the line break and indentation of one nesting level, encoded on first use."""
+
+    def __init__(self, level: int, indent: Optional[int]):
+        super().__init__()
+        self.prefix = "" if indent is None else "\n" + " " * (indent * level)
+
+    def __missing__(self, key: str) -> str:
+        encoded = self[key] = self.prefix + _encode_string(key) + ": "
+        return encoded
+
+
+@lru_cache(maxsize=None)
+def _key_prefixes(indent: Optional[int]) -> Tuple[_KeyPrefixes, ...]:
+    """Key prefixes for nesting levels 0-4 of calculate_ratios_from_data output."""
+    return tuple(_KeyPrefixes(level, indent) for level in range(5))
+
+
+def _encode_object(items: List[str], level: int, indent: Optional[int]) -> str:
+    """Wrap items built from _key_prefixes (one level deeper) in braces, as json.dumps would."""
+    if not items:
+        return "{}"
+    if indent is None:
+        return "{" + ", ".join(items) + "}"
+    return "{" + ",".join(items) + "\n" + " " * (indent * level) + "}"
+
+
+# Interpretation texts are few and repeat for every company, so their encodings are kept
+_encoded_texts: Dict[str, str] = {}
+_MAX_ENCODED_TEXTS = 1024
+
+# Interpretation entry fields as calculate_ratios_from_data writes them (formatted or not)
+_INTERPRETATION_LAYOUTS = (("value", "formatted", "interpretation"), ("value", "interpretation"))
+
+
+def encode_ratio_results(results: Dict[str, Any], indent: Optional[int] = None) -> str:
+    """
+    Serialize calculate_ratios_from_data output to JSON.
+
+    Produces exactly json.dumps(results, indent=indent), but walks the known
+    layout directly with pre-encoded keys and interpretation texts, encodes
+    each ratio value once for both sections, and fills in 'formatted' fields
+    left out with formatted=False.
+
+    Args:
+        results: Output of calculate_ratios_from_data
+        indent: Indentation as for json.dumps (None for one line)
+
+    Returns:
+        JSON text
+    """
+    keys = _key_prefixes(indent)
+    entry_close = "}" if indent is None else "\n" + " " * (indent * 3) + "}"
+    entry_separator = ", " if indent is None else ","
+    value_key = "{" + keys[4]["value"]
+    formatted_key = entry_separator + keys[4]["formatted"]
+    interpretation_key = entry_separator + keys[4]["interpretation"]
+
+    encoded_values = {}
+    sections = []
+    for key, section in results.items():
+        if key == "ratios":
+            categories = []
+            for category, category_ratios in section.items():
+                items = []
+                for name, value in category_ratios.items():
+                    text = _encode_value(value, 3, indent)
+                    encoded_values[category, name] = (value, text)
+                    items.append(keys[3][name] + text)
+                categories.append(keys[2][category] + _encode_object(items, 2, indent))
+            text = _encode_object(categories, 1, indent)
+
+        elif key == "interpretations":
+            categories = []
+            for category, entries in section.items():
+                items = []
+                for name, entry in entries.items():
+                    if tuple(entry) not in _INTERPRETATION_LAYOUTS:
+                        fields = [
+                            keys[4][field] + _encode_value(item, 4, indent)
+                            for field, item in entry.items()
+                        ]
+                        items.append(keys[3][name] + _encode_object(fields, 3, indent))
+                        continue
+
+                    # Standard layout; a missing 'formatted' is filled in here
+                    value = entry["value"]
+                    cached = encoded_values.get((category, name))
+                    if cached is not None and cached[0] is value:
+                        value_text = cached[1]
+                    else:
+                        value_text = _encode_value(value, 4, indent)
+                    if "formatted" in entry:
+                        formatted_text = _encode_value(entry["formatted"], 4, indent)
+                    else:
+                        # Display strings are plain ASCII, so they need no escaping
+                        formatted_text = '"' + _format_value(value) + '"'
+                    interpretation = entry["interpretation"]
+                    if type(interpretation) is not str:
+                        encoded = _encode_value(interpretation, 4, indent)
+                    else:
+                        encoded = _encoded_texts.get(interpretation)
+                        if encoded is None:
+                            encoded = _encode_string(interpretation)
+                            if len(_encoded_texts) < _MAX_ENCODED_TEXTS:
+                                _encoded_texts[interpretation] = encoded
+                    items.append(
+                        f"{keys[3][name]}{value_key}{value_text}{formatted_key}"
+                        f"{formatted_text}{interpretation_key}{encoded}{entry_close}"
+                    )
+                categories.append(keys[2][category] + _encode_object(items, 2, indent))
+            text = _encode_object(categories, 1, indent)
+
+        else:
+            text = _encode_value(section, 1, indent)
+        sections.append(keys[1][key] + text)
+
+    return _encode_object(sections, 0, indent)
+
+
+def iter_ratio_results_ndjson(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """
+    Calculate and encode results one company at a time, as NDJSON lines.
+
+    Args:
+        records: Financial data dictionaries (any iterable, consumed lazily)
+
+    Yields:
+        One JSON line (with trailing newline) per company
+    """
+    for financial_data in records:
+        results = calculate_ratios_from_data(financial_data, formatted=False)
+        yield encode_ratio_results(results) + "\n"
+
+
+def write_ratio_results_ndjson(records: Iterable[Dict[str, Any]], fp: TextIO) -> int:
+    """
+    Stream results for many companies to a text file as NDJSON.
+
+    Args:
+        records: Financial data dictionaries (any iterable, consumed lazily)
+        fp: Writable text file
+
+    Returns:
+        Number of companies written
+    """
+    count = 0
+    for line in iter_ratio_results_ndjson(records):
+        fp.write(line)
+        count += 1
+    return count
+
+
+def ratio_inputs_from_data(
+    records: List[Dict[str, Any]], ratios: Optional[List[str]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Convert per-company financial data dicts into the columnar table used by calculate_ratios_batch.
+
+    Args:
+        records: Dictionaries shaped like calculate_ratios_from_data's input
+        ratios: Only read the inputs these ratios need (default every input field)
+
+    Returns:
+        Dictionary of float arrays, one per input field (missing values are 0)
+    """
+    fields = list(_INPUT_STATEMENTS) if ratios is None else plan_ratios(ratios)[0]
+    sections = {
+        statement: [record.get(statement, {}) for record in records]
+        for statement in dict.fromkeys(_INPUT_STATEMENTS[field] for field in fields)
+    }
+    return {
+        field: np.array(
+            [section.get(field, 0) for section in sections[_INPUT_STATEMENTS[field]]], dtype=float
+        )
+        for field in fields
+    }
+
+
+def calculate_ratios_batch(
+    table: Mapping[str, Any], ratios: Optional[List[str]] = None
+) -> np.ndarray:
+    """
+    Calculate ratios for many companies at once.
+
+    Matches FinancialRatioCalculator exactly, including the zero returned for
+    zero denominators. peg_ratio is NaN where the scalar calculator omits it
+    (earnings growth not positive).
+
+    Args:
+        table: One array per input field (see RATIO_INPUT_FIELDS); missing fields are 0
+        ratios: Ratios to compute, in column order (default BATCH_RATIO_COLUMNS)
+
+    Returns:
+        (n_companies, n_ratios) array of ratios
+    """
+    names = tuple(BATCH_RATIO_COLUMNS if ratios is None else ratios)
+    return compile_ratios(names, batch=True)(table)
+
+
+def _rolling_window(values: np.ndarray, window: int, mean: bool = False) -> np.ndarray:
+    """
+    Trailing sum (or mean) over the last window periods of each row.
+
+    Uses running (prefix) sums, so each step costs O(1) whatever the window.
+    Periods before the window fills, or whose window holds a missing (NaN)
+    value, are NaN.
+    """
+    missing = np.isnan(values)
+    running = np.cumsum(np.where(missing, 0.0, values), axis=1)
+    gaps = np.cumsum(missing, axis=1)
+
+    totals = running[:, window - 1 :].copy()
+    totals[:, 1:] -= running[:, :-window]
+    holes = gaps[:, window - 1 :].copy()
+    holes[:, 1:] -= gaps[:, :-window]
+    totals[holes > 0] = np.nan
+
+    out = np.full(values.shape, np.nan)
+    out[:, window - 1 :] = totals / window if mean else totals
+    return out
+
+
+def calculate_ratio_history(
+    table: Mapping[str, Any],
+    ratios: Optional[List[str]] = None,
+    window: int = 4,
+    chunk_size: int = 1000,
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate ratio histories from quarterly statements for many companies.
+
+    Income statement fields are summed over the trailing window (TTM for
+    window=4). Balance sheet fields are averaged over the same window for
+    AVERAGE_BALANCE_RATIOS and taken at period end otherwise; market data is
+    always taken at period end. Companies are processed chunk_size at a time,
+    so working memory is bounded by the chunk rather than the whole panel.
+
+    Args:
+        table: One (n_companies, n_quarters) array per input field (see
+            RATIO_INPUT_FIELDS); missing fields are 0, NaN marks a missing quarter
+        ratios: Ratios to compute (default BATCH_RATIO_COLUMNS)
+        window: Quarters per trailing sum / average
+        chunk_size: Companies per chunk
+
+    Returns:
+        Dictionary of (n_companies, n_quarters) arrays; ratios that use a
+        trailing sum or average are NaN until the window fills
+    """
+    if window < 1:
+        raise ValueError("Window must be at least 1 period")
+    names = tuple(BATCH_RATIO_COLUMNS if ratios is None else ratios)
+    shape = np.shape(next(iter(table.values()))) if table else (0, 0)
+
+    flows = set(RATIO_INPUT_FIELDS["income_statement"])
+    balances = set(RATIO_INPUT_FIELDS["balance_sheet"])
+    groups = []
+    for averaged in (False, True):
+        group = tuple(name for name in names if (name in AVERAGE_BALANCE_RATIOS) == averaged)
+        if group:
+            inputs = [field for field in plan_ratios(list(group))[0] if field in table]
+            groups.append((group, inputs, averaged, compile_ratios(group, batch=True)))
+
+    history = {name: np.empty(shape) for name in names}
+    for start in range(0, shape[0], chunk_size):
+        rows = slice(start, min(start + chunk_size, shape[0]))
+        for group, inputs, averaged, evaluate in groups:
+            chunk = {}
+            for field in inputs:
+                values = np.asarray(table[field][rows], dtype=float)
+                if field in flows:
+                    values = _rolling_window(values, window)
+                elif field in balances and averaged:
+                    values = _rolling_window(values, window, mean=True)
+                chunk[field] = values.ravel()
+            if not chunk:
+                # Every input is missing (so zero): only the row count matters
+                chunk = {"": np.zeros((rows.stop - rows.start) * shape[1])}
+
+            result = evaluate(chunk)
+            for column, name in enumerate(group):
+                history[name][rows] = result[:, column].reshape(-1, shape[1])
+
+    return history
+
+
+def historical_ratio_data(
+    history: Mapping[str, np.ndarray], company: int, periods: List[str]
+) -> Dict[str, Dict[str, List[Any]]]:
+    """
+    One company's ratio histories in the form RatioInterpreter.analyze_trend expects.
+
+    Args:
+        history: Result of calculate_ratio_history
+        company: Row index of the company
+        periods: Label for each quarter
+
+    Returns:
+        {ratio: {"values": [...], "periods": [...]}} with NaN periods dropped,
+        ready to pass as perform_comprehensive_analysis(historical_data=...)
+    """
+    data = {}
+    for name, values in history.items():
+        row = values[company]
+        keep = ~np.isnan(row)
+        data[name] = {
+            "values": row[keep].tolist(),
+            "periods": [period for period, kept in zip(periods, keep) if kept],
+        }
+    return data
+
+
 # Example usage
 if __name__ == "__main__":
     # Sample financial data
@@ -343,4 +937,4 @@ if __name__ == "__main__":
     }
 
     results = calculate_ratios_from_data(sample_data)
-    print(json.dumps(results, indent=2))
+    print(encode_ratio_results(results, indent=2))
@@ -0,0 +1,336 @@
+"""
+Benchmark harness for the DCF valuation engine.
+Times scalar and batched valuation paths across model counts and projection
+horizons, records peak memory and writes a JSON baseline for regression checks.
+
+Usage:
+    python dcf_benchmark.py --output baseline.json
+    python dcf_benchmark.py --compare baseline.json --tolerance 0.25
+
+dcf_model is imported by module name, as the other scripts here do: running
+the file as a script works from any directory, but importing it requires this
+directory on sys.path.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Callable
+
+import numpy as np
+
+from dcf_model import (
+    DCFModel,
+    project_cash_flows_batch,
+    calculate_enterprise_value_batch,
+    value_dcf_batch,
+    run_dcf_sweep,
+)
+
+DEFAULT_MODEL_COUNTS = (1, 100, 1000, 10000, 100000)
+DEFAULT_HORIZONS = (5, 10, 20, 30)
+SENSITIVITY_GRID = 10
+
+
+def _random_inputs(n_models: int, years: int, seed: int) -> Dict[str, np.ndarray]:
+    """Draw a reproducible set of assumptions for n_models companies."""
+    rng = np.random.default_rng(seed)
+    return {
+        "base_revenue": rng.uniform(100, 5000, n_models),
+        "revenue_growth": rng.uniform(0.0, 0.15, (n_models, years)),
+        "ebitda_margin": rng.uniform(0.10, 0.35, (n_models, years)),
+        "capex_percent": rng.uniform(0.02, 0.08, (n_models, 1)),
+        "nwc_percent": rng.uniform(0.05, 0.15, (n_models, 1)),
+        "wacc": rng.uniform(0.07, 0.12, n_models),
+        "terminal_growth": rng.uniform(0.01, 0.03, n_models),
+    }
+
+
+def _scalar_models(inputs: Dict[str, np.ndarray]) -> List[DCFModel]:
+    """Build one DCFModel per row of the batch inputs."""
+    models = []
+    years = inputs["revenue_growth"].shape[1]
+    for i, revenue in enumerate(inputs["base_revenue"]):
+        model = DCFModel(f"Company {i}")
+        model.set_historical_financials(
+            revenue=[revenue * 0.9, revenue],
+            ebitda=[revenue * 0.18, revenue * 0.2],
+            capex=[revenue * 0.04, revenue * 0.04],
+            nwc=[revenue * 0.1, revenue * 0.1],
+            years=[2023, 2024],
+        )
+        model.set_assumptions(
+            projection_years=years,
+            revenue_growth=inputs["revenue_growth"][i].tolist(),
+            ebitda_margin=inputs["ebitda_margin"][i].tolist(),
+            capex_percent=[float(inputs["capex_percent"][i, 0])] * years,
+            nwc_percent=[float(inputs["nwc_percent"][i, 0])] * years,
+            terminal_growth=float(inputs["terminal_growth"][i]),
+        )
+        model.calculate_wacc(0.04, 1.1, 0.06, 0.05, 0.4)
+        models.append(model)
+    return models
+
+
+def _project_scalar(inputs: Dict[str, np.ndarray]) -> Callable[[], Any]:
+    models = _scalar_models(inputs)
+
+    def run():
+        for model in models:
+            model.project_cash_flows()
+
+    return run
+
+
+def _enterprise_value_scalar(inputs: Dict[str, np.ndarray]) -> Callable[[], Any]:
+    models = _scalar_models(inputs)
+    for model in models:
+        model.project_cash_flows()
+
+    def run():
+        for model in models:
+            # Keep projections but force the discounting itself to be timed
+            model.invalidate(projections=False)
+            model.calculate_enterprise_value()
+
+    return run
+
+
+def _sensitivity_scalar(inputs: Dict[str, np.ndarray]) -> Callable[[], Any]:
+    models = _scalar_models(inputs)
+    for model in models:
+        model.project_cash_flows()
+    wacc_range = np.linspace(0.07, 0.12, SENSITIVITY_GRID).tolist()
+    margin_range = np.linspace(0.15, 0.30, SENSITIVITY_GRID).tolist()
+
+    def run():
+        for model in models:
+            model.sensitivity_analysis("wacc", wacc_range, "margin", margin_range)
+
+    return run
+
+
+def _project_batch(inputs: Dict[str, np.ndarray]) -> Callable[[], Any]:
+    args = [inputs[field] for field in _PROJECTION_ARGS]
+    return lambda: project_cash_flows_batch(*args)
+
+
+def _enterprise_value_batch(inputs: Dict[str, np.ndarray]) -> Callable[[], Any]:
+    projections = project_cash_flows_batch(*[inputs[field] for field in _PROJECTION_ARGS])
+    fcf, wacc, growth = projections["fcf"], inputs["wacc"], inputs["terminal_growth"]
+    return lambda: calculate_enterprise_value_batch(fcf, wacc, growth)
+
+
+def _value_batch(inputs: Dict[str, np.ndarray]) -> Callable[[], Any]:
+    return lambda: value_dcf_batch(**inputs)
+
+
+def _sweep_in_process(inputs: Dict[str, np.ndarray]) -> Callable[[], Any]:
+    return lambda: run_dcf_sweep(inputs, max_workers=1)
+
+
+def _sweep_pool(inputs: Dict[str, np.ndarray]) -> Callable[[], Any]:
+    # Every CPU, however small the sweep: where this beats run_dcf_sweep sets
+    # dcf_model.SWEEP_MIN_ROWS_PER_WORKER
+    return lambda: run_dcf_sweep(inputs, min_rows_per_worker=0)
+
+
+_PROJECTION_ARGS = (
+    "base_revenue",
+    "revenue_growth",
+    "ebitda_margin",
+    "capex_percent",
+    "nwc_percent",
+)
+
+# name -> (setup, scalar); scalar cases loop over one DCFModel per company
+BENCHMARK_CASES = {
+    "project_cash_flows": (_project_scalar, True),
+    "calculate_enterprise_value": (_enterprise_value_scalar, True),
+    "sensitivity_analysis": (_sensitivity_scalar, True),
+    "project_cash_flows_batch": (_project_batch, False),
+    "calculate_enterprise_value_batch": (_enterprise_value_batch, False),
+    "value_dcf_batch": (_value_batch, False),
+    "run_dcf_sweep": (_sweep_in_process, False),
+    "run_dcf_sweep_pool": (_sweep_pool, False),
+}
+
+
+def time_callable(
+    func: Callable[[], Any], min_time: float = 0.2, max_repeats: int = 50
+) -> Dict[str, Any]:
+    """
+    Time a callable repeatedly and measure its peak traced memory.
+
+    Args:
+        func: Zero-argument callable to benchmark
+        min_time: Keep repeating until this many seconds have been spent
+        max_repeats: Upper bound on timed repetitions
+
+    Returns:
+        Dictionary with best/median seconds, repeat count and peak bytes
+    """
+    func()  # warm-up
+    timings = []
+    start = time.perf_counter()
+    while len(timings) < 3 or (
+        time.perf_counter() - start < min_time and len(timings) < max_repeats
+    ):
+        t0 = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - t0)
+
+    # Memory is traced in a separate, untimed run so tracing overhead stays out of timings
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "best_s": min(timings),
+        "median_s": float(np.median(timings)),
+        "repeats": len(timings),
+        "peak_bytes": peak,
+    }
+
+
+def run_benchmarks(
+    model_counts: List[int] = DEFAULT_MODEL_COUNTS,
+    horizons: List[int] = DEFAULT_HORIZONS,
+    cases: Optional[List[str]] = None,
+    max_scalar_models: int = 1000,
+    seed: int = 0,
+    min_time: float = 0.2,
+    verbose: bool = True,
+) -> Dict[str, Any]:
+    """
+    Run the benchmark grid.
+
+    Args:
+        model_counts: Numbers of companies valued per call
+        horizons: Projection horizons in years
+        cases: Subset of BENCHMARK_CASES to run (default all)
+        max_scalar_models: Skip scalar cases above this model count
+        seed: Seed for the generated assumptions
+        min_time: Minimum seconds spent timing each case
+        verbose: Print one line per case
+
+    Returns:
+        Baseline dictionary with environment metadata and per-case results
+    """
+    cases = list(BENCHMARK_CASES) if cases is None else cases
+    unknown = set(cases) - set(BENCHMARK_CASES)
+    if unknown:
+        raise ValueError(f"Unknown benchmark cases: {', '.join(sorted(unknown))}")
+
+    results = []
+    for years in horizons:
+        for n_models in model_counts:
+            inputs = _random_inputs(n_models, years, seed)
+            for name in cases:
+                setup, scalar = BENCHMARK_CASES[name]
+                if scalar and n_models > max_scalar_models:
+                    continue
+                timing = time_callable(setup(inputs), min_time=min_time)
+                result = {"case": name, "models": n_models, "years": years, **timing}
+                result["per_model_s"] = timing["best_s"] / n_models
+                results.append(result)
+                if verbose:
+                    print(
+                        f"{name:34s} models={n_models:>7d} years={years:>3d} "
+                        f"best={timing['best_s'] * 1e3:10.3f}ms "
+                        f"peak={timing['peak_bytes'] / 2**20:9.2f}MiB"
+                    )
+
+    return {
+        "metadata": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare_baselines(
+    baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = 0.25
+) -> List[Dict[str, Any]]:
+    """
+    Compare two benchmark runs case by case.
+
+    Args:
+        baseline: Earlier run_benchmarks output
+        current: New run_benchmarks output
+        tolerance: Allowed fractional slowdown (or memory growth) before flagging
+
+    Returns:
+        List of comparisons with time and memory ratios and a regression flag
+    """
+    previous = {(r["case"], r["models"], r["years"]): r for r in baseline["results"]}
+    comparisons = []
+    for result in current["results"]:
+        key = (result["case"], result["models"], result["years"])
+        if key not in previous:
+            continue
+        old = previous[key]
+        time_ratio = result["best_s"] / old["best_s"] if old["best_s"] > 0 else 1.0
+        memory_ratio = result["peak_bytes"] / old["peak_bytes"] if old["peak_bytes"] > 0 else 1.0
+        comparisons.append(
+            {
+                "case": key[0],
+                "models": key[1],
+                "years": key[2],
+                "time_ratio": time_ratio,
+                "memory_ratio": memory_ratio,
+                "regression": time_ratio > 1 + tolerance or memory_ratio > 1 + tolerance,
+            }
+        )
+    return comparisons
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the DCF valuation engine")
+    parser.add_argument("--models", type=int, nargs="+", default=list(DEFAULT_MODEL_COUNTS))
+    parser.add_argument("--years", type=int, nargs="+", default=list(DEFAULT_HORIZONS))
+    parser.add_argument("--cases", nargs="+", choices=list(BENCHMARK_CASES))
+    parser.add_argument("--max-scalar-models", type=int, default=1000)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as a JSON baseline")
+    parser.add_argument("--compare", help="Baseline JSON to diff against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(
+        args.models, args.years, args.cases, args.max_scalar_models, args.seed, args.min_time
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if not args.compare:
+        return 0
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    comparisons = compare_baselines(baseline, current, args.tolerance)
+    print("\nCOMPARISON WITH BASELINE")
+    for c in comparisons:
+        flag = "REGRESSION" if c["regression"] else ""
+        print(
+            f"{c['case']:34s} models={c['models']:>7d} years={c['years']:>3d} "
+            f"time x{c['time_ratio']:.2f} memory x{c['memory_ratio']:.2f} {flag}"
+        )
+    return 1 if any(c["regression"] for c in comparisons) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,8 +3,87 @@ Discounted Cash Flow (DCF) valuation model.
 Implements enterprise valuation using free cash flow projections.
 """
 
+import hashlib
+import json
+import os
+import sqlite3
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
 import numpy as np
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+
+from quantile_sketch import StreamingQuantileSketch
+
+# Variables accepted by DCFModel.sensitivity_analysis
+SENSITIVITY_VARIABLES = ("wacc", "growth", "margin")
+
+# Sensitivity variables that change projected cash flows (the rest only change discounting)
+PROJECTION_VARIABLES = frozenset({"margin"})
+
+# Per-year line items produced by DCFModel.project_cash_flows, in order
+PROJECTION_LINE_ITEMS = ("revenue", "ebitda", "ebit", "tax", "nopat", "capex", "nwc_change", "fcf")
+
+# Projection years invalidated when an assumption changes in year k:
+#   "year" -> k only, "pair" -> k and k + 1, "forward" -> k onwards,
+#   "all" -> every year, "none" -> terminal value only
+ASSUMPTION_DEPENDENCIES = {
+    "revenue_growth": "forward",
+    "ebitda_margin": "year",
+    "capex_percent": "year",
+    "nwc_percent": "pair",
+    "tax_rate": "all",
+    "terminal_growth": "none",
+    "periods_per_year": "none",
+    "discount_convention": "none",
+}
+
+# Where within each projection period cash flows are discounted
+DISCOUNT_CONVENTIONS = ("end", "mid")
+
+# Input columns for run_dcf_sweep (per-year fields are (n_models, n_years))
+SWEEP_INPUT_FIELDS = (
+    "base_revenue",
+    "revenue_growth",
+    "ebitda_margin",
+    "capex_percent",
+    "nwc_percent",
+    "wacc",
+    "terminal_growth",
+    "tax_rate",
+)
+SWEEP_YEARLY_FIELDS = ("revenue_growth", "ebitda_margin", "capex_percent", "nwc_percent")
+SWEEP_DEFAULTS = {"terminal_growth": 0.03, "tax_rate": 0.25}
+
+# Columns of the result table returned by run_dcf_sweep
+SWEEP_RESULT_FIELDS = (
+    "enterprise_value",
+    "pv_fcf",
+    "pv_terminal",
+    "terminal_value",
+    "terminal_percent",
+    "equity_value",
+    "value_per_share",
+)
+
+# Fewest rows per run_dcf_sweep worker: below this, copying the inputs into shared
+# memory and starting processes costs more than valuing the rows in-process
+# (about 0.25us a row on one core; see the run_dcf_sweep_pool benchmark case)
+SWEEP_MIN_ROWS_PER_WORKER = 500000
+
+# Columns expected by load_historicals_csv, one row per (ticker, year)
+HISTORICAL_CSV_COLUMNS = ("ticker", "year", "revenue", "ebitda", "capex", "nwc")
+
+# Default Monte Carlo spreads around the model's own assumptions
+DEFAULT_SIMULATION_DISTRIBUTIONS = {
+    "revenue_growth": {"type": "normal", "std": 0.02},
+    "ebitda_margin": {"type": "normal", "std": 0.015},
+    "capex_percent": {"type": "normal", "std": 0.005},
+    "wacc": {"type": "triangular", "width": 0.01},
+    "terminal_growth": {"type": "triangular", "width": 0.005},
+}
 
 
 class DCFModel:
@@ -18,12 +97,88 @@ class DCFModel:
             company_name: Name of the company being valued
         """
         self.company_name = company_name
+
+        # Incremental recomputation state (see update_assumption)
+        self._stale_years = set()
+        self._stale_pv = set()
+        self._valuation_stale = False
+        self._discount_key = None
+        self._discount_factors = np.empty(0)
+        self._nwc = []
+        self._pv_fcf = []
+        self._valuation_args = None
+        self._equity_args = None
+        self._written = set()  # (section, name, year) input writes not yet synced
+
         self.historical_financials = {}
         self.projections = {}
         self.assumptions = {}
         self.wacc_components = {}
         self.valuation_results = {}
 
+    @property
+    def historical_financials(self) -> Dict[str, Any]:
+        """Historical financials; writes, including in-place series edits, are tracked."""
+        return self._historical_financials
+
+    @historical_financials.setter
+    def historical_financials(self, value: Dict[str, Any]):
+        self._historical_financials = _InputDict(
+            self._input_written, "historical_financials", value
+        )
+        self._input_written("historical_financials")
+
+    @property
+    def assumptions(self) -> Dict[str, Any]:
+        """Projection assumptions; writes, including in-place series edits, are tracked."""
+        return self._assumptions
+
+    @assumptions.setter
+    def assumptions(self, value: Dict[str, Any]):
+        self._assumptions = _InputDict(self._input_written, "assumptions", value)
+        self._input_written("assumptions")
+
+    @property
+    def wacc_components(self) -> Dict[str, float]:
+        """WACC inputs and result; writes are tracked."""
+        return self._wacc_components
+
+    @wacc_components.setter
+    def wacc_components(self, value: Dict[str, float]):
+        self._wacc_components = _InputDict(self._input_written, "wacc_components", value)
+        self._input_written("wacc_components")
+
+    @property
+    def projections(self) -> Dict[str, List[float]]:
+        """Projected financials, with any stale years recomputed on access."""
+        if self._projections:
+            self._sync_inputs()
+            if self._stale_years:
+                self._refresh_projections()
+        return self._projections
+
+    @projections.setter
+    def projections(self, value: Dict[str, List[float]]):
+        self._projections = value
+        self._stale_years = set()
+
+    @property
+    def valuation_results(self) -> Dict[str, Any]:
+        """Valuation results, revalued on access if an input changed since the last run."""
+        if self._valuation_args is not None:
+            self._sync_inputs()
+        if self._valuation_stale and self._valuation_args is not None:
+            equity_args = self._equity_args
+            self.calculate_enterprise_value(*self._valuation_args)
+            if equity_args is not None:
+                self.calculate_equity_value(*equity_args)
+        return self._valuation_results
+
+    @valuation_results.setter
+    def valuation_results(self, value: Dict[str, Any]):
+        self._valuation_results = value
+        self._valuation_stale = False
+
     def set_historical_financials(
         self,
         revenue: List[float],
@@ -52,6 +207,9 @@ class DCFModel:
             "capex_percent": [capex[i] / revenue[i] for i in range(len(revenue))],
         }
 
+        # Base revenue feeds every projected year
+        self._mark_stale(range(self.assumptions.get("projection_years", 0)))
+
     def set_assumptions(
         self,
         projection_years: int = 5,
@@ -61,19 +219,31 @@ class DCFModel:
         capex_percent: List[float] = None,
         nwc_percent: List[float] = None,
         terminal_growth: float = 0.03,
+        periods_per_year: int = 1,
+        discount_convention: str = "end",
     ):
         """
         Set projection assumptions.
 
+        Per-year inputs are per projection period when periods_per_year > 1
+        (e.g. quarterly growth and margins); WACC and terminal growth stay annual.
+
         Args:
-            projection_years: Number of years to project
+            projection_years: Number of periods to project (years unless periods_per_year > 1)
             revenue_growth: Annual revenue growth rates
             ebitda_margin: EBITDA margins by year
             tax_rate: Corporate tax rate
             capex_percent: Capex as % of revenue
             nwc_percent: NWC as % of revenue
             terminal_growth: Terminal growth rate
+            periods_per_year: Projection periods per year (1 annual, 4 quarterly, 12 monthly)
+            discount_convention: 'end' or 'mid' (mid-period) discounting of cash flows
         """
+        if discount_convention not in DISCOUNT_CONVENTIONS:
+            raise ValueError(f"Convention must be one of {', '.join(DISCOUNT_CONVENTIONS)}")
+        if periods_per_year < 1:
+            raise ValueError("periods_per_year must be at least 1")
+
         if revenue_growth is None:
             revenue_growth = [0.10] * projection_years  # Default 10% growth
 
@@ -99,8 +269,12 @@ class DCFModel:
             "capex_percent": capex_percent,
             "nwc_percent": nwc_percent,
             "terminal_growth": terminal_growth,
+            "periods_per_year": periods_per_year,
+            "discount_convention": discount_convention,
         }
 
+        self._mark_stale(range(projection_years))
+
     def calculate_wacc(
         self,
         risk_free_rate: float,
@@ -150,8 +324,126 @@ class DCFModel:
             "wacc": wacc,
         }
 
+        self._mark_stale()
         return wacc
 
+    def update_assumption(self, name: str, value: Any, year: Optional[int] = None):
+        """
+        Change one input and mark only the outputs that depend on it as stale.
+
+        Stale projection years and discounted values are recomputed lazily the
+        next time projections or valuation_results are read, so a what-if
+        change costs O(affected years) rather than a full model run.
+
+        Args:
+            name: Assumption name (see ASSUMPTION_DEPENDENCIES) or 'wacc'
+            value: New value (a full series or scalar, or one year's value if year is given)
+            year: Zero-based projection year to change for per-year assumptions
+        """
+        # Settle earlier direct writes first; this change's own writes are marked below
+        self._sync_inputs()
+        if name == "wacc":
+            self.wacc_components["wacc"] = value
+            self._written.clear()
+            self._mark_stale()
+            return
+
+        if name not in ASSUMPTION_DEPENDENCIES:
+            raise ValueError(f"Unknown assumption: {name}")
+
+        years = self.assumptions["projection_years"]
+        if year is not None:
+            if not isinstance(self.assumptions[name], list):
+                raise ValueError(f"{name} is a single value; year applies to per-year assumptions")
+            changed = [year] if self.assumptions[name][year] != value else []
+            self.assumptions[name][year] = value
+        elif isinstance(self.assumptions[name], list):
+            old = self.assumptions[name]
+            value = list(value)
+            changed = [i for i in range(years) if old[i] != value[i]]
+            self.assumptions[name] = value
+        else:
+            changed = [0] if self.assumptions[name] != value else []
+            self.assumptions[name] = value
+
+        self._written.clear()
+        self._mark_stale(self._dependent_years(name, changed))
+
+    def _dependent_years(self, name: str, changed: Any) -> set:
+        """Projection years that depend on the given changed years of one assumption."""
+        years = self.assumptions["projection_years"]
+        stale = set()
+        rule = ASSUMPTION_DEPENDENCIES[name]
+        for k in changed:
+            if rule == "year":
+                stale.add(k)
+            elif rule == "pair":
+                stale.update(range(k, min(k + 2, years)))
+            elif rule == "forward":
+                stale.update(range(k, years))
+            elif rule == "all":
+                stale.update(range(years))
+        return stale
+
+    def invalidate(self, projections: bool = True):
+        """
+        Discard cached results so the next read recomputes them.
+
+        Args:
+            projections: Also recompute projected years (False redoes only the discounting)
+        """
+        years = range(self.assumptions.get("projection_years", 0))
+        self._mark_stale(years if projections else ())
+        self._stale_pv.update(years)
+
+    def _mark_stale(self, years: Any = ()):
+        """Record projection years (and therefore discounted values) needing recomputation."""
+        self._stale_years.update(years)
+        self._stale_pv.update(years)
+        self._valuation_stale = True
+
+    def fingerprint(self) -> Tuple[Any, ...]:
+        """
+        Hashable copy of the model's inputs (historicals, assumptions and WACC components).
+
+        Cached projections and results are left out, so two models (or one
+        model at two times) with equal inputs have equal fingerprints.
+
+        Returns:
+            Nested tuple suitable as a dict key
+        """
+        return tuple(
+            _freeze(inputs)
+            for inputs in (self.historical_financials, self.assumptions, self.wacc_components)
+        )
+
+    def _input_written(self, section: str, name: Optional[str] = None, year: Optional[int] = None):
+        """Record a write to an input section (one item, or one year of a series)."""
+        self._written.add((section, name, year))
+
+    def _sync_inputs(self):
+        """
+        Mark what inputs written directly (e.g. model.assumptions["terminal_growth"] = x) affect.
+
+        The input dicts and their series record every write, so this costs
+        nothing when no input changed and O(changed years) otherwise. A whole
+        section, historicals or projection_years being replaced stales every year.
+        """
+        if not self._written:
+            return
+        written, self._written = self._written, set()
+        stale = set()
+        for section, name, year in written:
+            if section == "wacc_components":
+                continue  # Discounting only
+            if section != "assumptions" or name not in ASSUMPTION_DEPENDENCIES:
+                stale.update(range(self.assumptions.get("projection_years", 0)))
+            elif year is None and isinstance(self.assumptions.get(name), list):
+                stale.update(self._dependent_years(name, range(len(self.assumptions[name]))))
+            else:
+                stale.update(self._dependent_years(name, [0 if year is None else year]))
+        self._mark_stale(stale)
+
     def project_cash_flows(self) -> Dict[str, List[float]]:
         """
         Project future cash flows based on assumptions.
@@ -161,67 +453,83 @@ class DCFModel:
         """
         years = self.assumptions["projection_years"]
 
-        # Start with last historical revenue if available
-        if self.historical_financials and "revenue" in self.historical_financials:
-            base_revenue = self.historical_financials["revenue"][-1]
+        projections = {"year": list(range(1, years + 1))}
+        projections.update((key, [0.0] * years) for key in PROJECTION_LINE_ITEMS)
+        self._nwc = [0.0] * years
+
+        for i in range(years):
+            self._project_year(projections, i)
+
+        self.projections = projections
+        # Projections are fresh; everything discounted from them is not
+        self._stale_pv.update(range(years))
+        self._valuation_stale = True
+        self._written.clear()
+        return projections
+
+    def _project_year(self, projections: Dict[str, List[float]], i: int):
+        """
+        Project a single year in place from the previous year's revenue and NWC.
+
+        Args:
+            projections: Projection lists to write year i into
+            i: Zero-based projection year
+        """
+        if i:
+            prev_revenue = projections["revenue"][i - 1]
+            prev_nwc = self._nwc[i - 1]
         else:
-            base_revenue = 1000  # Default base
-
-        projections = {
-            "year": list(range(1, years + 1)),
-            "revenue": [],
-            "ebitda": [],
-            "ebit": [],
-            "tax": [],
-            "nopat": [],
-            "capex": [],
-            "nwc_change": [],
-            "fcf": [],
-        }
+            # Start with last historical revenue if available
+            prev_revenue = self.base_revenue()
+            prev_nwc = prev_revenue * 0.10  # Initial NWC assumption
 
-        prev_revenue = base_revenue
-        prev_nwc = base_revenue * 0.10  # Initial NWC assumption
+        # Revenue
+        revenue = prev_revenue * (1 + self.assumptions["revenue_growth"][i])
 
-        for i in range(years):
-            # Revenue
-            revenue = prev_revenue * (1 + self.assumptions["revenue_growth"][i])
-            projections["revenue"].append(revenue)
+        # EBITDA
+        ebitda = revenue * self.assumptions["ebitda_margin"][i]
 
-            # EBITDA
-            ebitda = revenue * self.assumptions["ebitda_margin"][i]
-            projections["ebitda"].append(ebitda)
+        # EBIT (assuming depreciation = capex for simplicity)
+        depreciation = revenue * self.assumptions["capex_percent"][i]
+        ebit = ebitda - depreciation
 
-            # EBIT (assuming depreciation = capex for simplicity)
-            depreciation = revenue * self.assumptions["capex_percent"][i]
-            ebit = ebitda - depreciation
-            projections["ebit"].append(ebit)
+        # Tax
+        tax = ebit * self.assumptions["tax_rate"]
 
-            # Tax
-            tax = ebit * self.assumptions["tax_rate"]
-            projections["tax"].append(tax)
+        # NOPAT
+        nopat = ebit - tax
 
-            # NOPAT
-            nopat = ebit - tax
-            projections["nopat"].append(nopat)
+        # Capex
+        capex = revenue * self.assumptions["capex_percent"][i]
 
-            # Capex
-            capex = revenue * self.assumptions["capex_percent"][i]
-            projections["capex"].append(capex)
+        # NWC change
+        nwc = revenue * self.assumptions["nwc_percent"][i]
+        nwc_change = nwc - prev_nwc
 
-            # NWC change
-            nwc = revenue * self.assumptions["nwc_percent"][i]
-            nwc_change = nwc - prev_nwc
-            projections["nwc_change"].append(nwc_change)
+        # Free Cash Flow
+        fcf = nopat + depreciation - capex - nwc_change
 
-            # Free Cash Flow
-            fcf = nopat + depreciation - capex - nwc_change
-            projections["fcf"].append(fcf)
+        projections["revenue"][i] = revenue
+        projections["ebitda"][i] = ebitda
+        projections["ebit"][i] = ebit
+        projections["tax"][i] = tax
+        projections["nopat"][i] = nopat
+        projections["capex"][i] = capex
+        projections["nwc_change"][i] = nwc_change
+        projections["fcf"][i] = fcf
+        self._nwc[i] = nwc
 
-            prev_revenue = revenue
-            prev_nwc = nwc
+    def _refresh_projections(self):
+        """Recompute only the stale projection years, in order, from cached neighbours."""
+        projections = self._projections
+        years = self.assumptions["projection_years"]
+        if len(projections["fcf"]) != years or len(self._nwc) != years:
+            self.project_cash_flows()
+            return
 
-        self.projections = projections
-        return projections
+        for i in sorted(self._stale_years):
+            self._project_year(projections, i)
+        self._stale_years = set()
 
     def calculate_terminal_value(
         self, method: str = "growth", exit_multiple: Optional[float] = None
@@ -239,11 +547,13 @@ class DCFModel:
         if not self.projections:
             raise ValueError("Must project cash flows first")
 
+        periods_per_year = self._discount_options()["periods_per_year"]
+
         if method == "growth":
-            # Gordon growth model
+            # Gordon growth model on per-period rates
             final_fcf = self.projections["fcf"][-1]
-            terminal_growth = self.assumptions["terminal_growth"]
-            wacc = self.wacc_components["wacc"]
+            terminal_growth = _periodic_rate(self.assumptions["terminal_growth"], periods_per_year)
+            wacc = _periodic_rate(self.wacc_components["wacc"], periods_per_year)
 
             # FCF in terminal year
             terminal_fcf = final_fcf * (1 + terminal_growth)
@@ -255,7 +565,8 @@ class DCFModel:
             if exit_multiple is None:
                 exit_multiple = 10  # Default EV/EBITDA multiple
 
-            final_ebitda = self.projections["ebitda"][-1]
+            # Multiples apply to annual EBITDA, so annualise the final period
+            final_ebitda = self.projections["ebitda"][-1] * periods_per_year
             terminal_value = final_ebitda * exit_multiple
 
         else:
@@ -276,7 +587,7 @@ class DCFModel:
         Returns:
             Valuation results dictionary
         """
-        if not self.projections:
+        if not self._projections:
             self.project_cash_flows()
 
         if "wacc" not in self.wacc_components:
@@ -284,22 +595,36 @@ class DCFModel:
 
         wacc = self.wacc_components["wacc"]
         years = self.assumptions["projection_years"]
-
-        # Calculate PV of projected cash flows
-        pv_fcf = []
-        for i, fcf in enumerate(self.projections["fcf"]):
-            discount_factor = (1 + wacc) ** (i + 1)
-            pv = fcf / discount_factor
-            pv_fcf.append(pv)
+        options = self._discount_options()
+        projections = self.projections  # Brings stale years up to date
+
+        # Same discount kernel as calculate_enterprise_value_batch, rebuilt only when
+        # WACC, the horizon or the period convention changes
+        discount_key = (wacc, years, options["periods_per_year"], options["convention"])
+        if self._discount_key != discount_key:
+            self._discount_factors = discount_factors(wacc, years, **options)
+            self._discount_key = discount_key
+            self._stale_pv = set(range(years))
+        factors = self._discount_factors
+
+        # Calculate PV of projected cash flows, reusing unchanged years
+        if len(self._pv_fcf) != years or len(self._stale_pv) == years:
+            self._pv_fcf = (np.asarray(projections["fcf"], dtype=float) / factors[:years]).tolist()
+        else:
+            for i in self._stale_pv:
+                self._pv_fcf[i] = float(projections["fcf"][i] / factors[i])
+        self._stale_pv = set()
+        pv_fcf = list(self._pv_fcf)
 
         total_pv_fcf = sum(pv_fcf)
 
         # Calculate terminal value
         terminal_value = self.calculate_terminal_value(terminal_method, exit_multiple)
 
-        # Discount terminal value
-        terminal_discount = (1 + wacc) ** years
-        pv_terminal = terminal_value / terminal_discount
+        # Discount terminal value: a perpetuity continues the cash-flow timing,
+        # an exit multiple is realised at the end of the horizon
+        terminal_discount = factors[-1] if terminal_method == "multiple" else factors[years - 1]
+        pv_terminal = float(terminal_value / terminal_discount)
 
         # Enterprise value
         enterprise_value = total_pv_fcf + pv_terminal
@@ -313,8 +638,10 @@ class DCFModel:
             "pv_fcf_detail": pv_fcf,
             "terminal_percent": pv_terminal / enterprise_value * 100,
         }
+        self._valuation_args = (terminal_method, exit_multiple)
+        self._equity_args = None
 
-        return self.valuation_results
+        return self._valuation_results
 
     def calculate_equity_value(
         self, net_debt: float, cash: float = 0, shares_outstanding: float = 100
@@ -349,7 +676,8 @@ class DCFModel:
             "cash": cash,
         }
 
-        self.valuation_results.update(equity_results)
+        self._valuation_results.update(equity_results)
+        self._equity_args = (net_debt, cash, shares_outstanding)
         return equity_results
 
     def sensitivity_analysis(
@@ -358,6 +686,10 @@ class DCFModel:
         """
         Perform two-way sensitivity analysis on valuation.
 
+        Cash flows are projected once per distinct projection input (only
+        'margin' changes them); WACC and terminal growth are applied to the
+        whole grid as one broadcast discounting step. The model is not mutated.
+
         Args:
             variable1: First variable to test ('wacc', 'growth', 'margin')
             range1: Range of values for variable1
@@ -367,43 +699,389 @@ class DCFModel:
         Returns:
             2D array of valuations
         """
-        results = np.zeros((len(range1), len(range2)))
-
-        # Store original values
-        orig_wacc = self.wacc_components.get("wacc", 0.10)
-        orig_growth = self.assumptions.get("terminal_growth", 0.03)
-        orig_margin = self.assumptions.get("ebitda_margin", [0.20] * 5)
-
-        for i, val1 in enumerate(range1):
-            for j, val2 in enumerate(range2):
-                # Update first variable
-                if variable1 == "wacc":
-                    self.wacc_components["wacc"] = val1
-                elif variable1 == "growth":
-                    self.assumptions["terminal_growth"] = val1
-                elif variable1 == "margin":
-                    self.assumptions["ebitda_margin"] = [val1] * len(orig_margin)
-
-                # Update second variable
-                if variable2 == "wacc":
-                    self.wacc_components["wacc"] = val2
-                elif variable2 == "growth":
-                    self.assumptions["terminal_growth"] = val2
-                elif variable2 == "margin":
-                    self.assumptions["ebitda_margin"] = [val2] * len(orig_margin)
-
-                # Recalculate
-                self.project_cash_flows()
-                valuation = self.calculate_enterprise_value()
-                results[i, j] = valuation["enterprise_value"]
-
-        # Restore original values
-        self.wacc_components["wacc"] = orig_wacc
-        self.assumptions["terminal_growth"] = orig_growth
-        self.assumptions["ebitda_margin"] = orig_margin
+        for variable in (variable1, variable2):
+            if variable not in SENSITIVITY_VARIABLES:
+                raise ValueError(f"Variable must be one of {', '.join(SENSITIVITY_VARIABLES)}")
+
+        if "wacc" not in self.wacc_components and "wacc" not in (variable1, variable2):
+            raise ValueError("Must calculate WACC first")
+
+        grid1, grid2 = np.meshgrid(
+            np.asarray(range1, dtype=float), np.asarray(range2, dtype=float), indexing="ij"
+        )
+        cells = {
+            "wacc": np.full(grid1.shape, self.wacc_components.get("wacc", 0.10)),
+            "growth": np.full(grid1.shape, self.assumptions["terminal_growth"]),
+        }
+        cells[variable1] = grid1
+        cells[variable2] = grid2  # Second variable wins if both name the same input
+
+        if PROJECTION_VARIABLES.intersection(cells):
+            # Project once per distinct margin, then gather rows for every cell
+            margins, cell_index = np.unique(cells["margin"], return_inverse=True)
+            years = self.assumptions["projection_years"]
+            fcf, _ = _batch_fcf(
+                *self._batch_projection_inputs(
+                    ebitda_margin=np.repeat(margins[:, None], years, axis=1)
+                )
+            )
+            fcf = fcf[cell_index.ravel()]
+        else:
+            # WACC and terminal growth never touch the projections: project once
+            fcf, _ = _batch_fcf(*self._batch_projection_inputs())
+            fcf = np.broadcast_to(fcf, (grid1.size, fcf.shape[1]))
+
+        valuation = calculate_enterprise_value_batch(
+            fcf, cells["wacc"].ravel(), cells["growth"].ravel(), **self._discount_options()
+        )
+        return valuation["enterprise_value"].reshape(grid1.shape)
+
+    def gradients(
+        self, terminal_method: Optional[str] = None, exit_multiple: Optional[float] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Partial derivatives of enterprise value (and value per share) with respect to every input.
+
+        Uses one closed-form backward pass over the projection recurrence
+        instead of bumping each input and re-running the model. WACC is
+        treated as an input in its own right, so the tax-rate sensitivity
+        holds WACC fixed.
+
+        Args:
+            terminal_method: Terminal value method (defaults to the last valuation's, else 'growth')
+            exit_multiple: Exit multiple if using multiple method
+
+        Returns:
+            Dictionary with 'enterprise_value' gradients and, once equity value
+            has been calculated, 'value_per_share' gradients. Per-year inputs
+            map to lists, scalar inputs to floats
+        """
+        if "wacc" not in self.wacc_components:
+            raise ValueError("Must calculate WACC first")
+
+        if terminal_method is None:
+            terminal_method, exit_multiple = self._valuation_args or ("growth", None)
+        if terminal_method not in ("growth", "multiple"):
+            raise ValueError("Method must be 'growth' or 'multiple'")
+        if exit_multiple is None:
+            exit_multiple = 10  # Default EV/EBITDA multiple
+
+        if not self._projections:
+            self.project_cash_flows()
+        projections = self.projections
+
+        years = self.assumptions["projection_years"]
+        growth = np.asarray(self.assumptions["revenue_growth"][:years], dtype=float)
+        margin = np.asarray(self.assumptions["ebitda_margin"][:years], dtype=float)
+        capex_pct = np.asarray(self.assumptions["capex_percent"][:years], dtype=float)
+        nwc_pct = np.asarray(self.assumptions["nwc_percent"][:years], dtype=float)
+        tax_rate = self.assumptions["tax_rate"]
+        terminal_growth = self.assumptions["terminal_growth"]
+        wacc = self.wacc_components["wacc"]
+
+        base_revenue = self.base_revenue()
+        revenue = np.asarray(projections["revenue"], dtype=float)
+        prev_revenue = np.concatenate([[base_revenue], revenue[:-1]])
+        fcf = np.asarray(projections["fcf"], dtype=float)
+        options = self._discount_options()
+        periods_per_year = options["periods_per_year"]
+        exponents = _discount_exponents(years, periods_per_year, options["convention"])
+        discount = (1 + wacc) ** -exponents
+        periods, discount = exponents[:years], discount[:years]
+
+        # dEV/dFCF_i, including the terminal value's dependence on the final FCF
+        d_fcf = discount.copy()
+        d_ebitda_final = 0.0
+        if terminal_method == "growth":
+            # Per-period rates, and their derivatives with respect to the annual ones
+            wacc_p = _periodic_rate(wacc, periods_per_year)
+            growth_p = _periodic_rate(terminal_growth, periods_per_year)
+            d_wacc_p = (1 + wacc) ** (1 / periods_per_year - 1) / periods_per_year
+            d_growth_p = (1 + terminal_growth) ** (1 / periods_per_year - 1) / periods_per_year
+            spread = wacc_p - growth_p
+            terminal_value = fcf[-1] * (1 + growth_p) / spread
+            terminal_discount, terminal_period = discount[-1], periods[-1]
+            d_fcf[-1] += terminal_discount * (1 + growth_p) / spread
+            d_terminal_growth = terminal_discount * fcf[-1] * (1 + wacc_p) / spread**2 * d_growth_p
+            d_terminal_value_d_wacc = -terminal_value / spread * d_wacc_p
+        else:
+            terminal_value = revenue[-1] * margin[-1] * periods_per_year * exit_multiple
+            terminal_discount, terminal_period = (1 + wacc) ** -exponents[-1], exponents[-1]
+            d_ebitda_final = terminal_discount * periods_per_year * exit_multiple
+            d_terminal_growth = 0.0
+            d_terminal_value_d_wacc = 0.0
+
+        # FCF_i = R_i (m_i - c_i)(1 - t) - (N_i - N_{i-1}), with N_i = R_i n_i and N_0 = 0.1 B
+        d_nwc = -d_fcf + np.append(d_fcf[1:], 0.0)
+        d_ebitda = np.zeros(years)
+        d_ebitda[-1] = d_ebitda_final
+        local_revenue = d_fcf * (margin - capex_pct) * (1 - tax_rate) + d_nwc * nwc_pct
+        local_revenue += d_ebitda * margin
+
+        # Revenue compounds forward, so its adjoint accumulates backward
+        d_revenue = local_revenue.copy()
+        for i in range(years - 2, -1, -1):
+            d_revenue[i] += d_revenue[i + 1] * (1 + growth[i + 1])
+
+        d_wacc = float(
+            np.sum(-periods * fcf * discount / (1 + wacc))
+            + d_terminal_value_d_wacc * terminal_discount
+            - terminal_period * terminal_value * terminal_discount / (1 + wacc)
+        )
+
+        ev_gradients = {
+            "revenue_growth": (d_revenue * prev_revenue).tolist(),
+            "ebitda_margin": ((d_fcf * (1 - tax_rate) + d_ebitda) * revenue).tolist(),
+            "capex_percent": (-d_fcf * (1 - tax_rate) * revenue).tolist(),
+            "nwc_percent": (d_nwc * revenue).tolist(),
+            "tax_rate": float(-np.sum(d_fcf * revenue * (margin - capex_pct))),
+            "wacc": d_wacc,
+            "terminal_growth": float(d_terminal_growth),
+            "base_revenue": float(d_revenue[0] * (1 + growth[0]) + d_fcf[0] * 0.10),
+        }
+
+        results = {"enterprise_value": ev_gradients}
+        shares = self._valuation_results.get("shares_outstanding")
+        if shares is not None and shares > 0:
+            # Value per share moves one-for-one with EV / shares outstanding
+            results["value_per_share"] = {
+                name: [v / shares for v in value] if isinstance(value, list) else value / shares
+                for name, value in ev_gradients.items()
+            }
+
+        return results
+
+    def solve_implied(
+        self,
+        target_price: float,
+        variable: str = "wacc",
+        net_debt: Optional[float] = None,
+        cash: Optional[float] = None,
+        shares_outstanding: Optional[float] = None,
+        tol: float = 1e-10,
+    ) -> float:
+        """
+        Find the WACC or terminal growth at which value per share equals a market price.
+
+        Reuses the projected cash flows (no re-projection) and only repeats the
+        discounting step; see solve_implied_batch.
+
+        Args:
+            target_price: Market share price to match
+            variable: 'wacc' or 'terminal_growth'
+            net_debt: Net debt (uses equity results if not provided)
+            cash: Cash and equivalents (uses equity results if not provided)
+            shares_outstanding: Shares outstanding (uses equity results if not provided)
+            tol: Convergence tolerance on the solved rate
+
+        Returns:
+            Implied rate as decimal (NaN if no rate reproduces the price)
+        """
+        if net_debt is None:
+            net_debt = self.valuation_results.get("net_debt")
+        if cash is None:
+            cash = self.valuation_results.get("cash", 0)
+        if shares_outstanding is None:
+            shares_outstanding = self.valuation_results.get("shares_outstanding")
+        if net_debt is None or not shares_outstanding:
+            raise ValueError("Must calculate equity value first or pass net debt and shares")
+
+        if not self._projections:
+            self.project_cash_flows()
+        projections = self.projections
+        terminal_method, exit_multiple = self._valuation_args or ("growth", None)
+
+        solution = solve_implied_batch(
+            projections["fcf"],
+            target_price,
+            shares_outstanding,
+            net_debt,
+            cash,
+            wacc=self.wacc_components.get("wacc"),
+            terminal_growth=self.assumptions["terminal_growth"],
+            variable=variable,
+            final_ebitda=projections["ebitda"][-1],
+            terminal_method=terminal_method,
+            exit_multiple=exit_multiple,
+            tol=tol,
+            **self._discount_options(),
+        )
+        return float(solution["value"][0])
+
+    def simulate(
+        self,
+        n_paths: int = 10000,
+        distributions: Optional[Dict[str, Dict[str, Any]]] = None,
+        net_debt: Optional[float] = None,
+        cash: float = 0,
+        shares_outstanding: Optional[float] = None,
+        percentiles: Tuple[float, ...] = (5, 10, 25, 50, 75, 90, 95),
+        chunk_size: int = 100000,
+        seed: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run a Monte Carlo valuation around the current assumptions.
+
+        Each distribution is centred on the model's own inputs (set_assumptions
+        and calculate_wacc); per-year series receive one shock per path applied
+        to every year. Paths are valued in vectorized chunks and summarised by
+        fixed-memory quantile sketches, so memory does not grow with n_paths.
+
+        Args:
+            n_paths: Number of simulated paths
+            distributions: Variable name to spec, e.g. {"wacc": {"type": "normal", "std": 0.01}}.
+                Types are 'normal' (std), 'uniform' and 'triangular' (width either side)
+            net_debt: Net debt for per-share values (uses equity results if not provided)
+            cash: Cash and equivalents (if not netted)
+            shares_outstanding: Shares for per-share values (uses equity results if not provided)
+            percentiles: Percentiles to report
+            chunk_size: Paths valued per vectorized batch
+            seed: Random seed for reproducible runs
+
+        Returns:
+            Simulation results with EV and value-per-share distribution statistics
+        """
+        if "wacc" not in self.wacc_components:
+            raise ValueError("Must calculate WACC first")
+
+        if distributions is None:
+            distributions = DEFAULT_SIMULATION_DISTRIBUTIONS
+        unknown = set(distributions) - set(DEFAULT_SIMULATION_DISTRIBUTIONS)
+        if unknown:
+            raise ValueError(f"Cannot simulate {', '.join(sorted(unknown))}")
+
+        if net_debt is None:
+            net_debt = self.valuation_results.get("net_debt")
+            cash = self.valuation_results.get("cash", cash)
+        if shares_outstanding is None:
+            shares_outstanding = self.valuation_results.get("shares_outstanding")
+        per_share = net_debt is not None and shares_outstanding is not None
+
+        centers = {
+            "revenue_growth": np.asarray(self.assumptions["revenue_growth"], dtype=float),
+            "ebitda_margin": np.asarray(self.assumptions["ebitda_margin"], dtype=float),
+            "capex_percent": np.asarray(self.assumptions["capex_percent"], dtype=float),
+            "wacc": np.asarray(self.wacc_components["wacc"], dtype=float),
+            "terminal_growth": np.asarray(self.assumptions["terminal_growth"], dtype=float),
+        }
+
+        rng = np.random.default_rng(seed)
+        ev_sketch = StreamingQuantileSketch()
+        vps_sketch = StreamingQuantileSketch()
+        invalid_paths = 0
+
+        for start in range(0, n_paths, chunk_size):
+            size = min(chunk_size, n_paths - start)
+            draws = {}
+            for name, center in centers.items():
+                if name in distributions:
+                    shape = (size, 1) if center.ndim else (size,)
+                    draws[name] = center + _draw_shocks(rng, distributions[name], shape)
+                else:
+                    draws[name] = center
+
+            # Perpetuity growth is undefined when WACC does not exceed terminal growth
+            valid = np.broadcast_to(draws["wacc"] > draws["terminal_growth"], (size,))
+            invalid_paths += size - int(valid.sum())
+
+            fcf, _ = _batch_fcf(
+                *self._batch_projection_inputs(
+                    revenue_growth=draws["revenue_growth"],
+                    ebitda_margin=draws["ebitda_margin"],
+                    capex_percent=draws["capex_percent"],
+                )
+            )
+            fcf = np.broadcast_to(fcf, (size, fcf.shape[1]))
+            valuation = calculate_enterprise_value_batch(
+                fcf, draws["wacc"], draws["terminal_growth"], **self._discount_options()
+            )
+            ev = valuation["enterprise_value"][valid]
+
+            ev_sketch.update(ev)
+            if per_share and shares_outstanding > 0:
+                vps_sketch.update((ev - net_debt + cash) / shares_outstanding)
+
+        results = {
+            "n_paths": n_paths,
+            "valid_paths": n_paths - invalid_paths,
+            "invalid_paths": invalid_paths,
+            "enterprise_value": ev_sketch.summary(percentiles),
+        }
+        if per_share:
+            results["value_per_share"] = vps_sketch.summary(percentiles)
 
         return results
 
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Capture the model's full state, including cached projections and valuation.
+
+        Containers are copied one level down (series lists, sets, arrays), which
+        is all the model ever mutates in place, so this is much cheaper than
+        copy.deepcopy of the model.
+
+        Returns:
+            Opaque state for restore()
+        """
+        return {name: _copy_state(value) for name, value in vars(self).items()}
+
+    def restore(self, state: Dict[str, Any]):
+        """
+        Return the model to a snapshot; the snapshot stays reusable.
+
+        Args:
+            state: Result of snapshot()
+        """
+        for name, value in state.items():
+            if name in _INPUT_SECTIONS:
+                # Rewrap the copied section so its writes stay tracked
+                value = _InputDict(self._input_written, _INPUT_SECTIONS[name], value)
+            else:
+                value = _copy_state(value)
+            setattr(self, name, value)
+
+    def __setstate__(self, state: Dict[str, Any]):
+        # Pickled input sections come back as plain dicts
+        self.__dict__.update(state)
+        for name, section in _INPUT_SECTIONS.items():
+            setattr(self, name, _InputDict(self._input_written, section, state[name]))
+
+    def base_revenue(self) -> float:
+        """
+        Revenue the projections grow from.
+
+        Returns:
+            Last historical revenue, or the default base if none is set
+        """
+        if self.historical_financials and "revenue" in self.historical_financials:
+            return self.historical_financials["revenue"][-1]
+        return 1000  # Default base
+
+    def _discount_options(self) -> Dict[str, Any]:
+        """Period frequency and convention as keyword arguments for the batched discounting."""
+        return {
+            "periods_per_year": self.assumptions.get("periods_per_year", 1),
+            "convention": self.assumptions.get("discount_convention", "end"),
+        }
+
+    def _batch_projection_inputs(self, **overrides: Any) -> Tuple[np.ndarray, ...]:
+        """
+        Current assumptions as inputs for the batched projection functions.
+
+        Args:
+            **overrides: Assumption arrays to use instead of the stored values
+
+        Returns:
+            Broadcast (base, growth, margin, capex_pct, nwc_pct, tax) arrays
+        """
+        inputs = {
+            name: self.assumptions[name]
+            for name in ("revenue_growth", "ebitda_margin", "capex_percent", "nwc_percent")
+        }
+        inputs["tax_rate"] = self.assumptions["tax_rate"]
+        inputs.update(overrides)
+        return _batch_inputs(base_revenue=self.base_revenue(), **inputs)
+
     def generate_summary(self) -> str:
         """
         Generate text summary of valuation results.
@@ -447,6 +1125,1676 @@ class DCFModel:
         return "\n".join(summary)
 
 
+class CompactDCFModel:
+    """
+    Memory-lean DCF model for holding many valuations at once.
+
+    All series and scalars live in one contiguous float64 buffer instead of
+    dicts of boxed floats. historical_financials, assumptions, projections,
+    wacc_components and valuation_results are rebuilt on access as dicts of
+    array views and scalars. assumptions and wacc_components write through to
+    the buffer, and a hash of the inputs taken at projection time catches
+    in-place writes to series views, so stale projections and valuations are
+    recomputed on access as on DCFModel. Valuation runs through the batched
+    kernels and matches DCFModel exactly.
+    """
+
+    __slots__ = (
+        "company_name",
+        "_data",
+        "_n_history",
+        "_n_years",
+        "_terminal_method",
+        "_projected_inputs",
+        "_valuation_args",
+        "_equity_args",
+    )
+
+    def __init__(self, company_name: str = "Company"):
+        """
+        Initialize compact DCF model.
+
+        Args:
+            company_name: Name of the company being valued
+        """
+        self.company_name = company_name
+        self._data = np.full(len(_SCALAR_FIELDS), np.nan)
+        self._n_history = 0
+        self._n_years = 0
+        self._terminal_method = None
+        self._projected_inputs = None
+        self._valuation_args = None
+        self._equity_args = None
+
+    # Buffer layout: [scalars | historical series | per-year series]
+
+    @property
+    def _scalars(self) -> np.ndarray:
+        """Named scalar slots (NaN marks unset)."""
+        return self._data[: len(_SCALAR_FIELDS)]
+
+    @property
+    def _historicals(self) -> np.ndarray:
+        """(len(_HISTORICAL_FIELDS), n_history) view of historical series."""
+        start = len(_SCALAR_FIELDS)
+        stop = start + len(_HISTORICAL_FIELDS) * self._n_history
+        return self._data[start:stop].reshape(len(_HISTORICAL_FIELDS), self._n_history)
+
+    @property
+    def _yearly(self) -> np.ndarray:
+        """(len(_YEARLY_FIELDS), n_years) view of assumption, projection and PV series."""
+        start = len(_SCALAR_FIELDS) + len(_HISTORICAL_FIELDS) * self._n_history
+        return self._data[start:].reshape(len(_YEARLY_FIELDS), self._n_years)
+
+    def _resize(self, n_history: int, n_years: int):
+        """Reallocate the buffer for new series lengths, keeping sections whose size is unchanged."""
+        old = (self._scalars, self._historicals, self._yearly)
+        self._data = np.full(
+            len(_SCALAR_FIELDS)
+            + len(_HISTORICAL_FIELDS) * n_history
+            + len(_YEARLY_FIELDS) * n_years,
+            np.nan,
+        )
+        self._n_history, self._n_years = n_history, n_years
+        for section, previous in zip((self._scalars, self._historicals, self._yearly), old):
+            if section.shape == previous.shape:
+                section[...] = previous
+
+    @property
+    def historical_financials(self) -> Dict[str, np.ndarray]:
+        """Historical series as views into the model's storage."""
+        if not self._historicals.shape[1]:
+            return {}
+        return dict(zip(_HISTORICAL_FIELDS, self._historicals))
+
+    @property
+    def assumptions(self) -> Dict[str, Any]:
+        """Projection assumptions, with per-year series as views; item writes go to storage."""
+        years = self._scalars[_SCALAR_INDEX["projection_years"]]
+        if np.isnan(years):
+            return {}
+        yearly = self._yearly
+        return _WriteThroughDict(
+            self._write_assumption,
+            {
+                "projection_years": int(years),
+                "revenue_growth": yearly[_YEARLY_INDEX["revenue_growth"]],
+                "ebitda_margin": yearly[_YEARLY_INDEX["ebitda_margin"]],
+                "tax_rate": self._scalar("tax_rate"),
+                "capex_percent": yearly[_YEARLY_INDEX["capex_percent"]],
+                "nwc_percent": yearly[_YEARLY_INDEX["nwc_percent"]],
+                "terminal_growth": self._scalar("terminal_growth"),
+                "periods_per_year": int(self._scalar("periods_per_year")),
+                "discount_convention": DISCOUNT_CONVENTIONS[int(self._scalar("mid_period"))],
+            },
+        )
+
+    @property
+    def projections(self) -> Dict[str, Any]:
+        """Projected financials as views, or an empty dict before projecting."""
+        if np.isnan(self._scalars[_SCALAR_INDEX["projected"]]):
+            return {}
+        self._sync_inputs()
+        projections = {"year": list(range(1, self._yearly.shape[1] + 1))}
+        for field in PROJECTION_LINE_ITEMS:
+            projections[field] = self._yearly[_YEARLY_INDEX[field]]
+        return projections
+
+    @property
+    def wacc_components(self) -> Dict[str, float]:
+        """WACC inputs and result, or an empty dict before calculate_wacc; item writes go to storage."""
+        components = self._scalar_group(_WACC_FIELDS, prefix="wacc_")
+        return _WriteThroughDict(self._write_wacc, components) if components else {}
+
+    @property
+    def valuation_results(self) -> Dict[str, Any]:
+        """Enterprise (and, once calculated, equity) valuation results."""
+        self._sync_inputs()
+        if self._terminal_method is None:
+            return {}
+        results = self._scalar_group(_VALUATION_FIELDS[:4])
+        results["terminal_method"] = self._terminal_method
+        results["pv_fcf_detail"] = self._yearly[_YEARLY_INDEX["pv_fcf_detail"]]
+        results.update(self._scalar_group(_VALUATION_FIELDS[4:]))
+        return results
+
+    def _scalar(self, field: str) -> float:
+        """Read one named scalar slot."""
+        return float(self._scalars[_SCALAR_INDEX[field]])
+
+    def _write_assumption(self, name: str, value: Any) -> Any:
+        """Store one assumption written through the assumptions view; returns the stored value."""
+        if name in ("revenue_growth", "ebitda_margin", "capex_percent", "nwc_percent"):
+            series = self._yearly[_YEARLY_INDEX[name]]
+            series[:] = value
+            return series
+        if name in ("tax_rate", "terminal_growth", "periods_per_year"):
+            if name == "periods_per_year" and value < 1:
+                raise ValueError("periods_per_year must be at least 1")
+            self._scalars[_SCALAR_INDEX[name]] = value
+            return value
+        if name == "discount_convention":
+            if value not in DISCOUNT_CONVENTIONS:
+                raise ValueError(f"Convention must be one of {', '.join(DISCOUNT_CONVENTIONS)}")
+            self._scalars[_SCALAR_INDEX["mid_period"]] = DISCOUNT_CONVENTIONS.index(value)
+            return value
+        if name == "projection_years":
+            raise ValueError("Use set_assumptions to change projection_years")
+        raise ValueError(f"Unknown assumption: {name}")
+
+    def _write_wacc(self, name: str, value: Any) -> Any:
+        """Store one WACC component written through the wacc_components view."""
+        if name not in _WACC_FIELDS:
+            raise ValueError(f"Unknown WACC component: {name}")
+        self._scalars[_SCALAR_INDEX["wacc_" + name]] = value
+        return value
+
+    def fingerprint(self) -> bytes:
+        """
+        Bytes of every stored input: settings, WACC components, historicals and assumption series.
+
+        Projections and results are left out, so equal inputs give equal fingerprints.
+
+        Returns:
+            Bytes suitable as a dict key
+        """
+        projected = _SCALAR_INDEX["projected"]
+        settings = self._scalars[:projected]
+        wacc = self._scalars[projected + 1 : projected + 1 + len(_WACC_FIELDS)]
+        # The four assumption series lead the per-year section
+        series = self._yearly[:4]
+        return b"".join(part.tobytes() for part in (settings, wacc, self._historicals, series))
+
+    def _input_key(self) -> int:
+        """Hash of every stored input the projections and valuation read."""
+        return hash(self.fingerprint())
+
+    def _sync_inputs(self):
+        """Re-project (and revalue with the last arguments) if an input changed since projecting."""
+        if self._projected_inputs is None or self._projected_inputs == self._input_key():
+            return
+        valuation_args = self._valuation_args if self._terminal_method is not None else None
+        equity_args = self._equity_args
+        self.project_cash_flows()
+        if valuation_args is not None and not np.isnan(self._scalar("wacc_wacc")):
+            self.calculate_enterprise_value(*valuation_args)
+            if equity_args is not None:
+                self.calculate_equity_value(*equity_args)
+
+    def _scalar_group(self, fields: Tuple[str, ...], prefix: str = "") -> Dict[str, float]:
+        """Named scalar slots that have been set (NaN marks unset)."""
+        return {
+            field: float(self._scalars[_SCALAR_INDEX[prefix + field]])
+            for field in fields
+            if not np.isnan(self._scalars[_SCALAR_INDEX[prefix + field]])
+        }
+
+    def set_historical_financials(
+        self,
+        revenue: List[float],
+        ebitda: List[float],
+        capex: List[float],
+        nwc: List[float],
+        years: List[int],
+    ):
+        """
+        Set historical financial data.
+
+        Args:
+            revenue: Historical revenue
+            ebitda: Historical EBITDA
+            capex: Historical capital expenditure
+            nwc: Historical net working capital
+            years: Historical years
+        """
+        self._resize(len(revenue), self._n_years)
+        historicals = self._historicals
+        historicals[:5] = (years, revenue, ebitda, capex, nwc)
+        np.divide(historicals[2], historicals[1], out=historicals[5])
+        np.divide(historicals[3], historicals[1], out=historicals[6])
+        self._clear_results()
+
+    def set_assumptions(
+        self,
+        projection_years: int = 5,
+        revenue_growth: List[float] = None,
+        ebitda_margin: List[float] = None,
+        tax_rate: float = 0.25,
+        capex_percent: List[float] = None,
+        nwc_percent: List[float] = None,
+        terminal_growth: float = 0.03,
+        periods_per_year: int = 1,
+        discount_convention: str = "end",
+    ):
+        """
+        Set projection assumptions (same defaults as DCFModel.set_assumptions).
+
+        Args:
+            projection_years: Number of periods to project (years unless periods_per_year > 1)
+            revenue_growth: Annual revenue growth rates
+            ebitda_margin: EBITDA margins by year
+            tax_rate: Corporate tax rate
+            capex_percent: Capex as % of revenue
+            nwc_percent: NWC as % of revenue
+            terminal_growth: Terminal growth rate
+            periods_per_year: Projection periods per year (1 annual, 4 quarterly, 12 monthly)
+            discount_convention: 'end' or 'mid' (mid-period) discounting of cash flows
+        """
+        if discount_convention not in DISCOUNT_CONVENTIONS:
+            raise ValueError(f"Convention must be one of {', '.join(DISCOUNT_CONVENTIONS)}")
+        if periods_per_year < 1:
+            raise ValueError("periods_per_year must be at least 1")
+
+        if ebitda_margin is None:
+            # Use historical average if available
+            if self._historicals.shape[1]:
+                ebitda_margin = np.mean(self._historicals[_HISTORICAL_INDEX["ebitda_margin"]])
+            else:
+                ebitda_margin = 0.20  # Default 20% margin
+
+        self._resize(self._n_history, projection_years)
+        yearly = self._yearly
+        yearly[:] = np.nan
+        yearly[_YEARLY_INDEX["revenue_growth"]] = 0.10 if revenue_growth is None else revenue_growth
+        yearly[_YEARLY_INDEX["ebitda_margin"]] = ebitda_margin
+        yearly[_YEARLY_INDEX["capex_percent"]] = 0.05 if capex_percent is None else capex_percent
+        yearly[_YEARLY_INDEX["nwc_percent"]] = 0.10 if nwc_percent is None else nwc_percent
+
+        self._scalars[_SCALAR_INDEX["projection_years"]] = projection_years
+        self._scalars[_SCALAR_INDEX["tax_rate"]] = tax_rate
+        self._scalars[_SCALAR_INDEX["terminal_growth"]] = terminal_growth
+        self._scalars[_SCALAR_INDEX["periods_per_year"]] = periods_per_year
+        self._scalars[_SCALAR_INDEX["mid_period"]] = DISCOUNT_CONVENTIONS.index(discount_convention)
+        self._clear_results()
+
+    def calculate_wacc(
+        self,
+        risk_free_rate: float,
+        beta: float,
+        market_premium: float,
+        cost_of_debt: float,
+        debt_to_equity: float,
+        tax_rate: Optional[float] = None,
+    ) -> float:
+        """
+        Calculate Weighted Average Cost of Capital (WACC).
+
+        Args:
+            risk_free_rate: Risk-free rate (e.g., 10-year treasury)
+            beta: Equity beta
+            market_premium: Equity market risk premium
+            cost_of_debt: Pre-tax cost of debt
+            debt_to_equity: Debt-to-equity ratio
+            tax_rate: Tax rate (uses assumption if not provided)
+
+        Returns:
+            WACC as decimal
+        """
+        if tax_rate is None:
+            tax_rate = self.assumptions.get("tax_rate", 0.25)
+
+        cost_of_equity = risk_free_rate + beta * market_premium
+        equity_weight = 1 / (1 + debt_to_equity)
+        debt_weight = debt_to_equity / (1 + debt_to_equity)
+        wacc = equity_weight * cost_of_equity + debt_weight * cost_of_debt * (1 - tax_rate)
+
+        components = (
+            risk_free_rate,
+            beta,
+            market_premium,
+            cost_of_equity,
+            cost_of_debt,
+            debt_to_equity,
+            equity_weight,
+            debt_weight,
+            tax_rate,
+            wacc,
+        )
+        for field, value in zip(_WACC_FIELDS, components):
+            self._scalars[_SCALAR_INDEX["wacc_" + field]] = value
+        self._clear_results(projections=False)
+
+        return wacc
+
+    def project_cash_flows(self) -> Dict[str, Any]:
+        """
+        Project future cash flows based on assumptions.
+
+        Returns:
+            Dictionary with projected financials
+        """
+        if np.isnan(self._scalars[_SCALAR_INDEX["projection_years"]]):
+            raise ValueError("Must set assumptions first")
+
+        yearly = self._yearly
+        fcf_inputs = [
+            yearly[_YEARLY_INDEX[field]]
+            for field in ("revenue_growth", "ebitda_margin", "capex_percent", "nwc_percent")
+        ]
+        projected = project_cash_flows_batch(
+            self.base_revenue(), *fcf_inputs, self._scalar("tax_rate")
+        )
+        for field in PROJECTION_LINE_ITEMS:
+            yearly[_YEARLY_INDEX[field]] = projected[field][0]
+
+        self._clear_results()
+        self._scalars[_SCALAR_INDEX["projected"]] = 1
+        self._projected_inputs = self._input_key()
+        return self.projections
+
+    def calculate_terminal_value(
+        self, method: str = "growth", exit_multiple: Optional[float] = None
+    ) -> float:
+        """
+        Calculate terminal value using perpetuity growth or exit multiple.
+
+        Args:
+            method: 'growth' for perpetuity growth, 'multiple' for exit multiple
+            exit_multiple: EV/EBITDA exit multiple (if using multiple method)
+
+        Returns:
+            Terminal value
+        """
+        projections = self.projections
+        if not projections:
+            raise ValueError("Must project cash flows first")
+
+        periods_per_year = self._discount_options()["periods_per_year"]
+        if method == "growth":
+            terminal_growth = _periodic_rate(self._scalar("terminal_growth"), periods_per_year)
+            terminal_fcf = float(projections["fcf"][-1]) * (1 + terminal_growth)
+            wacc = _periodic_rate(self._scalar("wacc_wacc"), periods_per_year)
+            return terminal_fcf / (wacc - terminal_growth)
+        elif method == "multiple":
+            if exit_multiple is None:
+                exit_multiple = 10  # Default EV/EBITDA multiple
+            return float(projections["ebitda"][-1]) * periods_per_year * exit_multiple
+        else:
+            raise ValueError("Method must be 'growth' or 'multiple'")
+
+    def calculate_enterprise_value(
+        self, terminal_method: str = "growth", exit_multiple: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Calculate enterprise value by discounting cash flows.
+
+        Args:
+            terminal_method: Method for terminal value calculation
+            exit_multiple: Exit multiple if using multiple method
+
+        Returns:
+            Valuation results dictionary
+        """
+        if not self.projections:
+            self.project_cash_flows()
+
+        if np.isnan(self._scalars[_SCALAR_INDEX["wacc_wacc"]]):
+            raise ValueError("Must calculate WACC first")
+
+        yearly = self._yearly
+        valuation = calculate_enterprise_value_batch(
+            yearly[_YEARLY_INDEX["fcf"]],
+            self._scalar("wacc_wacc"),
+            self._scalar("terminal_growth"),
+            final_ebitda=yearly[_YEARLY_INDEX["ebitda"], -1],
+            terminal_method=terminal_method,
+            exit_multiple=exit_multiple,
+            **self._discount_options(),
+        )
+
+        self._clear_results(projections=False)
+        for field in _VALUATION_FIELDS[:5]:
+            self._scalars[_SCALAR_INDEX[field]] = valuation[field][0]
+        yearly[_YEARLY_INDEX["pv_fcf_detail"]] = valuation["pv_fcf_detail"][0]
+        self._terminal_method = terminal_method
+        self._valuation_args = (terminal_method, exit_multiple)
+        self._equity_args = None
+
+        return self.valuation_results
+
+    def calculate_equity_value(
+        self, net_debt: float, cash: float = 0, shares_outstanding: float = 100
+    ) -> Dict[str, Any]:
+        """
+        Calculate equity value from enterprise value.
+
+        Args:
+            net_debt: Total debt minus cash
+            cash: Cash and equivalents (if not netted)
+            shares_outstanding: Number of shares (millions)
+
+        Returns:
+            Equity valuation metrics
+        """
+        if self._terminal_method is None:
+            raise ValueError("Must calculate enterprise value first")
+
+        equity_value = self._scalar("enterprise_value") - net_debt + cash
+        value_per_share = equity_value / shares_outstanding if shares_outstanding > 0 else 0
+
+        equity_results = {
+            "equity_value": equity_value,
+            "shares_outstanding": shares_outstanding,
+            "value_per_share": value_per_share,
+            "net_debt": net_debt,
+            "cash": cash,
+        }
+        for field, value in equity_results.items():
+            self._scalars[_SCALAR_INDEX[field]] = value
+        self._equity_args = (net_debt, cash, shares_outstanding)
+        return equity_results
+
+    def snapshot(self) -> Tuple[Any, ...]:
+        """
+        Capture the model's full state (one buffer copy).
+
+        Returns:
+            Opaque state for restore()
+        """
+        return (self._data.copy(),) + tuple(getattr(self, name) for name in self.__slots__[2:])
+
+    def restore(self, state: Tuple[Any, ...]):
+        """
+        Return the model to a snapshot; the snapshot stays reusable.
+
+        Args:
+            state: Result of snapshot()
+        """
+        self._data = state[0].copy()
+        for name, value in zip(self.__slots__[2:], state[1:]):
+            setattr(self, name, value)
+
+    def _clear_results(self, projections: bool = True):
+        """Forget valuation results (and optionally projections) derived from older inputs."""
+        fields = ("projected",) + _VALUATION_FIELDS if projections else _VALUATION_FIELDS
+        for field in fields:
+            self._scalars[_SCALAR_INDEX[field]] = np.nan
+        self._terminal_method = None
+        if projections:
+            self._projected_inputs = None
+
+    # Read-only analyses work unchanged on the dict views
+    base_revenue = DCFModel.base_revenue
+    _batch_projection_inputs = DCFModel._batch_projection_inputs
+    _discount_options = DCFModel._discount_options
+    sensitivity_analysis = DCFModel.sensitivity_analysis
+    simulate = DCFModel.simulate
+    generate_summary = DCFModel.generate_summary
+
+
+# Storage layout of CompactDCFModel
+_HISTORICAL_FIELDS = (
+    "years",
+    "revenue",
+    "ebitda",
+    "capex",
+    "nwc",
+    "ebitda_margin",
+    "capex_percent",
+)
+_YEARLY_FIELDS = (
+    ("revenue_growth", "ebitda_margin", "capex_percent", "nwc_percent")
+    + PROJECTION_LINE_ITEMS
+    + ("pv_fcf_detail",)
+)
+_WACC_FIELDS = (
+    "risk_free_rate",
+    "beta",
+    "market_premium",
+    "cost_of_equity",
+    "cost_of_debt",
+    "debt_to_equity",
+    "equity_weight",
+    "debt_weight",
+    "tax_rate",
+    "wacc",
+)
+_VALUATION_FIELDS = (
+    "enterprise_value",
+    "pv_fcf",
+    "pv_terminal",
+    "terminal_value",
+    "terminal_percent",
+    "equity_value",
+    "shares_outstanding",
+    "value_per_share",
+    "net_debt",
+    "cash",
+)
+_SCALAR_FIELDS = (
+    ("projection_years", "tax_rate", "terminal_growth", "periods_per_year", "mid_period")
+    + ("projected",)
+    + tuple("wacc_" + field for field in _WACC_FIELDS)
+    + _VALUATION_FIELDS
+)
+_HISTORICAL_INDEX = {field: i for i, field in enumerate(_HISTORICAL_FIELDS)}
+_YEARLY_INDEX = {field: i for i, field in enumerate(_YEARLY_FIELDS)}
+_SCALAR_INDEX = {field: i for i, field in enumerate(_SCALAR_FIELDS)}
+
+
+# DCFModel attributes holding its input sections (see _InputDict)
+_INPUT_SECTIONS = {
+    "_historical_financials": "historical_financials",
+    "_assumptions": "assumptions",
+    "_wacc_components": "wacc_components",
+}
+
+
+class _InputList(list):
+    """Input series that reports every write, with the year where one item changes."""
+
+    def __init__(self, written: Any, section: str, name: str, values: Any):
+        super().__init__(values.tolist() if isinstance(values, np.ndarray) else values)
+        self._written = written
+        self._key = (section, name)
+
+    def _changed(self, year: Optional[int] = None):
+        self._written(*self._key, year)
+
+    def __setitem__(self, index: Any, value: Any):
+        super().__setitem__(index, value)
+        if isinstance(index, slice):
+            self._changed()
+        else:
+            self._changed(index % len(self))
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return list, (list(self),)
+
+
+def _report_resize(method: str) -> Any:
+    """Wrap a list method that can move or resize items so it reports the whole series."""
+    base = getattr(list, method)
+
+    def changed(self: _InputList, *args: Any, **kwargs: Any) -> Any:
+        result = base(self, *args, **kwargs)
+        self._changed()
+        return result
+
+    changed.__name__ = method
+    return changed
+
+
+for _method in (
+    "__delitem__",
+    "__iadd__",
+    "__imul__",
+    "append",
+    "clear",
+    "extend",
+    "insert",
+    "pop",
+    "remove",
+    "reverse",
+    "sort",
+):
+    setattr(_InputList, _method, _report_resize(_method))
+
+
+class _InputDict(dict):
+    """
+    One of DCFModel's input sections, reporting every write back to the model.
+
+    Lists and 1-D arrays stored in it are copied into _InputList series, so
+    in-place edits such as assumptions["ebitda_margin"][2] = x are seen too.
+    Pickling and copying give plain dicts and lists.
+    """
+
+    def __init__(self, written: Any, section: str, items: Dict[str, Any]):
+        super().__init__()
+        self._written = written
+        self._section = section
+        for name, value in items.items():
+            super().__setitem__(name, self._track(name, value))
+
+    def _track(self, name: str, value: Any) -> Any:
+        if isinstance(value, list) or (isinstance(value, np.ndarray) and value.ndim == 1):
+            return _InputList(self._written, self._section, name, value)
+        return value
+
+    def __setitem__(self, name: str, value: Any):
+        super().__setitem__(name, self._track(name, value))
+        self._written(self._section, name)
+
+    def __delitem__(self, name: str):
+        super().__delitem__(name)
+        self._written(self._section, name)
+
+    def update(self, *args: Any, **kwargs: Any):
+        for name, value in dict(*args, **kwargs).items():
+            self[name] = value
+
+    def setdefault(self, name: str, default: Any = None) -> Any:
+        if name not in self:
+            self[name] = default
+        return self[name]
+
+    def pop(self, name: str, *default: Any) -> Any:
+        value = super().pop(name, *default)
+        self._written(self._section, name)
+        return value
+
+    def popitem(self) -> Tuple[str, Any]:
+        name, value = super().popitem()
+        self._written(self._section, name)
+        return name, value
+
+    def clear(self):
+        super().clear()
+        self._written(self._section)
+
+    def __ior__(self, other: Any) -> "_InputDict":
+        self.update(other)
+        return self
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return dict, (dict(self),)
+
+
+class _WriteThroughDict(dict):
+    """Dict view whose item writes are stored by a callback (CompactDCFModel's buffer)."""
+
+    def __init__(self, write: Any, items: Dict[str, Any]):
+        super().__init__(items)
+        self._write = write
+
+    def __setitem__(self, name: str, value: Any):
+        super().__setitem__(name, self._write(name, value))
+
+    def update(self, *args: Any, **kwargs: Any):
+        for name, value in dict(*args, **kwargs).items():
+            self[name] = value
+
+
+# Batched valuation over many assumption sets
+
+
+def _batch_inputs(
+    base_revenue: Any,
+    revenue_growth: Any,
+    ebitda_margin: Any,
+    capex_percent: Any,
+    nwc_percent: Any,
+    tax_rate: Any,
+) -> Tuple[np.ndarray, ...]:
+    """Broadcast batched projection inputs to (n_models,) and (n_models, n_years)."""
+    growth, margin, capex_pct, nwc_pct = np.broadcast_arrays(
+        *(
+            np.atleast_2d(np.asarray(values, dtype=float))
+            for values in (revenue_growth, ebitda_margin, capex_percent, nwc_percent)
+        )
+    )
+    # The model count may come from the per-model scalars as well as the yearly rows
+    (n_models,) = np.broadcast_shapes(growth.shape[:1], np.shape(base_revenue), np.shape(tax_rate))
+    if n_models != growth.shape[0]:
+        growth, margin, capex_pct, nwc_pct = (
+            np.broadcast_to(values, (n_models, growth.shape[1]))
+            for values in (growth, margin, capex_pct, nwc_pct)
+        )
+    base = np.broadcast_to(np.asarray(base_revenue, dtype=float), (n_models,))
+    tax = np.broadcast_to(np.asarray(tax_rate, dtype=float), (n_models,))[:, None]
+    return base, growth, margin, capex_pct, nwc_pct, tax
+
+
+def _batch_revenue(base: np.ndarray, growth: np.ndarray) -> np.ndarray:
+    """Cumulative product of growth factors, compounded left to right like the scalar loop."""
+    revenue = np.empty(growth.shape)
+    prev_revenue = base
+    # Column-wise accumulation keeps the result C-contiguous for the ops that follow
+    for i in range(growth.shape[1]):
+        prev_revenue = revenue[:, i] = prev_revenue * (1 + growth[:, i])
+    return revenue
+
+
+def _batch_nwc_change(base: np.ndarray, nwc: np.ndarray) -> np.ndarray:
+    """Year-over-year NWC change, seeded with the initial NWC assumption."""
+    nwc_change = np.empty_like(nwc)
+    nwc_change[:, 0] = nwc[:, 0] - base * 0.10  # Initial NWC assumption
+    np.subtract(nwc[:, 1:], nwc[:, :-1], out=nwc_change[:, 1:])
+    return nwc_change
+
+
+def _batch_fcf(
+    base: np.ndarray,
+    growth: np.ndarray,
+    margin: np.ndarray,
+    capex_pct: np.ndarray,
+    nwc_pct: np.ndarray,
+    tax: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Free cash flow and final-year EBITDA only, reusing buffers in place.
+
+    Performs the same floating-point operations in the same order as
+    project_cash_flows_batch, but allocates a handful of arrays instead of
+    one per projected line item.
+    """
+    revenue = _batch_revenue(base, growth)
+    fcf = revenue * margin
+    final_ebitda = fcf[:, -1].copy()
+    depreciation = revenue * capex_pct
+    fcf -= depreciation  # EBIT
+    tax_paid = np.multiply(fcf, tax, out=np.empty_like(fcf))
+    fcf -= tax_paid  # NOPAT
+    fcf += depreciation
+    fcf -= depreciation  # Capex (equal to depreciation)
+    np.multiply(revenue, nwc_pct, out=revenue)
+    fcf -= _batch_nwc_change(base, revenue)
+    return fcf, final_ebitda
+
+
+def project_cash_flows_batch(
+    base_revenue: Any,
+    revenue_growth: Any,
+    ebitda_margin: Any,
+    capex_percent: Any,
+    nwc_percent: Any,
+    tax_rate: Any = 0.25,
+) -> Dict[str, np.ndarray]:
+    """
+    Project cash flows for many models at once.
+
+    Mirrors DCFModel.project_cash_flows operation-for-operation, so each row
+    matches the scalar path exactly.
+
+    Args:
+        base_revenue: Last historical revenue per model, shape (n_models,) or scalar
+        revenue_growth: Growth rates, shape (n_models, n_years) or (n_years,)
+        ebitda_margin: EBITDA margins, same shape rules as revenue_growth
+        capex_percent: Capex as % of revenue, same shape rules as revenue_growth
+        nwc_percent: NWC as % of revenue, same shape rules as revenue_growth
+        tax_rate: Tax rate per model, shape (n_models,) or scalar
+
+    Returns:
+        Dictionary of (n_models, n_years) arrays keyed like DCFModel.projections
+    """
+    base, growth, margin, capex_pct, nwc_pct, tax = _batch_inputs(
+        base_revenue, revenue_growth, ebitda_margin, capex_percent, nwc_percent, tax_rate
+    )
+    years = growth.shape[1]
+
+    revenue = _batch_revenue(base, growth)
+    ebitda = revenue * margin
+    depreciation = revenue * capex_pct
+    ebit = ebitda - depreciation
+    tax_paid = ebit * tax
+    nopat = ebit - tax_paid
+    capex = revenue * capex_pct
+    nwc_change = _batch_nwc_change(base, revenue * nwc_pct)
+    fcf = nopat + depreciation - capex - nwc_change
+
+    return {
+        "year": np.arange(1, years + 1),
+        "revenue": revenue,
+        "ebitda": ebitda,
+        "ebit": ebit,
+        "tax": tax_paid,
+        "nopat": nopat,
+        "capex": capex,
+        "nwc_change": nwc_change,
+        "fcf": fcf,
+    }
+
+
+def _periodic_rate(rate: Any, periods_per_year: int) -> Any:
+    """Convert an annual rate to the equivalent compound rate per projection period."""
+    if periods_per_year == 1:
+        return rate
+    return (1 + rate) ** (1 / periods_per_year) - 1
+
+
+def discount_factors(
+    wacc: Any, n_periods: int, periods_per_year: int = 1, convention: str = "end"
+) -> np.ndarray:
+    """
+    Discount factors for every projection period plus the end of the horizon.
+
+    Args:
+        wacc: Annual discount rate, scalar or shape (n_models,)
+        n_periods: Number of projection periods
+        periods_per_year: Projection periods per year (1 annual, 4 quarterly, 12 monthly)
+        convention: 'end' or 'mid' (mid-period) discounting of cash flows
+
+    Returns:
+        Array of shape wacc.shape + (n_periods + 1,): the factor for each period's
+        cash flow, then the end-of-horizon factor applied to exit-multiple terminal values
+    """
+    exponents = _discount_exponents(n_periods, periods_per_year, convention)
+    return (1 + np.asarray(wacc, dtype=float))[..., None] ** exponents
+
+
+def _discount_exponents(n_periods: int, periods_per_year: int, convention: str) -> np.ndarray:
+    """Discount exponents in years for each period's cash flow, then the end of the horizon."""
+    if convention not in DISCOUNT_CONVENTIONS:
+        raise ValueError(f"Convention must be one of {', '.join(DISCOUNT_CONVENTIONS)}")
+    exponents = np.arange(1, n_periods + 2, dtype=float)
+    exponents[-1] = n_periods
+    if convention == "mid":
+        exponents[:-1] -= 0.5
+    if periods_per_year != 1:
+        exponents /= periods_per_year
+    return exponents
+
+
+def calculate_enterprise_value_batch(
+    fcf: Any,
+    wacc: Any,
+    terminal_growth: Any = 0.03,
+    final_ebitda: Any = None,
+    terminal_method: str = "growth",
+    exit_multiple: Optional[float] = None,
+    periods_per_year: int = 1,
+    convention: str = "end",
+) -> Dict[str, np.ndarray]:
+    """
+    Discount projected cash flows for many models at once.
+
+    Per-model arguments broadcast against each other, so one cash flow row
+    can be valued at a vector of discount rates (and vice versa).
+
+    Args:
+        fcf: Free cash flows, shape (n_models, n_periods) or (n_periods,)
+        wacc: Annual discount rate per model, shape (n_models,) or scalar
+        terminal_growth: Annual terminal growth per model, shape (n_models,) or scalar
+        final_ebitda: Final-period EBITDA per model (required for 'multiple')
+        terminal_method: 'growth' for perpetuity growth, 'multiple' for exit multiple
+        exit_multiple: EV/EBITDA exit multiple (if using multiple method)
+        periods_per_year: Projection periods per year (1 annual, 4 quarterly, 12 monthly)
+        convention: 'end' or 'mid' (mid-period) discounting of cash flows
+
+    Returns:
+        Dictionary of per-model arrays keyed like DCFModel.valuation_results
+    """
+    fcf = np.atleast_2d(np.asarray(fcf, dtype=float))
+    (n_models,) = np.broadcast_shapes(
+        fcf.shape[:1], np.shape(wacc), np.shape(terminal_growth), np.shape(final_ebitda)
+    )
+    years = fcf.shape[1]
+    fcf = np.broadcast_to(fcf, (n_models, years))
+    wacc = np.broadcast_to(np.asarray(wacc, dtype=float), (n_models,))
+
+    # Build the factor vector once per distinct WACC (sensitivity grids repeat them)
+    rates, rate_index = np.unique(wacc, return_inverse=True)
+    if len(rates) < n_models:
+        factors = discount_factors(rates, years, periods_per_year, convention)[rate_index]
+    else:
+        factors = discount_factors(wacc, years, periods_per_year, convention)
+    pv_fcf_detail = fcf / factors[:, :years]
+
+    # Accumulate year by year to keep the same summation order as sum()
+    total_pv_fcf = pv_fcf_detail[:, 0].copy()
+    for i in range(1, years):
+        total_pv_fcf += pv_fcf_detail[:, i]
+
+    if terminal_method == "growth":
+        growth = np.broadcast_to(np.asarray(terminal_growth, dtype=float), (n_models,))
+        growth = _periodic_rate(growth, periods_per_year)
+        terminal_fcf = fcf[:, -1] * (1 + growth)
+        terminal_value = terminal_fcf / (_periodic_rate(wacc, periods_per_year) - growth)
+        terminal_discount = factors[:, years - 1]
+    elif terminal_method == "multiple":
+        if final_ebitda is None:
+            raise ValueError("final_ebitda is required for the multiple method")
+        if exit_multiple is None:
+            exit_multiple = 10  # Default EV/EBITDA multiple
+        final_ebitda = np.broadcast_to(np.asarray(final_ebitda, dtype=float), (n_models,))
+        terminal_value = final_ebitda * periods_per_year * exit_multiple
+        terminal_discount = factors[:, -1]
+    else:
+        raise ValueError("Method must be 'growth' or 'multiple'")
+
+    pv_terminal = terminal_value / terminal_discount
+    enterprise_value = total_pv_fcf + pv_terminal
+
+    return {
+        "enterprise_value": enterprise_value,
+        "pv_fcf": total_pv_fcf,
+        "pv_terminal": pv_terminal,
+        "terminal_value": terminal_value,
+        "pv_fcf_detail": pv_fcf_detail,
+        "terminal_percent": pv_terminal / enterprise_value * 100,
+    }
+
+
+def value_dcf_batch(
+    base_revenue: Any,
+    revenue_growth: Any,
+    ebitda_margin: Any,
+    capex_percent: Any,
+    nwc_percent: Any,
+    wacc: Any,
+    terminal_growth: Any = 0.03,
+    tax_rate: Any = 0.25,
+    terminal_method: str = "growth",
+    exit_multiple: Optional[float] = None,
+    periods_per_year: int = 1,
+    convention: str = "end",
+) -> Dict[str, np.ndarray]:
+    """
+    Value many DCF assumption sets in one vectorized pass.
+
+    Equivalent to running project_cash_flows and calculate_enterprise_value
+    on one DCFModel per row, without building any model objects. Inputs
+    broadcast against each other, so a single assumption set (yearly rows
+    of shape (n_years,)) can be valued at a vector of WACCs, say.
+
+    Args:
+        base_revenue: Last historical revenue per model
+        revenue_growth: Growth rates, shape (n_models, n_years) or (n_years,)
+        ebitda_margin: EBITDA margins, shape (n_models, n_years) or (n_years,)
+        capex_percent: Capex as % of revenue, shape (n_models, n_years) or (n_years,)
+        nwc_percent: NWC as % of revenue, shape (n_models, n_years) or (n_years,)
+        wacc: Discount rate per model
+        terminal_growth: Terminal growth rate per model
+        tax_rate: Corporate tax rate per model
+        terminal_method: Method for terminal value calculation
+        exit_multiple: Exit multiple if using multiple method
+        periods_per_year: Projection periods per year (1 annual, 4 quarterly, 12 monthly)
+        convention: 'end' or 'mid' (mid-period) discounting of cash flows
+
+    Returns:
+        Valuation results dictionary of per-model arrays
+    """
+    fcf, final_ebitda = _batch_fcf(
+        *_batch_inputs(
+            base_revenue, revenue_growth, ebitda_margin, capex_percent, nwc_percent, tax_rate
+        )
+    )
+    return calculate_enterprise_value_batch(
+        fcf,
+        wacc,
+        terminal_growth,
+        final_ebitda=final_ebitda,
+        terminal_method=terminal_method,
+        exit_multiple=exit_multiple,
+        periods_per_year=periods_per_year,
+        convention=convention,
+    )
+
+
+def solve_implied_batch(
+    fcf: Any,
+    target_price: Any,
+    shares_outstanding: Any,
+    net_debt: Any = 0.0,
+    cash: Any = 0.0,
+    wacc: Any = None,
+    terminal_growth: Any = 0.03,
+    variable: str = "wacc",
+    final_ebitda: Any = None,
+    terminal_method: str = "growth",
+    exit_multiple: Optional[float] = None,
+    tol: float = 1e-10,
+    max_iter: int = 50,
+    periods_per_year: int = 1,
+    convention: str = "end",
+) -> Dict[str, np.ndarray]:
+    """
+    Back out the WACC or terminal growth that prices each model at its market price.
+
+    Works on already-projected cash flows, so only discounting is repeated.
+    Terminal growth has a closed-form solution; WACC uses vectorized Newton
+    steps on the analytic derivative, safeguarded by bisection inside a
+    sign-changing bracket.
+
+    Args:
+        fcf: Projected free cash flows, shape (n_models, n_years)
+        target_price: Market share price per model
+        shares_outstanding: Shares outstanding per model
+        net_debt: Net debt per model
+        cash: Cash and equivalents per model (if not netted)
+        wacc: Discount rate per model (required when solving for terminal growth;
+            used as the starting guess when solving for WACC)
+        terminal_growth: Terminal growth per model (growth method)
+        variable: 'wacc' or 'terminal_growth'
+        final_ebitda: Final-year EBITDA per model (required for 'multiple')
+        terminal_method: 'growth' for perpetuity growth, 'multiple' for exit multiple
+        exit_multiple: EV/EBITDA exit multiple (if using multiple method)
+        tol: Convergence tolerance on the solved rate
+        max_iter: Maximum Newton/bisection iterations
+        periods_per_year: Projection periods per year (1 annual, 4 quarterly, 12 monthly)
+        convention: 'end' or 'mid' (mid-period) discounting of cash flows
+
+    Returns:
+        Dictionary with the implied 'value' (NaN where no solution exists),
+        per-model 'converged' flags and the number of 'iterations' used
+    """
+    fcf = np.atleast_2d(np.asarray(fcf, dtype=float))
+    n_models, years = fcf.shape
+    target_ev = (
+        np.asarray(target_price, dtype=float) * np.asarray(shares_outstanding, dtype=float)
+        + np.asarray(net_debt, dtype=float)
+        - np.asarray(cash, dtype=float)
+    )
+    target_ev = np.broadcast_to(target_ev, (n_models,))
+    growth = np.broadcast_to(np.asarray(terminal_growth, dtype=float), (n_models,))
+    exponents = _discount_exponents(years, periods_per_year, convention)
+    periods = exponents[:years]
+    # Perpetuities continue the cash-flow timing; exit multiples land at the horizon
+    terminal_period = periods[-1] if terminal_method == "growth" else exponents[-1]
+
+    if terminal_method == "multiple":
+        if final_ebitda is None:
+            raise ValueError("final_ebitda is required for the multiple method")
+        if exit_multiple is None:
+            exit_multiple = 10  # Default EV/EBITDA multiple
+        terminal_value = np.broadcast_to(
+            np.asarray(final_ebitda, dtype=float) * periods_per_year * exit_multiple, (n_models,)
+        )
+    elif terminal_method != "growth":
+        raise ValueError("Method must be 'growth' or 'multiple'")
+
+    if variable == "terminal_growth":
+        if terminal_method != "growth":
+            raise ValueError("Terminal growth can only be implied with the growth method")
+        if wacc is None:
+            raise ValueError("wacc is required when solving for terminal growth")
+        rate = np.broadcast_to(np.asarray(wacc, dtype=float), (n_models,))
+        discount = (1 + rate)[:, None] ** -periods
+        # Solve PV_terminal = target - PV(FCF) for (1 + g) / (wacc - g) = k on per-period rates
+        k = (target_ev - (fcf * discount).sum(axis=1)) / (fcf[:, -1] * discount[:, -1])
+        implied = (k * _periodic_rate(rate, periods_per_year) - 1) / (1 + k)
+        if periods_per_year != 1:
+            implied = (1 + implied) ** periods_per_year - 1
+        valid = np.isfinite(implied) & (k > 0)
+        return {
+            "value": np.where(valid, implied, np.nan),
+            "converged": valid,
+            "iterations": 0,
+        }
+
+    if variable != "wacc":
+        raise ValueError("Variable must be 'wacc' or 'terminal_growth'")
+
+    def excess_value(rate: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """EV minus target, and its derivative with respect to the rate."""
+        discount = (1 + rate)[:, None] ** -periods
+        value = (fcf * discount).sum(axis=1)
+        slope = -(periods * fcf * discount).sum(axis=1) / (1 + rate)
+        if terminal_method == "growth":
+            spread = _periodic_rate(rate, periods_per_year) - _periodic_rate(
+                growth, periods_per_year
+            )
+            tv = fcf[:, -1] * (1 + _periodic_rate(growth, periods_per_year)) / spread
+            tv_slope = -tv / spread * (1 + rate) ** (1 / periods_per_year - 1) / periods_per_year
+        else:
+            tv, tv_slope = terminal_value, 0.0
+        terminal_discount = (1 + rate) ** -terminal_period
+        value = value + tv * terminal_discount - target_ev
+        slope = slope + (tv_slope - terminal_period * tv / (1 + rate)) * terminal_discount
+        return value, slope
+
+    # With the growth method EV is close to linear in x = 1 / (wacc - g), so
+    # iterate on x there (rate = g + 1 / x); with exit multiples use the rate itself
+    if terminal_method == "growth":
+
+        def to_rate(x: np.ndarray) -> np.ndarray:
+            return growth + 1 / x
+
+        def rate_slope(x: np.ndarray) -> np.ndarray:
+            return -1 / x**2
+
+        # Bracket: a 100% discount rate up to just above terminal growth
+        low, high = 1 / (1 - growth), np.full(n_models, 1e9)
+    else:
+
+        def to_rate(x: np.ndarray) -> np.ndarray:
+            return x
+
+        def rate_slope(x: np.ndarray) -> np.ndarray:
+            return np.ones_like(x)
+
+        low, high = np.full(n_models, -0.99), np.full(n_models, 1.0)
+
+    f_low, _ = excess_value(to_rate(low))
+    f_high, _ = excess_value(to_rate(high))
+    solvable = np.sign(f_low) != np.sign(f_high)
+
+    x = (low + high) / 2
+    if wacc is not None:
+        guess = np.broadcast_to(np.asarray(wacc, dtype=float), (n_models,))
+        with np.errstate(divide="ignore"):
+            guess = 1 / (guess - growth) if terminal_method == "growth" else guess
+        x = np.where((guess > low) & (guess < high), guess, x)
+
+    rate = to_rate(x)
+    converged = ~solvable
+    iterations = 0
+    while iterations < max_iter and not converged.all():
+        iterations += 1
+        f, slope = excess_value(rate)
+        same_side = np.sign(f) == np.sign(f_low)
+        low = np.where(same_side, x, low)
+        f_low = np.where(same_side, f, f_low)
+        high = np.where(same_side, high, x)
+
+        # Newton step, falling back to bisection when it leaves the bracket
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = x - f / (slope * rate_slope(x))
+        inside = np.isfinite(newton) & (newton > low) & (newton < high)
+        x_next = np.where(inside, newton, (low + high) / 2)
+        rate_next = to_rate(x_next)
+
+        converged |= (np.abs(rate_next - rate) <= tol * (1 + np.abs(rate))) | (f == 0)
+        active = ~converged
+        x = np.where(active, x_next, x)
+        rate = np.where(active, rate_next, rate)
+
+    return {
+        "value": np.where(solvable, rate, np.nan),
+        "converged": converged & solvable,
+        "iterations": iterations,
+    }
+
+
+# Bulk loading of historical financials
+
+
+def load_historicals_csv(source: Any, chunk_size: int = 100000) -> Dict[str, np.ndarray]:
+    """
+    Load a long-format historicals export into contiguous per-company arrays.
+
+    The file is read in chunks straight into NumPy columns (no per-row Python
+    objects), rows are ordered by (ticker, year) with one lexsort, and each
+    company becomes a slice [offsets[i], offsets[i + 1]) of the row arrays.
+    Ratios match DCFModel.set_historical_financials.
+
+    Args:
+        source: CSV path or file-like object with HISTORICAL_CSV_COLUMNS
+        chunk_size: Rows parsed per chunk
+
+    Returns:
+        Dictionary with 'ticker' (n_companies,), 'offsets' (n_companies + 1,)
+        and row arrays 'year', 'revenue', 'ebitda', 'capex', 'nwc',
+        'ebitda_margin' and 'capex_percent' sorted by ticker then year
+    """
+    import pandas as pd  # Only needed for CSV parsing
+
+    value_columns = HISTORICAL_CSV_COLUMNS[1:]
+    chunks = {column: [] for column in HISTORICAL_CSV_COLUMNS}
+    reader = pd.read_csv(
+        source,
+        usecols=list(HISTORICAL_CSV_COLUMNS),
+        dtype={"ticker": str, **{column: float for column in value_columns}},
+        chunksize=chunk_size,
+    )
+    for chunk in reader:
+        chunks["ticker"].append(chunk["ticker"].to_numpy(dtype=str))
+        for column in value_columns:
+            chunks[column].append(chunk[column].to_numpy(dtype=float))
+
+    if not chunks["ticker"]:
+        raise ValueError("No historical rows found")
+    tickers = np.concatenate(chunks.pop("ticker"))
+    order = np.lexsort((np.concatenate(chunks["year"]), tickers))
+    tickers = tickers[order]
+
+    # Each column is concatenated and reordered once, then its chunks are released
+    data = {}
+    for column in value_columns:
+        data[column] = np.concatenate(chunks.pop(column))[order]
+    data["year"] = data["year"].astype(int)
+
+    # Company boundaries: first row of each ticker in the sorted order
+    starts = np.flatnonzero(np.r_[True, tickers[1:] != tickers[:-1]])
+    data["ticker"] = tickers[starts]
+    data["offsets"] = np.append(starts, len(tickers))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        data["ebitda_margin"] = data["ebitda"] / data["revenue"]
+        data["capex_percent"] = data["capex"] / data["revenue"]
+    return data
+
+
+def batch_inputs_from_historicals(historicals: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Per-company inputs for the batched valuation functions.
+
+    The latest revenue is the projection base, as in DCFModel. Margins are
+    the historical averages held flat over the horizon: for EBITDA margin
+    that is what set_assumptions falls back to, while DCFModel's own capex
+    default is a fixed 5% of revenue. Rows follow historicals["ticker"].
+
+    Args:
+        historicals: Output of load_historicals_csv
+
+    Returns:
+        Keyword arguments for value_dcf_batch / project_cash_flows_batch:
+        'base_revenue' (n_companies,), 'ebitda_margin' and 'capex_percent'
+        (n_companies, 1), which broadcast against per-year inputs
+    """
+    offsets = historicals["offsets"]
+    starts, counts = offsets[:-1], np.diff(offsets)
+    return {
+        "base_revenue": historicals["revenue"][offsets[1:] - 1],
+        "ebitda_margin": (np.add.reduceat(historicals["ebitda_margin"], starts) / counts)[:, None],
+        "capex_percent": (np.add.reduceat(historicals["capex_percent"], starts) / counts)[:, None],
+    }
+
+
+# Multi-process scenario sweeps
+
+# Shared-memory blocks and valuation options attached by each sweep worker process
+_sweep_blocks: Dict[str, Tuple[shared_memory.SharedMemory, np.ndarray]] = {}
+_sweep_options: Dict[str, Any] = {}
+
+
+def _init_sweep_worker(specs: Dict[str, Tuple[str, Tuple[int, ...]]], options: Dict[str, Any]):
+    """Map the sweep's shared input and output blocks into this worker."""
+    _sweep_blocks.clear()
+    _sweep_options.clear()
+    _sweep_options.update(options)
+    for field, (name, shape) in specs.items():
+        # Pool workers share the parent's resource tracker, so attaching is cleanup-neutral
+        block = shared_memory.SharedMemory(name=name)
+        _sweep_blocks[field] = (block, np.ndarray(shape, dtype=float, buffer=block.buf))
+
+
+def _value_sweep_chunk(start: int, stop: int) -> int:
+    """Value rows [start, stop) of the shared inputs and write them to the shared outputs."""
+    arrays = {field: array for field, (_, array) in _sweep_blocks.items()}
+    _value_sweep_rows(arrays, start, stop, **_sweep_options)
+    return stop - start
+
+
+def _value_sweep_rows(
+    arrays: Dict[str, np.ndarray],
+    start: int,
+    stop: int,
+    terminal_method: str,
+    exit_multiple: Optional[float],
+):
+    """Value one row block of a sweep in place; shared by the pool and in-process paths."""
+    rows = slice(start, stop)
+    valuation = value_dcf_batch(
+        *(arrays[field][rows] for field in SWEEP_INPUT_FIELDS),
+        terminal_method=terminal_method,
+        exit_multiple=exit_multiple,
+    )
+    results = arrays["results"]
+    for column, field in enumerate(SWEEP_RESULT_FIELDS[:5]):
+        results[column, rows] = valuation[field]
+
+    # Equity bridge, as in DCFModel.calculate_equity_value
+    equity_value = valuation["enterprise_value"] - arrays["net_debt"][rows] + arrays["cash"][rows]
+    shares = arrays["shares_outstanding"][rows]
+    results[5, rows] = equity_value
+    results[6, rows] = np.divide(
+        equity_value, shares, out=np.zeros_like(equity_value), where=shares > 0
+    )
+
+
+def run_dcf_sweep(
+    inputs: Dict[str, Any],
+    max_workers: Optional[int] = None,
+    chunk_size: int = 5000,
+    terminal_method: str = "growth",
+    exit_multiple: Optional[float] = None,
+    min_rows_per_worker: int = SWEEP_MIN_ROWS_PER_WORKER,
+) -> Dict[str, np.ndarray]:
+    """
+    Value a large sweep of (company, scenario) rows across worker processes.
+
+    Inputs are copied once into shared-memory NumPy blocks; workers attach to
+    them by name, value their row ranges with value_dcf_batch and write results
+    straight into a shared output block, so no per-row data is pickled. Only
+    as many workers are started as have min_rows_per_worker rows each; a
+    sweep too small for two runs in-process, which gives identical results.
+
+    Args:
+        inputs: Columns named as in SWEEP_INPUT_FIELDS (terminal_growth and tax_rate
+            are optional), plus optional net_debt, cash and shares_outstanding
+            for the equity bridge. Scalars are broadcast to every row
+        max_workers: Worker processes (defaults to the CPU count; 1 runs in-process)
+        chunk_size: Rows valued per task
+        terminal_method: Method for terminal value calculation
+        exit_multiple: Exit multiple if using multiple method
+        min_rows_per_worker: Fewest rows worth a worker process (0 always uses the pool)
+
+    Returns:
+        Columnar result table mapping each of SWEEP_RESULT_FIELDS to an (n_rows,) array
+    """
+    missing = [
+        field for field in SWEEP_INPUT_FIELDS if field not in inputs and field not in SWEEP_DEFAULTS
+    ]
+    if missing:
+        raise ValueError(f"Missing sweep inputs: {', '.join(missing)}")
+
+    n_rows, n_years = np.atleast_2d(np.asarray(inputs["revenue_growth"])).shape
+    columns = {**SWEEP_DEFAULTS, "net_debt": 0.0, "cash": 0.0, "shares_outstanding": 0.0}
+    columns.update(inputs)
+    shapes = {
+        field: (n_rows, n_years) if field in SWEEP_YEARLY_FIELDS else (n_rows,) for field in columns
+    }
+    # One contiguous row per result column
+    shapes["results"] = (len(SWEEP_RESULT_FIELDS), n_rows)
+    options = {"terminal_method": terminal_method, "exit_multiple": exit_multiple}
+    tasks = [(start, min(start + chunk_size, n_rows)) for start in range(0, n_rows, chunk_size)]
+    workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    if min_rows_per_worker:
+        workers = min(workers, n_rows // min_rows_per_worker)
+
+    if workers <= 1:
+        arrays = {
+            field: np.broadcast_to(np.asarray(columns[field], dtype=float), shapes[field])
+            for field in columns
+        }
+        arrays["results"] = np.empty(shapes["results"])
+        for start, stop in tasks:
+            _value_sweep_rows(arrays, start, stop, **options)
+        results = arrays["results"]
+        return dict(zip(SWEEP_RESULT_FIELDS, results))
+
+    blocks = {}
+    try:
+        specs = {}
+        for field, shape in shapes.items():
+            block = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+            blocks[field] = block
+            specs[field] = (block.name, shape)
+            if field != "results":
+                shared = np.ndarray(shape, dtype=float, buffer=block.buf)
+                shared[...] = np.asarray(columns[field], dtype=float)
+                del shared
+
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_sweep_worker, initargs=(specs, options)
+        ) as pool:
+            # Consume results in submission order so worker errors surface here
+            list(pool.map(_value_sweep_chunk, *zip(*tasks)))
+
+        shared = np.ndarray(shapes["results"], dtype=float, buffer=blocks["results"].buf)
+        table = dict(zip(SWEEP_RESULT_FIELDS, shared.copy()))
+        del shared
+        return table
+    finally:
+        for block in blocks.values():
+            block.close()
+            block.unlink()
+
+
+# Monte Carlo shocks
+
+
+def _draw_shocks(
+    rng: np.random.Generator, spec: Dict[str, Any], shape: Tuple[int, ...]
+) -> np.ndarray:
+    """Draw zero-centred shocks for one simulated variable."""
+    kind = spec.get("type", "normal")
+    if kind == "normal":
+        return rng.normal(0.0, spec["std"], shape)
+    if kind == "uniform":
+        return rng.uniform(-spec["width"], spec["width"], shape)
+    if kind == "triangular":
+        return rng.triangular(-spec["width"], 0.0, spec["width"], shape)
+    raise ValueError("Distribution type must be 'normal', 'uniform' or 'triangular'")
+
+
+# Valuation caching
+
+# Bumped whenever valuation formulas change, so persisted results from older code never hit
+VALUATION_CACHE_VERSION = 1
+
+
+# Recency stamp for the persistent tier: shared by every process using the file
+_NEXT_LAST_USED = "(SELECT COALESCE(MAX(last_used), 0) + 1 FROM valuations)"
+
+
+class ValuationCache:
+    """
+    Content-addressed cache of DCF valuations.
+
+    Results are keyed by a SHA-256 hash of every input the valuation reads
+    (base revenue, assumptions, WACC, terminal method and equity bridge), so
+    identical inputs hit regardless of which model object supplies them. A
+    bounded in-process LRU tier sits in front of an optional SQLite file that
+    persists across processes; both evict least-recently-used entries.
+    """
+
+    def __init__(
+        self, max_entries: int = 1024, path: Optional[str] = None, max_disk_entries: int = 100000
+    ):
+        """
+        Initialize valuation cache.
+
+        Args:
+            max_entries: Entries kept in the in-process LRU tier
+            path: SQLite file for the persistent tier (None keeps the cache in memory only)
+            max_disk_entries: Entries kept in the persistent tier
+        """
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self.counters = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "evictions": 0}
+
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS valuations "
+                "(key TEXT PRIMARY KEY, results TEXT NOT NULL, last_used INTEGER NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS valuations_last_used ON valuations (last_used)"
+            )
+            self._db.commit()
+
+    def key(
+        self,
+        model: Any,
+        terminal_method: str = "growth",
+        exit_multiple: Optional[float] = None,
+        equity_args: Optional[Tuple[float, float, float]] = None,
+    ) -> str:
+        """
+        Stable hash of everything a valuation of model depends on.
+
+        Args:
+            model: DCFModel or CompactDCFModel with assumptions and WACC set
+            terminal_method: Method for terminal value calculation
+            exit_multiple: Exit multiple if using multiple method
+            equity_args: (net_debt, cash, shares_outstanding), or None for EV only
+
+        Returns:
+            Hex digest identifying the valuation
+        """
+        if terminal_method != "multiple":
+            exit_multiple = np.nan  # Unused, so it must not split the key
+        elif exit_multiple is None:
+            exit_multiple = 10  # Default EV/EBITDA multiple
+        assumptions = model.assumptions
+        years = assumptions["projection_years"]
+        scalars = [
+            VALUATION_CACHE_VERSION,
+            model.base_revenue(),
+            model.wacc_components.get("wacc", np.nan),
+            assumptions["tax_rate"],
+            assumptions["terminal_growth"],
+            assumptions.get("periods_per_year", 1),
+            exit_multiple,
+            *(equity_args or (np.nan, np.nan, np.nan)),
+        ]
+        # Raw float64 bytes are canonical and far cheaper to build than text
+        payload = array("d", scalars)
+        for name in SWEEP_YEARLY_FIELDS:
+            payload.extend(assumptions[name][:years])
+        convention = assumptions.get("discount_convention", "end")
+        digest = hashlib.sha256(f"{terminal_method}|{convention}|".encode())
+        digest.update(payload.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up cached valuation results.
+
+        Args:
+            key: Hash from key()
+
+        Returns:
+            Copy of the cached results, or None on a miss
+        """
+        results = self._memory.get(key)
+        if results is not None:
+            self._memory.move_to_end(key)
+            self.counters["hits"] += 1
+            self.counters["memory_hits"] += 1
+            return _copy_results(results)
+
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT results FROM valuations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._db.execute(
+                    f"UPDATE valuations SET last_used = {_NEXT_LAST_USED} WHERE key = ?", (key,)
+                )
+                self._db.commit()
+                results = json.loads(row[0])
+                self._remember(key, results)
+                self.counters["hits"] += 1
+                self.counters["disk_hits"] += 1
+                return _copy_results(results)
+
+        self.counters["misses"] += 1
+        return None
+
+    def put(self, key: str, results: Dict[str, Any]):
+        """
+        Store valuation results in both tiers.
+
+        Args:
+            key: Hash from key()
+            results: Valuation results dictionary (JSON-serialisable)
+        """
+        results = _copy_results(results)
+        self._remember(key, results)
+        if self._db is None:
+            return
+
+        # Other processes may share the file, so the size is counted inside the write lock
+        self._db.execute("BEGIN IMMEDIATE")
+        inserted = self._db.execute(
+            "INSERT OR IGNORE INTO valuations (key, results, last_used) "
+            f"VALUES (?, ?, {_NEXT_LAST_USED})",
+            (key, json.dumps(results)),
+        ).rowcount
+        if inserted:
+            excess = self._disk_size() - self.max_disk_entries
+            if excess > 0:
+                self._db.execute(
+                    "DELETE FROM valuations WHERE key IN "
+                    "(SELECT key FROM valuations ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                self.counters["evictions"] += excess
+        self._db.commit()
+
+    def _disk_size(self) -> int:
+        """Entries in the persistent tier, including those written by other processes."""
+        return self._db.execute("SELECT COUNT(*) FROM valuations").fetchone()[0]
+
+    def _remember(self, key: str, results: Dict[str, Any]):
+        """Insert into the LRU tier, evicting the least recently used entry when full."""
+        self._memory[key] = results
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def value(
+        self,
+        model: Any,
+        terminal_method: str = "growth",
+        exit_multiple: Optional[float] = None,
+        net_debt: Optional[float] = None,
+        cash: float = 0,
+        shares_outstanding: float = 100,
+    ) -> Dict[str, Any]:
+        """
+        Value model through the cache, running it only on a miss.
+
+        Args:
+            model: DCFModel or CompactDCFModel with assumptions and WACC set
+            terminal_method: Method for terminal value calculation
+            exit_multiple: Exit multiple if using multiple method
+            net_debt: Net debt for the equity bridge (None values enterprise only)
+            cash: Cash and equivalents (if not netted)
+            shares_outstanding: Number of shares (millions)
+
+        Returns:
+            Valuation results dictionary, as model.valuation_results would hold
+        """
+        equity_args = None if net_debt is None else (net_debt, cash, shares_outstanding)
+        key = self.key(model, terminal_method, exit_multiple, equity_args)
+        results = self.get(key)
+        if results is not None:
+            return results
+
+        model.project_cash_flows()
+        model.calculate_enterprise_value(terminal_method, exit_multiple)
+        if equity_args is not None:
+            model.calculate_equity_value(*equity_args)
+        results = dict(model.valuation_results)
+        self.put(key, results)
+        return _copy_results(results)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters and tier sizes.
+
+        Returns:
+            Counter dictionary with hit_rate and entry counts
+        """
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": self.counters["hits"] / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": self._disk_size() if self._db is not None else 0,
+        }
+
+    def clear(self):
+        """Drop every cached valuation from both tiers."""
+        self._memory.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM valuations")
+            self._db.commit()
+
+    def close(self):
+        """Close the persistent tier."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def _freeze(value: Any) -> Any:
+    """Hashable copy of nested dicts, lists and arrays of model inputs."""
+    if isinstance(value, dict):
+        return tuple(sorted((name, _freeze(item)) for name, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, np.ndarray):
+        return value.dtype.str, value.shape, value.tobytes()
+    return value
+
+
+def _copy_state(value: Any) -> Any:
+    """Copy model state through dicts down to the lists, sets and arrays the model mutates."""
+    if isinstance(value, dict):
+        return {name: _copy_state(item) for name, item in value.items()}
+    if isinstance(value, (list, set, np.ndarray)):
+        return value.copy()
+    return value
+
+
+def _copy_results(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a results dict deeply enough that callers cannot mutate cached lists or arrays."""
+    return {
+        name: list(value) if isinstance(value, (list, np.ndarray)) else value
+        for name, value in results.items()
+    }
+
+
 # Helper functions for common calculations
 
 
@@ -454,6 +2802,9 @@ def calculate_beta(stock_returns: List[float], market_returns: List[float]) -> f
     """
     Calculate beta from return series.
 
+    Covariance and market variance are both sample (ddof=1) estimates, so the
+    ratio is the OLS slope of stock on market returns.
+
     Args:
         stock_returns: Historical stock returns
         market_returns: Historical market returns
@@ -461,12 +2812,115 @@ def calculate_beta(stock_returns: List[float], market_returns: List[float]) -> f
     Returns:
         Beta coefficient
     """
-    covariance = np.cov(stock_returns, market_returns)[0, 1]
-    market_variance = np.var(market_returns)
-    beta = covariance / market_variance if market_variance != 0 else 1.0
+    covariance = np.cov(stock_returns, market_returns)
+    market_variance = covariance[1, 1]
+    beta = covariance[0, 1] / market_variance if market_variance != 0 else 1.0
     return beta
 
 
+def calculate_beta_batch(
+    stock_returns: Any,
+    market_returns: Any,
+    method: str = "rolling",
+    window: int = 60,
+    halflife: Optional[float] = None,
+    min_periods: Optional[int] = None,
+    chunk_size: int = 1024,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Calculate rolling, expanding or exponentially weighted betas for many stocks.
+
+    Each beta comes from running sums of x, x*y, y and y*y, so a series of
+    n periods costs O(n) whatever the window. The ddof correction cancels in
+    cov / var, so the results agree with calculate_beta on the same window.
+    Stocks are processed in row chunks, which keeps memory flat when the
+    returns come from a memory-mapped file.
+
+    Args:
+        stock_returns: (n_stocks, n_periods) returns, or a path to a .npy file
+            that is opened memory-mapped
+        market_returns: (n_periods,) returns of one index, or (n_indexes, n_periods)
+        method: 'rolling', 'expanding' or 'ewma'
+        window: Rolling window length in periods
+        halflife: Decay half-life in periods (required for 'ewma')
+        min_periods: Observations needed before a beta is reported
+            (default: window for 'rolling', 2 otherwise)
+        chunk_size: Stocks processed per block
+        out: Optional preallocated output array (e.g. an np.memmap)
+
+    Returns:
+        Betas of shape (n_stocks, n_periods), or (n_indexes, n_stocks, n_periods)
+        for several indexes; NaN where fewer than min_periods observations exist
+    """
+    if isinstance(stock_returns, str):
+        stock_returns = np.load(stock_returns, mmap_mode="r")
+    stocks = stock_returns if np.ndim(stock_returns) == 2 else np.atleast_2d(stock_returns)
+    markets = np.atleast_2d(np.asarray(market_returns, dtype=float))
+    n_stocks, n_periods = stocks.shape
+    if markets.shape[1] != n_periods:
+        raise ValueError("Stock and market returns must cover the same periods")
+    if method not in ("rolling", "expanding", "ewma"):
+        raise ValueError(f"Unknown beta method: {method}")
+    if method == "rolling" and window < 2:
+        raise ValueError("Rolling window must be at least 2 periods")
+    if method == "ewma":
+        if halflife is None or halflife <= 0:
+            raise ValueError("EWMA beta requires a positive halflife")
+        decay = 0.5 ** (1 / halflife)
+    if min_periods is None:
+        min_periods = window if method == "rolling" else 2
+
+    shape = (len(markets), n_stocks, n_periods)
+    if out is None:
+        out = np.empty(shape)
+    betas = out.reshape(shape)
+
+    # Observation count (or total weight for EWMA) behind each period's sums
+    count = np.arange(1, n_periods + 1, dtype=float)
+    if method == "rolling":
+        count = np.minimum(count, window)
+    reported = count >= min_periods
+    if method == "ewma":
+        count = (1 - decay**count) / (1 - decay)
+
+    def running(values: np.ndarray) -> np.ndarray:
+        """Windowed sums along the period axis."""
+        if method == "ewma":
+            for t in range(1, n_periods):
+                values[..., t] += decay * values[..., t - 1]
+            return values
+        np.cumsum(values, axis=-1, out=values)
+        if method == "rolling" and n_periods > window:
+            values[..., window:] -= values[..., :-window].copy()
+        return values
+
+    for m, market in enumerate(markets):
+        # Beta is shift invariant; centering each series keeps the sums small
+        y = market - market.mean()
+        sum_y = running(y.copy())
+        sum_yy = running(y * y)
+        market_var = sum_yy - sum_y * sum_y / count
+        flat = market_var <= n_periods * np.finfo(float).eps * np.dot(y, y)
+
+        for start in range(0, n_stocks, chunk_size):
+            x = np.array(stocks[start : start + chunk_size], dtype=float)
+            x -= x.mean(axis=1, keepdims=True)
+            sum_xy = running(x * y)
+            sum_x = running(x)
+            sum_x *= sum_y / count
+            sum_xy -= sum_x
+            with np.errstate(divide="ignore", invalid="ignore"):
+                sum_xy /= market_var
+            sum_xy[:, flat] = 1.0
+            sum_xy[:, ~reported] = np.nan
+            betas[m, start : start + chunk_size] = sum_xy
+
+    if np.ndim(market_returns) == 1:
+        betas = betas[0]
+    return betas if np.ndim(stock_returns) == 2 else betas[..., 0, :]
+
+
 def calculate_fcf_cagr(fcf_series: List[float]) -> float:
     """
     Calculate compound annual growth rate of FCF.
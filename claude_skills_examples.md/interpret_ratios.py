@@ -3,7 +3,9 @@ Financial ratio interpretation module.
 Provides industry benchmarks and contextual analysis.
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 
 class RatioInterpreter:
@@ -258,6 +260,251 @@ class RatioInterpreter:
         return "\n".join(report_lines)
 
 
+class PeerRanking:
+    """
+    Rank companies against their industry peers instead of fixed thresholds.
+
+    Each ratio keeps one sorted array of complex keys, industry code + 1j *
+    value. NumPy orders complex numbers by real then imaginary part, so every
+    industry's peers form a sorted run and one searchsorted per ratio ranks
+    all companies in all industries at once. New filers are merged in with
+    searchsorted and insert rather than a re-sort, and z-score moments are
+    kept per industry as running count, mean and sum of squared deviations.
+    """
+
+    def __init__(self, columns: Sequence[str]):
+        """
+        Initialize an empty peer universe.
+
+        Args:
+            columns: Ratio name for each column of the ratio matrices
+                (e.g. calculate_ratios.BATCH_RATIO_COLUMNS)
+        """
+        self.columns = list(columns)
+        self.industries = {}  # industry -> code (order of first appearance)
+        self._keys = [np.empty(0, dtype=complex) for _ in self.columns]
+        self._count = np.zeros((0, len(self.columns)), dtype=int)
+        self._mean = np.zeros((0, len(self.columns)))
+        self._m2 = np.zeros((0, len(self.columns)))
+
+    def _prepare(self, ratios: Any, industries: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Validate a ratio matrix and look up industry codes (-1 where unknown)."""
+        ratios = np.asarray(ratios, dtype=float)
+        if ratios.ndim != 2 or ratios.shape[1] != len(self.columns):
+            raise ValueError(f"Ratios must have shape (companies, {len(self.columns)})")
+        if len(industries) != len(ratios):
+            raise ValueError("Need one industry per company")
+        labels, inverse = np.unique(np.asarray(industries), return_inverse=True)
+        codes = np.array([self.industries.get(label, -1) for label in labels.tolist()], dtype=int)
+        return ratios, codes[inverse]
+
+    def add(self, ratios: Any, industries: Sequence[str]):
+        """
+        Add companies to the universe (NaN ratios are left out of that ratio's peers).
+
+        Args:
+            ratios: (n_companies, n_columns) ratio matrix
+            industries: Industry of each company
+        """
+        for label in dict.fromkeys(np.asarray(industries).tolist()):
+            self.industries.setdefault(label, len(self.industries))
+        ratios, codes = self._prepare(ratios, industries)
+        n_groups, n_columns = len(self.industries), len(self.columns)
+        grow = n_groups - len(self._count)
+        if grow:
+            self._count = np.vstack([self._count, np.zeros((grow, n_columns), dtype=int)])
+            self._mean = np.vstack([self._mean, np.zeros((grow, n_columns))])
+            self._m2 = np.vstack([self._m2, np.zeros((grow, n_columns))])
+
+        # Ordering by value then stably by code sorts the keys without complex comparisons
+        small_codes = codes.astype(np.min_scalar_type(n_groups))
+        for j in range(n_columns):
+            rows = np.flatnonzero(~np.isnan(ratios[:, j]))
+            rows = rows[np.argsort(ratios[rows, j])]
+            rows = rows[np.argsort(small_codes[rows], kind="stable")]
+            new = _peer_keys(codes[rows], ratios[rows, j])
+            old = self._keys[j]
+            # Merge the sorted batch into place without re-sorting
+            self._keys[j] = np.insert(old, np.searchsorted(old, new), new) if len(old) else new
+
+        # Batch moments per (industry, ratio), then combine with the running ones (Chan et al.)
+        counts, batch_mean, batch_m2 = _peer_moments(ratios, codes, n_groups)
+        total = self._count + counts
+        delta = batch_mean - self._mean
+        weight = counts / np.maximum(total, 1)
+        self._m2 = self._m2 + batch_m2 + delta**2 * self._count * weight
+        self._mean = self._mean + delta * weight
+        self._count = total
+
+    def rank(
+        self, ratios: Any, industries: Sequence[str], added: Any = True
+    ) -> Dict[str, np.ndarray]:
+        """
+        Percentile and z-score of each company's ratios within its industry.
+
+        Percentiles follow pandas rank(pct=True): the average rank among peers
+        (ties share it) divided by the peer count, with the company counted as
+        one of its peers. A company already added is counted once; one that
+        was not (added=False) is ranked as if it joined its industry, so the
+        peer count grows by one. Z-scores use the peer mean and sample
+        (ddof=1) standard deviation.
+
+        Args:
+            ratios: (n_companies, n_columns) ratio matrix
+            industries: Industry of each company
+            added: Whether each company (or all of them) is already in the universe
+
+        Returns:
+            Dictionary with 'percentile' and 'z_score' arrays shaped like
+            ratios; NaN for missing ratios and industries without peers
+        """
+        ratios, codes = self._prepare(ratios, industries)
+        outside = ~np.broadcast_to(np.asarray(added, dtype=bool), codes.shape)
+        known = codes >= 0
+        percentile = np.full(ratios.shape, np.nan)
+        z_score = np.full(ratios.shape, np.nan)
+        if not known.any():
+            return {"percentile": percentile, "z_score": z_score}
+
+        ratios, codes, outside = ratios[known], codes[known], outside[known]
+        count = self._count[codes]
+        # Peers of an industry start after every lower industry code's peers
+        start = (np.cumsum(self._count, axis=0) - self._count)[codes]
+        ranks = np.empty(ratios.shape)
+        for j, keys in enumerate(self._keys):
+            if not len(keys):
+                ranks[:, j] = np.nan
+                continue
+            queries = _peer_keys(codes, ratios[:, j])
+            left = np.searchsorted(keys, queries)
+            # Count ties by looking one past the match; search only where a run continues
+            equal = keys[np.minimum(left, len(keys) - 1)] == queries
+            right = left + equal
+            longer = np.flatnonzero(equal & (right < len(keys)))
+            longer = longer[keys[right[longer]] == queries[longer]]
+            right[longer] = np.searchsorted(keys, queries[longer], "right")
+            missing = ~(equal | outside | np.isnan(ratios[:, j])) & (count[:, j] > 0)
+            if missing.any():
+                raise ValueError("Ratios not in the universe; rank new companies with added=False")
+            # An outsider lengthens its tied run and its industry by one
+            ranks[:, j] = (left + right + 1 + outside - 2 * start[:, j]) / (
+                2 * np.maximum(count[:, j] + outside, 1)
+            )
+        ranks[np.isnan(ratios) | (count == 0)] = np.nan
+        percentile[known] = ranks
+
+        z_score[known] = _z_scores(ratios, count, self._mean[codes], self._m2[codes])
+
+        return {"percentile": percentile, "z_score": z_score}
+
+    def industry_summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Peer count, mean, standard deviation and median of every ratio by industry.
+
+        Returns:
+            {industry: {ratio: {"count", "mean", "std", "median"}}}
+        """
+        summary = {}
+        for label, code in self.industries.items():
+            summary[label] = {}
+            for j, name in enumerate(self.columns):
+                keys = self._keys[j]
+                start, stop = np.searchsorted(keys, _peer_keys(code, [-np.inf, np.inf]))
+                count = int(self._count[code, j])
+                summary[label][name] = {
+                    "count": count,
+                    "mean": float(self._mean[code, j]) if count else float("nan"),
+                    "std": (
+                        float(np.sqrt(self._m2[code, j] / (count - 1)))
+                        if count > 1
+                        else float("nan")
+                    ),
+                    "median": float(np.median(keys[start:stop].imag)) if count else float("nan"),
+                }
+        return summary
+
+
+def _peer_keys(codes: Any, values: Any) -> np.ndarray:
+    """Complex sort keys code + value*j (built by part: 1j * inf would give a NaN real part)."""
+    codes, values = np.broadcast_arrays(codes, values)
+    keys = np.empty(codes.shape, dtype=complex)
+    keys.real = codes
+    keys.imag = values
+    return keys
+
+
+def _peer_moments(
+    ratios: np.ndarray, codes: np.ndarray, n_groups: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Count, mean and sum of squared deviations of each ratio by industry code (NaN skipped)."""
+    n_columns = ratios.shape[1]
+    valid = ~np.isnan(ratios)
+    cells = (codes[:, None] * n_columns + np.arange(n_columns)).ravel()[valid.ravel()]
+    values = ratios[valid]
+    size = n_groups * n_columns
+    counts = np.bincount(cells, minlength=size).reshape(n_groups, n_columns)
+    sums = np.bincount(cells, weights=values, minlength=size).reshape(n_groups, n_columns)
+    mean = sums / np.maximum(counts, 1)
+    deviations = values - mean.ravel()[cells]
+    m2 = np.bincount(cells, weights=deviations**2, minlength=size).reshape(n_groups, n_columns)
+    return counts, mean, m2
+
+
+def _z_scores(
+    ratios: np.ndarray, count: np.ndarray, mean: np.ndarray, m2: np.ndarray
+) -> np.ndarray:
+    """Z-scores against peer moments, using the sample (ddof=1) standard deviation."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.sqrt(m2 / (count - 1))
+        std[count < 2] = np.nan
+        return (ratios - mean) / std
+
+
+def rank_peers(
+    ratios: Any, industries: Sequence[str], columns: Sequence[str]
+) -> Dict[str, np.ndarray]:
+    """
+    Rank every company in a universe against its own industry.
+
+    Args:
+        ratios: (n_companies, n_columns) ratio matrix, e.g. from calculate_ratios_batch
+        industries: Industry of each company
+        columns: Ratio name for each column
+
+    Returns:
+        Dictionary with 'percentile' and 'z_score' arrays shaped like ratios
+    """
+    ratios = np.asarray(ratios, dtype=float)
+    if ratios.ndim != 2 or ratios.shape[1] != len(columns):
+        raise ValueError(f"Ratios must have shape (companies, {len(columns)})")
+    if len(industries) != len(ratios):
+        raise ValueError("Need one industry per company")
+    labels, codes = np.unique(np.asarray(industries), return_inverse=True)
+    codes = codes.ravel()
+    count, mean, m2 = _peer_moments(ratios, codes, len(labels))
+
+    # The universe ranks itself, so sort each ratio once (by value, then stably by
+    # industry) and average the positions of tied runs instead of searching. Small
+    # integer codes let the stable pass use NumPy's radix sort.
+    small_codes = codes.astype(np.min_scalar_type(len(labels)))
+    percentile = np.full(ratios.shape, np.nan)
+    for j in range(ratios.shape[1]):
+        rows = np.flatnonzero(~np.isnan(ratios[:, j]))
+        order = rows[np.argsort(ratios[rows, j])]
+        order = order[np.argsort(small_codes[order], kind="stable")]
+        values, groups = ratios[order, j], codes[order]
+        new_run = np.ones(len(order), dtype=bool)
+        new_run[1:] = (values[1:] != values[:-1]) | (groups[1:] != groups[:-1])
+        run = np.cumsum(new_run) - 1
+        first = np.flatnonzero(new_run)[run]
+        last = np.append(np.flatnonzero(new_run)[1:], len(order))[run] - 1
+        start = (np.cumsum(count[:, j]) - count[:, j])[groups]
+        percentile[order, j] = ((first + last) / 2 + 1 - start) / count[groups, j]
+
+    z_score = _z_scores(ratios, count[codes], mean[codes], m2[codes])
+    return {"percentile": percentile, "z_score": z_score}
+
+
 def perform_comprehensive_analysis(
     ratios: Dict[str, Any],
     industry: str = "general",
@@ -0,0 +1,128 @@
+"""
+Fixed-memory streaming statistics.
+Summarizes arbitrarily long streams of values (count, mean, spread, min/max
+and approximate quantiles) without keeping the values themselves.
+"""
+
+import numpy as np
+from typing import Dict, Any, Tuple
+
+
+class StreamingQuantileSketch:
+    """Fixed-memory mean, spread and quantile estimates over a stream of values."""
+
+    def __init__(self, max_centroids: int = 2000):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            max_centroids: Number of weighted centroids kept between updates
+        """
+        self.max_centroids = max_centroids
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: Any):
+        """
+        Add a batch of values to the sketch.
+
+        Args:
+            values: Array of observations
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size == 0:
+            return
+        self._merge_moments(values.size, values.mean(), ((values - values.mean()) ** 2).sum())
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._compress(
+            np.concatenate([self.means, values]),
+            np.concatenate([self.weights, np.ones(values.size)]),
+        )
+
+    def merge(self, other: "StreamingQuantileSketch"):
+        """
+        Fold another sketch (e.g. from a parallel worker) into this one.
+
+        Args:
+            other: Sketch to merge
+        """
+        if other.count == 0:
+            return
+        self._merge_moments(other.count, other.mean, other.m2)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(
+            np.concatenate([self.means, other.means]),
+            np.concatenate([self.weights, other.weights]),
+        )
+
+    def _merge_moments(self, count: int, mean: float, m2: float):
+        """Combine running mean and sum of squared deviations (Chan et al.)."""
+        total = self.count + count
+        delta = mean - self.mean
+        self.m2 += m2 + delta**2 * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        """Sort centroids and pool them into at most max_centroids equal-weight buckets."""
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+
+        if means.size > self.max_centroids:
+            cumulative = np.cumsum(weights)
+            bucket = ((cumulative - weights / 2) / cumulative[-1] * self.max_centroids).astype(int)
+            bucket = np.minimum(bucket, self.max_centroids - 1)
+            pooled_weights = np.bincount(bucket, weights=weights)
+            pooled_sums = np.bincount(bucket, weights=means * weights)
+            keep = pooled_weights > 0
+            means = pooled_sums[keep] / pooled_weights[keep]
+            weights = pooled_weights[keep]
+
+        self.means = means
+        self.weights = weights
+
+    def quantile(self, q: Any) -> Any:
+        """
+        Estimate quantiles from the sketch.
+
+        Args:
+            q: Quantile or array of quantiles in [0, 1]
+
+        Returns:
+            Estimated value(s) at q
+        """
+        if self.count == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        positions = np.cumsum(self.weights) - self.weights / 2
+        return np.interp(
+            np.asarray(q, dtype=float) * self.count,
+            np.concatenate([[0.0], positions, [self.count]]),
+            np.concatenate([[self.min], self.means, [self.max]]),
+        )
+
+    def summary(self, percentiles: Tuple[float, ...] = (5, 25, 50, 75, 95)) -> Dict[str, Any]:
+        """
+        Summary statistics of everything seen so far.
+
+        Args:
+            percentiles: Percentiles to report
+
+        Returns:
+            Dictionary with count, mean, std, min, max and percentiles
+        """
+        estimates = self.quantile(np.asarray(percentiles, dtype=float) / 100)
+        return {
+            "count": self.count,
+            "mean": float(self.mean) if self.count else np.nan,
+            "std": float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else 0.0,
+            "min": float(self.min) if self.count else np.nan,
+            "max": float(self.max) if self.count else np.nan,
+            "percentiles": dict(zip(percentiles, np.atleast_1d(estimates).tolist())),
+        }
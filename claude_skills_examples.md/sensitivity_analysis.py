@@ -3,24 +3,132 @@ Sensitivity analysis module for financial models.
 Tests impact of variable changes on key outputs.
 """
 
+import hashlib
+import json
+import os
+import pickle
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Any, Optional, Tuple, Callable
 
 
+def accepts_array(func: Callable) -> Callable:
+    """
+    Mark an output function as evaluating an array of test values in one call.
+
+    A marked function takes the full array of test values and returns an
+    array of outputs of the same length, so sweeps skip the per-step
+    model update entirely.
+
+    Args:
+        func: Output function taking an array of values
+
+    Returns:
+        The same function, flagged with accepts_array = True
+    """
+    func.accepts_array = True
+    return func
+
+
 class SensitivityAnalyzer:
     """Perform sensitivity analysis on financial models."""
 
-    def __init__(self, base_model: Any):
+    def __init__(
+        self,
+        base_model: Any,
+        memo_size: int = 0,
+        state_attributes: Optional[Tuple[str, ...]] = None,
+    ):
         """
         Initialize sensitivity analyzer.
 
         Args:
             base_model: Base financial model to analyze
+            memo_size: Model states whose outputs are remembered across tornado,
+                scenario and breakeven runs (0 disables memoization)
+            state_attributes: Model attributes restored between scenarios (and
+                fingerprinted for the memo); by default the model's own
+                snapshot()/restore() and fingerprint() are used, else every
+                instance attribute
         """
         self.base_model = base_model
         self.base_output = None
         self.sensitivity_results = {}
+        self.state_attributes = state_attributes
+
+        # Memo of output_func results keyed on a fingerprint of the model's actual state
+        self.memo_size = memo_size
+        self._memo = OrderedDict()
+        self.memo_stats = {"hits": 0, "misses": 0}
+
+    def _evaluate(self, output_func: Callable) -> Any:
+        """
+        Evaluate output_func for the model's current state, reusing remembered results.
+
+        Args:
+            output_func: Function to calculate output
+
+        Returns:
+            Output for the current model state
+        """
+        if not self.memo_size:
+            return output_func()
+
+        state = model_fingerprint(self.base_model, self.state_attributes)
+        if state is None:
+            return output_func()
+
+        key = (output_func, state)
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            self.memo_stats["hits"] += 1
+            return self._memo[key]
+
+        self.memo_stats["misses"] += 1
+        output = output_func()
+        self._memo[key] = output
+        if len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+        return output
+
+    def memo_info(self) -> Dict[str, Any]:
+        """
+        Memoization statistics.
+
+        Returns:
+            Dictionary with hits (model runs saved), misses, hit_rate and entries
+        """
+        lookups = self.memo_stats["hits"] + self.memo_stats["misses"]
+        return {
+            **self.memo_stats,
+            "hit_rate": self.memo_stats["hits"] / lookups if lookups else 0.0,
+            "entries": len(self._memo),
+        }
+
+    def snapshot(self) -> Any:
+        """
+        Capture the model state.
+
+        Returns:
+            Opaque state for restore()
+        """
+        return snapshot_model(self.base_model, self.state_attributes)
+
+    def restore(self, state: Any):
+        """
+        Return the model to a snapshot.
+
+        Args:
+            state: Result of snapshot()
+        """
+        restore_model(self.base_model, state, self.state_attributes)
+
+    def clear_memo(self):
+        """Forget remembered outputs (e.g. after changing what output functions read)."""
+        self._memo.clear()
 
     def one_way_sensitivity(
         self,
@@ -30,10 +138,16 @@ class SensitivityAnalyzer:
         steps: int,
         output_func: Callable,
         model_update_func: Callable,
-    ) -> pd.DataFrame:
+        sink: Optional["ResultSink"] = None,
+    ) -> Any:
         """
         Perform one-way sensitivity analysis.
 
+        If output_func is marked with accepts_array, it is called once with
+        every test value and model_update_func is not used. With a sink, test
+        values are generated, evaluated and written one chunk at a time, so
+        memory stays flat however many steps are requested.
+
         Args:
             variable_name: Name of variable to test
             base_value: Base case value
@@ -41,37 +155,74 @@ class SensitivityAnalyzer:
             steps: Number of steps in range
             output_func: Function to calculate output metric
             model_update_func: Function to update model with new value
+            sink: Optional ResultSink to stream the numeric columns into
 
         Returns:
-            DataFrame with sensitivity results
+            DataFrame with sensitivity results, or the sink when one is given
         """
         # Calculate range
         min_val = base_value * (1 - range_pct)
         max_val = base_value * (1 + range_pct)
+
+        if sink is not None:
+            # Same values as np.linspace, produced chunk by chunk
+            step = (max_val - min_val) / (steps - 1) if steps > 1 else 0.0
+            for start in range(0, steps, sink.chunk_size):
+                stop = min(start + sink.chunk_size, steps)
+                test_values = np.arange(start, stop) * step + min_val
+                if stop == steps and steps > 1:
+                    test_values[-1] = max_val
+                outputs = self._one_way_outputs(test_values, output_func, model_update_func)
+                sink.append(
+                    value=test_values,
+                    pct_change=(test_values - base_value) / base_value * 100,
+                    output=outputs,
+                    output_change=outputs - self.base_output if self.base_output else 0.0,
+                )
+            if not getattr(output_func, "accepts_array", False):
+                model_update_func(base_value)
+            sink.attrs["variable"] = variable_name
+            sink.flush()
+            return sink
+
         test_values = np.linspace(min_val, max_val, steps)
+        outputs = self._one_way_outputs(test_values, output_func, model_update_func)
+        if not getattr(output_func, "accepts_array", False):
+            # Reset to base
+            model_update_func(base_value)
+
+        # Build the result column by column
+        return pd.DataFrame(
+            {
+                "variable": variable_name,
+                "value": test_values,
+                "pct_change": (test_values - base_value) / base_value * 100,
+                "output": outputs,
+                "output_change": (
+                    outputs - self.base_output if self.base_output else np.zeros(steps, dtype=int)
+                ),
+            }
+        )
 
-        results = []
+    def _one_way_outputs(
+        self, test_values: np.ndarray, output_func: Callable, model_update_func: Callable
+    ) -> np.ndarray:
+        """Evaluate output_func at each test value (in one call for array outputs)."""
+        if getattr(output_func, "accepts_array", False):
+            # Evaluate the whole sweep in one call
+            outputs = np.asarray(output_func(test_values))
+            if outputs.shape != test_values.shape:
+                raise ValueError("Array output function must return one output per test value")
+            return outputs
+
+        outputs = []
         for value in test_values:
             # Update model
             model_update_func(value)
 
             # Calculate output
-            output = output_func()
-
-            results.append(
-                {
-                    "variable": variable_name,
-                    "value": value,
-                    "pct_change": (value - base_value) / base_value * 100,
-                    "output": output,
-                    "output_change": output - self.base_output if self.base_output else 0,
-                }
-            )
-
-        # Reset to base
-        model_update_func(base_value)
-
-        return pd.DataFrame(results)
+            outputs.append(output_func())
+        return np.asarray(outputs)
 
     def two_way_sensitivity(
         self,
@@ -83,10 +234,21 @@ class SensitivityAnalyzer:
         var2_range: List[float],
         output_func: Callable,
         model_update_func: Callable,
-    ) -> pd.DataFrame:
+        model_factory: Optional[Callable] = None,
+        max_workers: Optional[int] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+        sink: Optional["ResultSink"] = None,
+    ) -> Any:
         """
         Perform two-way sensitivity analysis.
 
+        With model_factory, rows of the grid are evaluated in blocks across a
+        process pool. Each worker calls the factory once to build its own
+        model, so the shared model is never touched; the table is identical
+        to the serial one whatever order blocks finish in. With a sink, the
+        grid is streamed row by row in long format (var1, var2, output)
+        instead of being held as a dense table.
+
         Args:
             var1_name: First variable name
             var1_base: First variable base value
@@ -96,22 +258,59 @@ class SensitivityAnalyzer:
             var2_range: Range of values for second variable
             output_func: Function to calculate output
             model_update_func: Function to update model (takes var1, var2)
+            model_factory: Picklable function returning (model_update_func, output_func)
+                bound to a fresh model; enables the process pool
+            max_workers: Worker processes (defaults to the CPU count)
+            progress: Called as progress(cells_done, total_cells) as rows complete
+            sink: Optional ResultSink to stream (var1, var2, output) rows into
 
         Returns:
-            DataFrame with two-way sensitivity table
+            DataFrame with two-way sensitivity table, or the sink when one is given
         """
-        results = np.zeros((len(var1_range), len(var2_range)))
-
-        for i, val1 in enumerate(var1_range):
-            for j, val2 in enumerate(var2_range):
-                # Update both variables
-                model_update_func(val1, val2)
+        on_rows = None
+        if sink is not None:
+            if var1_name == var2_name or "output" in (var1_name, var2_name):
+                raise ValueError("Variable names must be distinct and not 'output'")
+            var1_values = np.asarray(var1_range, dtype=float)
+            var2_values = np.asarray(var2_range, dtype=float)
+
+            def on_rows(start: int, outputs: np.ndarray):
+                for offset, row in enumerate(outputs):
+                    sink.append(
+                        **{var1_name: var1_values[start + offset], var2_name: var2_values},
+                        output=row,
+                    )
+
+        if model_factory is not None:
+            results = _evaluate_grid_parallel(
+                var1_range, var2_range, model_factory, "two_way", max_workers, progress, on_rows
+            )
+        else:
+            total = len(var1_range) * len(var2_range)
+            results = None if sink is not None else np.zeros((len(var1_range), len(var2_range)))
+            row = np.zeros(len(var2_range))
+
+            for i, val1 in enumerate(var1_range):
+                for j, val2 in enumerate(var2_range):
+                    # Update both variables
+                    model_update_func(val1, val2)
+
+                    # Calculate output
+                    row[j] = output_func()
+
+                if sink is not None:
+                    on_rows(i, row[None, :])
+                else:
+                    results[i] = row
+                if progress is not None:
+                    progress((i + 1) * len(var2_range), total)
 
-                # Calculate output
-                results[i, j] = output_func()
+            # Reset to base
+            model_update_func(var1_base, var2_base)
 
-        # Reset to base
-        model_update_func(var1_base, var2_base)
+        if sink is not None:
+            sink.flush()
+            return sink
 
         # Create DataFrame
         df = pd.DataFrame(
@@ -138,18 +337,18 @@ class SensitivityAnalyzer:
             DataFrame sorted by impact magnitude
         """
         # Store base output
-        self.base_output = output_func()
+        self.base_output = self._evaluate(output_func)
 
         tornado_data = []
 
         for var_name, var_info in variables.items():
             # Test low value
             var_info["update_func"](var_info["low"])
-            low_output = output_func()
+            low_output = self._evaluate(output_func)
 
             # Test high value
             var_info["update_func"](var_info["high"])
-            high_output = output_func()
+            high_output = self._evaluate(output_func)
 
             # Reset to base
             var_info["update_func"](var_info["base"])
@@ -186,29 +385,50 @@ class SensitivityAnalyzer:
         variable_updates: Dict[str, Callable],
         output_func: Callable,
         probability_weights: Optional[Dict[str, float]] = None,
+        model_factory: Optional[Callable] = None,
+        max_workers: Optional[int] = None,
     ) -> pd.DataFrame:
         """
         Analyze multiple scenarios with different variable combinations.
 
+        The model is snapshotted once and restored after every scenario, so
+        each scenario starts from the base state and results do not depend on
+        scenario order. With model_factory, scenarios are evaluated across a
+        process pool: each worker builds one model, snapshots it and restores
+        it between its scenarios the same way.
+
         Args:
             scenarios: Dictionary of scenarios with variable values
             variable_updates: Functions to update each variable
             output_func: Function to calculate output
             probability_weights: Optional probability for each scenario
+            model_factory: Picklable function returning (model, update functions by
+                variable name, output_func) for a fresh model; enables the process pool
+            max_workers: Worker processes (defaults to the CPU count)
 
         Returns:
             DataFrame with scenario results
         """
         results = []
+        if model_factory is not None:
+            outputs = _evaluate_scenarios_parallel(
+                list(scenarios.values()), model_factory, max_workers, self.state_attributes
+            )
+        else:
+            base_state = self.snapshot()
 
-        for scenario_name, variables in scenarios.items():
-            # Update all variables for this scenario
-            for var_name, value in variables.items():
-                if var_name in variable_updates:
-                    variable_updates[var_name](value)
+        for i, (scenario_name, variables) in enumerate(scenarios.items()):
+            if model_factory is not None:
+                output = outputs[i]
+            else:
+                # Update all variables for this scenario
+                for var_name, value in variables.items():
+                    if var_name in variable_updates:
+                        variable_updates[var_name](value)
 
-            # Calculate output
-            output = output_func()
+                # Calculate output, then return to the base state for the next scenario
+                output = self._evaluate(output_func)
+                self.restore(base_state)
 
             # Get probability if provided
             prob = (
@@ -226,8 +446,6 @@ class SensitivityAnalyzer:
                 }
             )
 
-            # Reset model (simplified - should restore all base values)
-
         df = pd.DataFrame(results)
 
         # Calculate expected value
@@ -259,10 +477,18 @@ class SensitivityAnalyzer:
         min_search: float,
         max_search: float,
         tolerance: float = 0.01,
+        x_tolerance: Optional[float] = None,
+        output_tolerance: Optional[float] = None,
+        max_iter: int = 100,
     ) -> float:
         """
         Find breakeven point where output equals target.
 
+        Uses Brent's method (inverse quadratic / secant steps safeguarded by
+        bisection), so smooth outputs converge in a handful of evaluations.
+        The output may increase or decrease in the variable; if the search
+        range does not bracket the target it is widened automatically.
+
         Args:
             variable_name: Variable to adjust
             variable_update: Function to update variable
@@ -270,34 +496,499 @@ class SensitivityAnalyzer:
             target_value: Target output value
             min_search: Minimum search range
             max_search: Maximum search range
-            tolerance: Convergence tolerance
+            tolerance: Convergence tolerance (default for both tolerances below)
+            x_tolerance: Stop once the breakeven is bracketed this tightly
+            output_tolerance: Stop once the output is this close to target
+            max_iter: Maximum solver iterations
 
         Returns:
             Breakeven value of variable
         """
-        # Binary search for breakeven
-        low = min_search
-        high = max_search
+        x_tolerance = tolerance if x_tolerance is None else x_tolerance
+        output_tolerance = tolerance if output_tolerance is None else output_tolerance
+
+        def residual(value: float) -> float:
+            variable_update(value)
+            return self._evaluate(output_func) - target_value
+
+        low, high = _bracket_root(residual, min_search, max_search)
+        breakeven = _brent_root(residual, *low, *high, x_tolerance, output_tolerance, max_iter)
+
+        # Leave the model at the breakeven
+        variable_update(breakeven)
+        return breakeven
+
+    def breakeven_batch(
+        self,
+        variable_name: str,
+        variable_update: Callable,
+        output_func: Callable,
+        target_values: List[float],
+        min_search: float,
+        max_search: float,
+        tolerance: float = 0.01,
+        x_tolerance: Optional[float] = None,
+        output_tolerance: Optional[float] = None,
+        max_iter: int = 100,
+    ) -> np.ndarray:
+        """
+        Find breakeven points for many target outputs at once.
+
+        If output_func is marked with accepts_array, every unsolved target
+        advances one Illinois (modified regula falsi) step per call, so the
+        whole batch costs a handful of array evaluations. Otherwise each
+        target is solved with breakeven_analysis, sharing memoized outputs.
+        Either way a search range that misses a target is widened as in
+        breakeven_analysis.
+
+        Args:
+            variable_name: Variable to adjust
+            variable_update: Function to update variable (unused for array outputs)
+            output_func: Function to calculate output
+            target_values: Target output values
+            min_search: Minimum search range
+            max_search: Maximum search range
+            tolerance: Convergence tolerance (default for both tolerances below)
+            x_tolerance: Stop once a breakeven is bracketed this tightly
+            output_tolerance: Stop once an output is this close to its target
+            max_iter: Maximum solver iterations
+
+        Returns:
+            Breakeven value per target (NaN where the target cannot be reached)
+        """
+        x_tolerance = tolerance if x_tolerance is None else x_tolerance
+        output_tolerance = tolerance if output_tolerance is None else output_tolerance
+        targets = np.asarray(target_values, dtype=float)
+
+        if not getattr(output_func, "accepts_array", False):
+            breakevens = np.full(targets.shape, np.nan)
+            for i, target in enumerate(targets):
+                try:
+                    breakevens[i] = self.breakeven_analysis(
+                        variable_name,
+                        variable_update,
+                        output_func,
+                        target,
+                        min_search,
+                        max_search,
+                        x_tolerance=x_tolerance,
+                        output_tolerance=output_tolerance,
+                        max_iter=max_iter,
+                    )
+                except ValueError:
+                    pass  # Target not reachable
+            return breakevens
+
+        # Shared bracket endpoints: one array call prices both for every target
+        ends = np.asarray(output_func(np.array([min_search, max_search], dtype=float)))
+        low = np.full(targets.shape, float(min_search))
+        high = np.full(targets.shape, float(max_search))
+        f_low, f_high = ends[0] - targets, ends[1] - targets
+        _bracket_roots(output_func, targets, low, f_low, high, f_high)
+        solvable = np.sign(f_low) != np.sign(f_high)
+
+        breakevens = np.where(f_low == 0, low, high)
+        active = solvable & (f_low != 0) & (f_high != 0)
+        for _ in range(max_iter):
+            if not active.any():
+                break
+            a, b, fa, fb = low[active], high[active], f_low[active], f_high[active]
+
+            # Secant step through the bracket, bisecting if it degenerates
+            with np.errstate(divide="ignore", invalid="ignore"):
+                x = b - fb * (b - a) / (fb - fa)
+            inside = np.isfinite(x) & (x > np.minimum(a, b)) & (x < np.maximum(a, b))
+            x = np.where(inside, x, (a + b) / 2)
+            fx = np.asarray(output_func(x)) - targets[active]
+
+            # Keep the sign change; halve the stale end's residual (Illinois)
+            flipped = np.sign(fx) != np.sign(fb)
+            a = np.where(flipped, b, a)
+            fa = np.where(flipped, fb, fa / 2)
+
+            index = np.flatnonzero(active)
+            low[index], f_low[index], high[index], f_high[index] = a, fa, x, fx
+            breakevens[index] = x
+            done = (np.abs(fx) <= output_tolerance) | (np.abs(x - a) <= x_tolerance)
+            active[index[done]] = False
+
+        return np.where(solvable, breakevens, np.nan)
+
+    def sobol_analysis(
+        self,
+        variables: Dict[str, Dict[str, Any]],
+        output_func: Callable,
+        n_samples: int = 1024,
+        seed: Optional[int] = None,
+        model_factory: Optional[Callable] = None,
+        max_workers: Optional[int] = None,
+        batch_size: int = 10000,
+    ) -> pd.DataFrame:
+        """
+        Variance-based global sensitivity (Sobol first-order and total indices).
+
+        Uses Saltelli's scheme: two independent uniform sample matrices A and B
+        plus, for each variable, A with that column taken from B, for
+        n_samples * (n_variables + 2) model evaluations in total. First-order
+        indices use Saltelli (2010), total indices Jansen's estimator.
+
+        Args:
+            variables: Dictionary of variables with low and high bounds and, unless
+                output_func accepts arrays, an update_func (as in tornado_analysis)
+            output_func: Function to calculate output; if marked with accepts_array
+                it takes an (n, n_variables) matrix and returns n outputs
+            n_samples: Rows in each base sample matrix
+            seed: Random seed
+            model_factory: Picklable function returning (update functions by variable
+                name, output_func) bound to a fresh model; evaluates across a process pool
+            max_workers: Worker processes for model_factory (defaults to the CPU count)
+            batch_size: Rows per call for array output functions
+
+        Returns:
+            DataFrame with first_order and total_order per variable, sorted by total_order
+        """
+        names = list(variables)
+        k = len(names)
+        rng = np.random.default_rng(seed)
+        a, b = rng.random((2, n_samples, k))
+
+        # Stack A, B and every A_B^(i) into one matrix so it is evaluated in one sweep
+        samples = np.empty(((k + 2) * n_samples, k))
+        samples[:n_samples] = a
+        samples[n_samples : 2 * n_samples] = b
+        for i in range(k):
+            block = samples[(i + 2) * n_samples : (i + 3) * n_samples]
+            block[:] = a
+            block[:, i] = b[:, i]
+
+        outputs = self._evaluate_samples(
+            variables, names, samples, output_func, model_factory, max_workers, batch_size
+        )
+        # Center first: the estimators' error otherwise grows with the output's mean
+        outputs = outputs - outputs.mean()
+        f_a, f_b = outputs[:n_samples], outputs[n_samples : 2 * n_samples]
+        f_ab = outputs[2 * n_samples :].reshape(k, n_samples)
+        variance = np.var(outputs[: 2 * n_samples])
+
+        first_order = np.mean(f_b * (f_ab - f_a), axis=1) / variance
+        total_order = 0.5 * np.mean((f_a - f_ab) ** 2, axis=1) / variance
+
+        df = pd.DataFrame(
+            {"variable": names, "first_order": first_order, "total_order": total_order}
+        )
+        return df.sort_values("total_order", ascending=False, ignore_index=True)
+
+    def morris_analysis(
+        self,
+        variables: Dict[str, Dict[str, Any]],
+        output_func: Callable,
+        n_trajectories: int = 100,
+        levels: int = 4,
+        seed: Optional[int] = None,
+        model_factory: Optional[Callable] = None,
+        max_workers: Optional[int] = None,
+        batch_size: int = 10000,
+    ) -> pd.DataFrame:
+        """
+        Morris elementary-effects screening.
 
-        while (high - low) > tolerance:
-            mid = (low + high) / 2
-            variable_update(mid)
-            output = output_func()
+        Each trajectory starts at a random grid point and moves every variable
+        once, in random order, by delta = levels / (2 * (levels - 1)) of its
+        range, for n_trajectories * (n_variables + 1) evaluations.
 
-            if abs(output - target_value) < tolerance:
-                return mid
-            elif output < target_value:
-                low = mid
+        Args:
+            variables: Dictionary of variables with low and high bounds and, unless
+                output_func accepts arrays, an update_func (as in tornado_analysis)
+            output_func: Function to calculate output (see sobol_analysis)
+            n_trajectories: Number of one-at-a-time trajectories
+            levels: Grid levels per variable (even)
+            seed: Random seed
+            model_factory: Picklable function returning (update functions by variable
+                name, output_func) bound to a fresh model; evaluates across a process pool
+            max_workers: Worker processes for model_factory (defaults to the CPU count)
+            batch_size: Rows per call for array output functions
+
+        Returns:
+            DataFrame with mu, mu_star (mean absolute effect) and sigma per variable
+            in output units per unit of the variable, sorted by mu_star
+        """
+        if levels < 2 or levels % 2:
+            raise ValueError("levels must be an even number of at least 2")
+
+        names = list(variables)
+        k = len(names)
+        rng = np.random.default_rng(seed)
+        delta = levels / (2 * (levels - 1))
+        rows = np.arange(n_trajectories)
+
+        # Start low enough to step up, or high enough to step down, by delta
+        direction = rng.choice([-1.0, 1.0], size=(n_trajectories, k))
+        start = rng.integers(0, levels // 2, size=(n_trajectories, k))
+        start = np.where(direction > 0, start, start + levels // 2) / (levels - 1)
+        order = np.argsort(rng.random((n_trajectories, k)), axis=1)
+
+        points = np.empty((n_trajectories, k + 1, k))
+        points[:, 0] = start
+        for step in range(k):
+            points[:, step + 1] = points[:, step]
+            moved = order[:, step]
+            points[rows, step + 1, moved] += direction[rows, moved] * delta
+
+        outputs = self._evaluate_samples(
+            variables,
+            names,
+            points.reshape(-1, k),
+            output_func,
+            model_factory,
+            max_workers,
+            batch_size,
+        ).reshape(n_trajectories, k + 1)
+
+        # Effect of each step, credited to the variable it moved
+        span = np.array([variables[name]["high"] - variables[name]["low"] for name in names])
+        effects = np.empty((n_trajectories, k))
+        steps = np.diff(outputs, axis=1)
+        for step in range(k):
+            moved = order[:, step]
+            effects[rows, moved] = steps[:, step] / (direction[rows, moved] * delta * span[moved])
+
+        df = pd.DataFrame(
+            {
+                "variable": names,
+                "mu": effects.mean(axis=0),
+                "mu_star": np.abs(effects).mean(axis=0),
+                "sigma": effects.std(axis=0, ddof=1) if n_trajectories > 1 else np.nan,
+            }
+        )
+        return df.sort_values("mu_star", ascending=False, ignore_index=True)
+
+    def _evaluate_samples(
+        self,
+        variables: Dict[str, Dict[str, Any]],
+        names: List[str],
+        unit_samples: np.ndarray,
+        output_func: Callable,
+        model_factory: Optional[Callable],
+        max_workers: Optional[int],
+        batch_size: int,
+    ) -> np.ndarray:
+        """
+        Scale unit-cube samples to each variable's [low, high] range and evaluate them.
+
+        Returns:
+            One output per sample row
+        """
+        low = np.array([variables[name]["low"] for name in names], dtype=float)
+        high = np.array([variables[name]["high"] for name in names], dtype=float)
+        samples = low + unit_samples * (high - low)
+
+        if model_factory is not None:
+            return _evaluate_samples_parallel(samples, names, model_factory, max_workers)
+
+        if getattr(output_func, "accepts_array", False):
+            return np.concatenate(
+                [
+                    np.asarray(output_func(samples[start : start + batch_size]), dtype=float)
+                    for start in range(0, len(samples), batch_size)
+                ]
+            )
+
+        # Random samples never repeat a state, so they bypass the memo
+        outputs = np.empty(len(samples))
+        for i, row in enumerate(samples):
+            for name, value in zip(names, row):
+                variables[name]["update_func"](value)
+            outputs[i] = output_func()
+
+        # Reset to base where one is given
+        for name in names:
+            if "base" in variables[name]:
+                variables[name]["update_func"](variables[name]["base"])
+        return outputs
+
+
+def model_fingerprint(model: Any, attributes: Optional[Tuple[str, ...]] = None) -> Any:
+    """
+    Hashable summary of a model's current state, for memoizing outputs.
+
+    Uses the model's own fingerprint() when it has one (DCFModel and
+    CompactDCFModel do); otherwise hashes the pickled attributes, so equal
+    states match while any changed value misses.
+
+    Args:
+        model: Model to summarize
+        attributes: Attribute names holding the model's state (default every instance attribute)
+
+    Returns:
+        Hashable fingerprint, or None if the state cannot be pickled
+    """
+    if attributes is None and hasattr(model, "fingerprint"):
+        return model.fingerprint()
+    names = vars(model) if attributes is None else attributes
+    try:
+        state = pickle.dumps([getattr(model, name) for name in names], pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+    return hashlib.blake2b(state, digest_size=16).digest()
+
+
+def snapshot_model(model: Any, attributes: Optional[Tuple[str, ...]] = None) -> Any:
+    """
+    Capture a model's mutable state.
+
+    Uses the model's own snapshot() when it has one (DCFModel and
+    CompactDCFModel do). Otherwise the declared attributes (or every instance
+    attribute) are copied one level down, as DCFModel.snapshot() does: dicts
+    are rebuilt down to the lists, sets and arrays they hold, and any other
+    object is shared. A model that mutates deeper structures in place should
+    define snapshot()/restore() (a deep copy would cost more than the
+    per-scenario copy this replaces).
+
+    Args:
+        model: Model to capture
+        attributes: Attribute names holding the model's mutable state
+
+    Returns:
+        Opaque state for restore_model()
+    """
+    if attributes is None and hasattr(model, "snapshot"):
+        return model.snapshot()
+    from dcf_model import _copy_state  # Same copy as DCFModel.snapshot()
+
+    names = vars(model) if attributes is None else attributes
+    return {name: _copy_state(getattr(model, name)) for name in names}
+
+
+def restore_model(model: Any, state: Any, attributes: Optional[Tuple[str, ...]] = None):
+    """
+    Return a model to a state captured by snapshot_model(); the state stays reusable.
+
+    Args:
+        model: Model to restore
+        state: Result of snapshot_model()
+        attributes: The attributes passed to snapshot_model()
+    """
+    if attributes is None and hasattr(model, "restore"):
+        model.restore(state)
+        return
+    from dcf_model import _copy_state
+
+    for name, value in state.items():
+        setattr(model, name, _copy_state(value))
+
+
+def _bracket_root(
+    func: Callable[[float], float], low: float, high: float, max_expansions: int = 10
+) -> Tuple[Tuple[float, float], Tuple[float, float]]:
+    """
+    Widen [low, high] until func changes sign across it.
+
+    Returns:
+        ((low, func(low)), (high, func(high)))
+    """
+    f_low, f_high = func(low), func(high)
+    for _ in range(max_expansions):
+        if np.sign(f_low) != np.sign(f_high):
+            return (low, f_low), (high, f_high)
+        # Step away from the end nearer the root, as in Numerical Recipes' zbrac
+        width = high - low
+        if abs(f_low) < abs(f_high):
+            low -= 1.6 * width
+            f_low = func(low)
+        else:
+            high += 1.6 * width
+            f_high = func(high)
+    if np.sign(f_low) != np.sign(f_high):
+        return (low, f_low), (high, f_high)
+    raise ValueError("Target output not reached within the search range")
+
+
+def _bracket_roots(
+    output_func: Callable,
+    targets: np.ndarray,
+    low: np.ndarray,
+    f_low: np.ndarray,
+    high: np.ndarray,
+    f_high: np.ndarray,
+    max_expansions: int = 10,
+):
+    """
+    Vectorized _bracket_root: widen, in place, every [low, high] whose residuals
+    (f_low, f_high) share a sign, one array call to output_func per expansion.
+    """
+    for _ in range(max_expansions):
+        index = np.flatnonzero(np.sign(f_low) == np.sign(f_high))
+        if not len(index):
+            return
+        width = high[index] - low[index]
+        step_low = np.abs(f_low[index]) < np.abs(f_high[index])
+        x = np.where(step_low, low[index] - 1.6 * width, high[index] + 1.6 * width)
+        fx = np.asarray(output_func(x)) - targets[index]
+        moved_low, moved_high = index[step_low], index[~step_low]
+        low[moved_low], f_low[moved_low] = x[step_low], fx[step_low]
+        high[moved_high], f_high[moved_high] = x[~step_low], fx[~step_low]
+
+
+def _brent_root(
+    func: Callable[[float], float],
+    a: float,
+    fa: float,
+    b: float,
+    fb: float,
+    x_tolerance: float,
+    output_tolerance: float,
+    max_iter: int,
+) -> float:
+    """Brent's method on a bracket [a, b] with func(a) and func(b) of opposite sign."""
+    if abs(fa) <= output_tolerance:
+        return a
+    c, fc = a, fa
+    d = e = b - a
+    for _ in range(max_iter):
+        if np.sign(fb) == np.sign(fc):
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+
+        tol = 2 * np.finfo(float).eps * abs(b) + x_tolerance / 2
+        midpoint = (c - b) / 2
+        if abs(midpoint) <= tol or abs(fb) <= output_tolerance:
+            return b
+
+        if abs(e) >= tol and abs(fa) > abs(fb):
+            # Inverse quadratic interpolation, or secant when only two points are distinct
+            s = fb / fa
+            if a == c:
+                p, q = 2 * midpoint * s, 1 - s
+            else:
+                q, r = fa / fc, fb / fc
+                p = s * (2 * midpoint * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2 * p < min(3 * midpoint * q - abs(tol * q), abs(e * q)):
+                e, d = d, p / q
             else:
-                high = mid
+                d = e = midpoint
+        else:
+            d = e = midpoint
 
-        return (low + high) / 2
+        a, fa = b, fb
+        b += d if abs(d) > tol else np.copysign(tol, midpoint)
+        fb = func(b)
+    return b
 
 
 def create_data_table(
     row_variable: Tuple[str, List[float], Callable],
     col_variable: Tuple[str, List[float], Callable],
     output_func: Callable,
+    model_factory: Optional[Callable] = None,
+    max_workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
 ) -> pd.DataFrame:
     """
     Create Excel-style data table for two variables.
@@ -306,6 +997,10 @@ def create_data_table(
         row_variable: (name, values, update_function)
         col_variable: (name, values, update_function)
         output_func: Function to calculate output
+        model_factory: Picklable function returning (row_update, col_update, output_func)
+            bound to a fresh model; evaluates rows across a process pool
+        max_workers: Worker processes (defaults to the CPU count)
+        progress: Called as progress(cells_done, total_cells) as rows complete
 
     Returns:
         DataFrame formatted as data table
@@ -313,13 +1008,21 @@ def create_data_table(
     row_name, row_values, row_update = row_variable
     col_name, col_values, col_update = col_variable
 
-    results = np.zeros((len(row_values), len(col_values)))
+    if model_factory is not None:
+        results = _evaluate_grid_parallel(
+            row_values, col_values, model_factory, "data_table", max_workers, progress
+        )
+    else:
+        results = np.zeros((len(row_values), len(col_values)))
 
-    for i, row_val in enumerate(row_values):
-        for j, col_val in enumerate(col_values):
-            row_update(row_val)
-            col_update(col_val)
-            results[i, j] = output_func()
+        for i, row_val in enumerate(row_values):
+            for j, col_val in enumerate(col_values):
+                row_update(row_val)
+                col_update(col_val)
+                results[i, j] = output_func()
+
+            if progress is not None:
+                progress((i + 1) * len(col_values), results.size)
 
     df = pd.DataFrame(
         results,
@@ -330,6 +1033,356 @@ def create_data_table(
     return df
 
 
+class ResultSink:
+    """
+    Append-only columnar store for very large sweeps.
+
+    Rows are buffered in fixed-size chunks and appended to one raw float64
+    file per column, with a small JSON metadata file alongside. Columns are
+    read back lazily as read-only memory maps, and count, mean, std,
+    min/max and quantiles are maintained incrementally as chunks are written.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        chunk_size: int = 65536,
+        percentiles: Tuple[float, ...] = (5, 25, 50, 75, 95),
+    ):
+        """
+        Initialize (or truncate) a sink.
+
+        Args:
+            directory: Directory for the column files (created if missing)
+            chunk_size: Rows buffered in memory before each write
+            percentiles: Percentiles reported by summary()
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.percentiles = percentiles
+        self.attrs = {}
+        self.columns = []
+        self.rows = 0
+        self._buffers = {}
+        self._fill = 0
+        self._sketches = {}
+
+    @classmethod
+    def open(cls, directory: str) -> "ResultSink":
+        """
+        Reopen a sink written earlier, rebuilding its statistics in one streamed pass.
+
+        Args:
+            directory: Directory the sink was written to
+
+        Returns:
+            ResultSink positioned after the existing rows
+        """
+        with open(os.path.join(directory, "metadata.json")) as f:
+            metadata = json.load(f)
+        sink = cls(directory, metadata["chunk_size"], tuple(metadata["percentiles"]))
+        sink.attrs = metadata["attrs"]
+        sink._start(metadata["columns"])
+        sink.rows = metadata["rows"]
+        for name in sink.columns:
+            values = sink.column(name)
+            for start in range(0, sink.rows, sink.chunk_size):
+                sink._sketches[name].update(values[start : start + sink.chunk_size])
+        return sink
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.f64")
+
+    def _start(self, columns: List[str]):
+        """Fix the column set and create each column's buffer and statistics."""
+        # Imported here so the analyzer itself needs no sibling modules
+        from quantile_sketch import StreamingQuantileSketch
+
+        self.columns = list(columns)
+        self._buffers = {name: np.empty(self.chunk_size) for name in self.columns}
+        self._sketches = {name: StreamingQuantileSketch() for name in self.columns}
+
+    def append(self, **columns: Any):
+        """
+        Append rows; scalars are broadcast to the length of the array columns.
+
+        Args:
+            **columns: Column arrays (the first append fixes the column set)
+        """
+        if not self.columns:
+            self._start(columns)
+            for name in self.columns:
+                open(self._path(name), "wb").close()
+        elif set(columns) != set(self.columns):
+            raise ValueError(f"Sink columns are {', '.join(self.columns)}")
+
+        arrays = np.broadcast_arrays(
+            *(np.asarray(columns[name], dtype=float) for name in self.columns)
+        )
+        length = arrays[0].size
+        start = 0
+        while start < length:
+            take = min(self.chunk_size - self._fill, length - start)
+            for name, values in zip(self.columns, arrays):
+                self._buffers[name][self._fill : self._fill + take] = values.ravel()[
+                    start : start + take
+                ]
+            self._fill += take
+            start += take
+            if self._fill == self.chunk_size:
+                self.flush()
+
+    def flush(self):
+        """Write buffered rows to disk and fold them into the running statistics."""
+        if self._fill:
+            for name in self.columns:
+                chunk = self._buffers[name][: self._fill]
+                with open(self._path(name), "ab") as f:
+                    chunk.tofile(f)
+                self._sketches[name].update(chunk)
+            self.rows += self._fill
+            self._fill = 0
+
+        metadata = {
+            "columns": self.columns,
+            "rows": self.rows,
+            "chunk_size": self.chunk_size,
+            "percentiles": list(self.percentiles),
+            "attrs": self.attrs,
+        }
+        with open(os.path.join(self.directory, "metadata.json"), "w") as f:
+            json.dump(metadata, f)
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        One column as a read-only memory map (flushed rows only).
+
+        Args:
+            name: Column name
+
+        Returns:
+            Array of shape (rows,)
+        """
+        if name not in self.columns:
+            raise ValueError(f"Unknown column: {name}")
+        if self.rows == 0:
+            return np.empty(0)
+        return np.memmap(self._path(name), dtype=float, mode="r", shape=(self.rows,))
+
+    def to_dataframe(
+        self, columns: Optional[List[str]] = None, start: int = 0, stop: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Load a slice of the stored rows as a DataFrame.
+
+        Only the requested columns and rows are read from disk.
+
+        Args:
+            columns: Columns to load (default all)
+            start: First row
+            stop: End row (exclusive; default all rows)
+
+        Returns:
+            DataFrame of the selected rows
+        """
+        self.flush()
+        columns = self.columns if columns is None else columns
+        return pd.DataFrame(
+            {name: np.array(self.column(name)[start:stop]) for name in columns},
+            index=pd.RangeIndex(start, start + len(range(self.rows)[start:stop])),
+        )
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Incremental summary statistics of every column.
+
+        Returns:
+            DataFrame indexed by column with count, mean, std, min, max and percentiles
+        """
+        self.flush()
+        rows = {}
+        for name in self.columns:
+            stats = self._sketches[name].summary(self.percentiles)
+            percentiles = stats.pop("percentiles")
+            rows[name] = {**stats, **{f"p{p:g}": value for p, value in percentiles.items()}}
+        return pd.DataFrame.from_dict(rows, orient="index")
+
+    def __enter__(self) -> "ResultSink":
+        return self
+
+    def __exit__(self, *exc_info: Any):
+        self.flush()
+
+
+# Process-pool evaluation of two-variable grids and sample matrices
+
+# Evaluators built once per worker process from the user's model factory
+_grid_cell: Dict[str, Any] = {}
+
+
+def _init_grid_worker(
+    model_factory: Callable, layout: str, state_attributes: Optional[Tuple[str, ...]] = None
+):
+    """Build this worker's own model and wrap its callbacks as a cell(row, col) function."""
+    callbacks = model_factory()
+    if layout == "scenarios":
+        # Snapshot once; scenarios restore it rather than rebuilding the model
+        model, updates, output = callbacks
+        base_state = snapshot_model(model, state_attributes)
+        _grid_cell["scenarios"] = (model, updates, output, state_attributes, base_state)
+        return
+    if layout == "samples":
+        # (update functions by variable name, output_func)
+        _grid_cell["samples"] = callbacks
+        return
+    if layout == "two_way":
+        update, output = callbacks
+
+        def cell(row_value: float, col_value: float) -> float:
+            update(row_value, col_value)
+            return output()
+
+    else:
+        row_update, col_update, output = callbacks
+
+        def cell(row_value: float, col_value: float) -> float:
+            row_update(row_value)
+            col_update(col_value)
+            return output()
+
+    _grid_cell["cell"] = cell
+
+
+def _evaluate_grid_rows(row_values: List[float], col_values: List[float]) -> np.ndarray:
+    """Evaluate a block of grid rows in the current worker."""
+    cell = _grid_cell["cell"]
+    return np.array([[cell(row, col) for col in col_values] for row in row_values], dtype=float)
+
+
+def _evaluate_grid_parallel(
+    row_values: List[float],
+    col_values: List[float],
+    model_factory: Callable,
+    layout: str,
+    max_workers: Optional[int],
+    progress: Optional[Callable[[int, int], None]],
+    on_rows: Optional[Callable[[int, np.ndarray], None]] = None,
+) -> Optional[np.ndarray]:
+    """
+    Fill a (rows, cols) grid across a process pool in row blocks.
+
+    Blocks are written back by row index, so the grid does not depend on
+    completion order. With on_rows, blocks are instead handed to
+    on_rows(first_row, block) in row order and no dense grid is kept.
+    """
+    row_values, col_values = list(row_values), list(col_values)
+    total = len(row_values) * len(col_values)
+    results = np.zeros((len(row_values), len(col_values))) if on_rows is None else None
+    pending, next_row = {}, 0
+    workers = max_workers or os.cpu_count() or 1
+    # A few blocks per worker balances load without per-cell task overhead
+    block_rows = max(1, -(-len(row_values) // (workers * 4)))
+    blocks = [
+        (start, min(start + block_rows, len(row_values)))
+        for start in range(0, len(row_values), block_rows)
+    ]
+
+    done = 0
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_grid_worker, initargs=(model_factory, layout)
+    ) as pool:
+        futures = {
+            pool.submit(_evaluate_grid_rows, row_values[start:stop], col_values): (start, stop)
+            for start, stop in blocks
+        }
+        for future in as_completed(futures):
+            start, stop = futures[future]
+            if on_rows is None:
+                results[start:stop] = future.result()
+            else:
+                # Hold early blocks until every row before them has been delivered
+                pending[start] = future.result()
+                while next_row in pending:
+                    block = pending.pop(next_row)
+                    on_rows(next_row, block)
+                    next_row += len(block)
+            done += (stop - start) * len(col_values)
+            if progress is not None:
+                progress(done, total)
+
+    return results
+
+
+def _evaluate_sample_rows(names: List[str], samples: np.ndarray) -> np.ndarray:
+    """Evaluate a block of sample rows (one column per named variable) in the current worker."""
+    updates, output = _grid_cell["samples"]
+    outputs = np.empty(len(samples))
+    for i, row in enumerate(samples):
+        for name, value in zip(names, row):
+            updates[name](value)
+        outputs[i] = output()
+    return outputs
+
+
+def _evaluate_samples_parallel(
+    samples: np.ndarray, names: List[str], model_factory: Callable, max_workers: Optional[int]
+) -> np.ndarray:
+    """Evaluate sample rows across a process pool in blocks, written back by row index."""
+    outputs = np.empty(len(samples))
+    workers = max_workers or os.cpu_count() or 1
+    block = max(1, -(-len(samples) // (workers * 4)))
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_grid_worker, initargs=(model_factory, "samples")
+    ) as pool:
+        futures = {
+            pool.submit(_evaluate_sample_rows, names, samples[start : start + block]): start
+            for start in range(0, len(samples), block)
+        }
+        for future in as_completed(futures):
+            start = futures[future]
+            outputs[start : start + block] = future.result()
+    return outputs
+
+
+def _evaluate_scenario_rows(scenarios: List[Dict[str, float]]) -> List[Any]:
+    """Evaluate scenarios in the current worker, restoring its base model after each."""
+    model, updates, output, attributes, base_state = _grid_cell["scenarios"]
+    outputs = []
+    for variables in scenarios:
+        for name, value in variables.items():
+            if name in updates:
+                updates[name](value)
+        outputs.append(output())
+        restore_model(model, base_state, attributes)
+    return outputs
+
+
+def _evaluate_scenarios_parallel(
+    scenarios: List[Dict[str, float]],
+    model_factory: Callable,
+    max_workers: Optional[int],
+    state_attributes: Optional[Tuple[str, ...]] = None,
+) -> List[Any]:
+    """Evaluate scenarios across a process pool in blocks, written back by position."""
+    outputs = [None] * len(scenarios)
+    workers = max_workers or os.cpu_count() or 1
+    block = max(1, -(-len(scenarios) // (workers * 4)))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_grid_worker,
+        initargs=(model_factory, "scenarios", state_attributes),
+    ) as pool:
+        futures = {
+            pool.submit(_evaluate_scenario_rows, scenarios[start : start + block]): start
+            for start in range(0, len(scenarios), block)
+        }
+        for future in as_completed(futures):
+            start = futures[future]
+            outputs[start : start + block] = future.result()
+    return outputs
+
+
 # Example usage
 if __name__ == "__main__":
     # Mock model for demonstration
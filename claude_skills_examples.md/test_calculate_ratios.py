@@ -0,0 +1,93 @@
+"""
+Tests that the batch ratio engine and the JSON encoder match their scalar references.
+Run from this directory: python -m pytest test_calculate_ratios.py
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from calculate_ratios import (
+    BATCH_RATIO_COLUMNS,
+    FinancialRatioCalculator,
+    calculate_ratios_batch,
+    calculate_ratios_from_data,
+    encode_ratio_results,
+    ratio_inputs_from_data,
+)
+
+
+def company(rng, **overrides):
+    """Random financial data shaped like calculate_ratios_from_data's input."""
+    data = {
+        "income_statement": {
+            "revenue": rng.uniform(5e5, 2e6),
+            "cost_of_goods_sold": rng.uniform(2e5, 5e5),
+            "operating_income": rng.uniform(-5e4, 3e5),
+            "ebit": rng.uniform(-5e4, 3e5),
+            "ebitda": rng.uniform(1e5, 4e5),
+            "interest_expense": rng.uniform(1e4, 5e4),
+            "net_income": rng.uniform(-1e5, 2e5),
+        },
+        "balance_sheet": {
+            "total_assets": rng.uniform(1e6, 3e6),
+            "current_assets": rng.uniform(3e5, 9e5),
+            "cash_and_equivalents": rng.uniform(5e4, 3e5),
+            "accounts_receivable": rng.uniform(5e4, 2e5),
+            "inventory": rng.uniform(5e4, 3e5),
+            "current_liabilities": rng.uniform(2e5, 5e5),
+            "total_debt": rng.uniform(1e5, 8e5),
+            "current_portion_long_term_debt": rng.uniform(1e4, 8e4),
+            "shareholders_equity": rng.uniform(5e5, 2e6),
+        },
+        "cash_flow": {"operating_cash_flow": rng.uniform(-5e4, 3e5)},
+        "market_data": {
+            "share_price": rng.uniform(10, 100),
+            "shares_outstanding": rng.uniform(5e4, 2e5),
+            "earnings_growth_rate": rng.uniform(-0.05, 0.2),
+        },
+    }
+    for statement, fields in overrides.items():
+        data[statement].update(fields)
+    return data
+
+
+def companies():
+    rng = np.random.default_rng(3)
+    records = [company(rng) for _ in range(20)]
+    # Zero denominators, and a missing statement
+    records.append(company(rng, balance_sheet={"current_liabilities": 0, "inventory": 0}))
+    records.append(company(rng, income_statement={"revenue": 0, "interest_expense": 0}))
+    records.append({"income_statement": {"revenue": 1000.0, "net_income": 100.0}})
+    return records
+
+
+def test_batch_ratios_match_the_scalar_calculator_exactly():
+    records = companies()
+
+    batch = calculate_ratios_batch(ratio_inputs_from_data(records))
+
+    for i, financial_data in enumerate(records):
+        scalar = {
+            name: value
+            for category in FinancialRatioCalculator(financial_data).calculate_all_ratios().values()
+            for name, value in category.items()
+        }
+        for j, name in enumerate(BATCH_RATIO_COLUMNS):
+            if name in scalar:
+                assert batch[i, j] == scalar[name], (i, name)
+            else:
+                assert np.isnan(batch[i, j]), (i, name)
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_encoder_matches_json_dumps(indent):
+    for financial_data in companies():
+        results = calculate_ratios_from_data(financial_data)
+        expected = json.dumps(results, indent=indent)
+
+        assert encode_ratio_results(results, indent=indent) == expected
+        # Display strings left out are filled in while encoding
+        unformatted = calculate_ratios_from_data(financial_data, formatted=False)
+        assert encode_ratio_results(unformatted, indent=indent) == expected
@@ -0,0 +1,210 @@
+"""
+Tests for DCFModel's closed-form gradients and the batched valuation path.
+Run from this directory: python -m pytest test_dcf_model.py
+"""
+
+import numpy as np
+import pytest
+
+import dcf_model
+from dcf_model import DCFModel, ValuationCache, run_dcf_sweep, value_dcf_batch
+
+STEP = 1e-6
+REVENUE = [800, 900, 1000]
+ASSUMPTIONS = {
+    "projection_years": 5,
+    "revenue_growth": [0.15, 0.12, 0.10, 0.08, 0.06],
+    "ebitda_margin": [0.23, 0.24, 0.25, 0.25, 0.25],
+    "tax_rate": 0.25,
+    "capex_percent": [0.05, 0.05, 0.04, 0.04, 0.04],
+    "nwc_percent": [0.10, 0.11, 0.10, 0.12, 0.10],
+    "terminal_growth": 0.03,
+}
+
+
+def build_model(convention, wacc=None, base_revenue=None, **overrides):
+    """Model with the test assumptions, optionally with some inputs replaced."""
+    model = DCFModel("Test Co")
+    revenue = REVENUE[:-1] + [REVENUE[-1] if base_revenue is None else base_revenue]
+    model.set_historical_financials(
+        revenue=revenue,
+        ebitda=[r * 0.2 for r in revenue],
+        capex=[r * 0.05 for r in revenue],
+        nwc=[r * 0.1 for r in revenue],
+        years=[2022, 2023, 2024],
+    )
+    model.set_assumptions(**{**ASSUMPTIONS, **overrides}, discount_convention=convention)
+    # WACC keeps its own tax rate: the gradients treat WACC as an independent input
+    model.calculate_wacc(0.04, 1.2, 0.07, 0.05, 0.5, tax_rate=0.25)
+    if wacc is not None:
+        model.wacc_components["wacc"] = wacc
+    return model
+
+
+def enterprise_value(convention, terminal_method, **overrides):
+    model = build_model(convention, **overrides)
+    return model.calculate_enterprise_value(terminal_method, exit_multiple=12)["enterprise_value"]
+
+
+def central_difference(convention, terminal_method, name, value, year=None):
+    """dEV/d(input) by bumping one input (one year of a series) up and down."""
+    values = []
+    for sign in (1, -1):
+        bumped = list(value) if year is not None else value + sign * STEP
+        if year is not None:
+            bumped[year] += sign * STEP
+        values.append(enterprise_value(convention, terminal_method, **{name: bumped}))
+    return (values[0] - values[1]) / (2 * STEP)
+
+
+@pytest.mark.parametrize("convention", ["end", "mid"])
+@pytest.mark.parametrize("terminal_method", ["growth", "multiple"])
+def test_gradients_match_finite_differences(convention, terminal_method):
+    model = build_model(convention)
+    model.calculate_enterprise_value(terminal_method, exit_multiple=12)
+    gradients = model.gradients()["enterprise_value"]
+
+    wacc = model.wacc_components["wacc"]
+    for name in ("revenue_growth", "ebitda_margin", "capex_percent", "nwc_percent"):
+        for year, expected in enumerate(gradients[name]):
+            numeric = central_difference(
+                convention, terminal_method, name, ASSUMPTIONS[name], year=year
+            )
+            assert expected == pytest.approx(numeric, rel=1e-5, abs=1e-3), (name, year)
+
+    scalars = {
+        "tax_rate": ASSUMPTIONS["tax_rate"],
+        "terminal_growth": ASSUMPTIONS["terminal_growth"],
+        "wacc": wacc,
+        "base_revenue": REVENUE[-1],
+    }
+    for name, value in scalars.items():
+        numeric = central_difference(convention, terminal_method, name, value)
+        assert gradients[name] == pytest.approx(numeric, rel=1e-5, abs=1e-3), name
+
+
+def test_value_per_share_gradients_scale_by_shares():
+    model = build_model("end")
+    model.calculate_enterprise_value()
+    model.calculate_equity_value(net_debt=200, shares_outstanding=50)
+    gradients = model.gradients()
+
+    assert gradients["value_per_share"]["wacc"] == pytest.approx(
+        gradients["enterprise_value"]["wacc"] / 50
+    )
+    assert gradients["value_per_share"]["ebitda_margin"] == pytest.approx(
+        [g / 50 for g in gradients["enterprise_value"]["ebitda_margin"]]
+    )
+
+
+def test_no_value_per_share_gradients_without_positive_shares():
+    model = build_model("end")
+    model.calculate_enterprise_value()
+    model.calculate_equity_value(net_debt=200, shares_outstanding=-10)
+
+    assert model.valuation_results["value_per_share"] == 0
+    assert "value_per_share" not in model.gradients()
+
+
+@pytest.mark.parametrize("convention", ["end", "mid"])
+@pytest.mark.parametrize("terminal_method", ["growth", "multiple"])
+def test_value_dcf_batch_matches_scalar_models_exactly(convention, terminal_method):
+    rng = np.random.default_rng(11)
+    n_models, years = 8, ASSUMPTIONS["projection_years"]
+    inputs = {
+        "revenue_growth": rng.uniform(0.0, 0.2, (n_models, years)),
+        "ebitda_margin": rng.uniform(0.1, 0.3, (n_models, years)),
+        "capex_percent": rng.uniform(0.02, 0.06, (n_models, years)),
+        "nwc_percent": rng.uniform(0.05, 0.15, (n_models, years)),
+        "terminal_growth": rng.uniform(0.01, 0.03, n_models),
+    }
+    wacc = rng.uniform(0.07, 0.11, n_models)
+
+    batch = value_dcf_batch(
+        REVENUE[-1],
+        inputs["revenue_growth"],
+        inputs["ebitda_margin"],
+        inputs["capex_percent"],
+        inputs["nwc_percent"],
+        wacc,
+        inputs["terminal_growth"],
+        tax_rate=ASSUMPTIONS["tax_rate"],
+        terminal_method=terminal_method,
+        exit_multiple=12,
+        convention=convention,
+    )
+
+    for i in range(n_models):
+        overrides = {name: values[i].tolist() for name, values in inputs.items()}
+        overrides["terminal_growth"] = float(inputs["terminal_growth"][i])
+        model = build_model(convention, wacc=float(wacc[i]), **overrides)
+        scalar = model.calculate_enterprise_value(terminal_method, exit_multiple=12)
+        for name in ("enterprise_value", "pv_fcf", "pv_terminal", "terminal_value"):
+            assert batch[name][i] == scalar[name], (i, name)
+
+
+def test_value_dcf_batch_broadcasts_one_assumption_set_over_waccs():
+    waccs = np.array([0.08, 0.09, 0.10])
+    yearly = [ASSUMPTIONS[name] for name in ("revenue_growth", "ebitda_margin")]
+    yearly += [ASSUMPTIONS[name] for name in ("capex_percent", "nwc_percent")]
+
+    batch = value_dcf_batch(REVENUE[-1], *yearly, waccs)
+
+    expected = [value_dcf_batch(REVENUE[-1], *yearly, w)["enterprise_value"][0] for w in waccs]
+    assert batch["enterprise_value"].tolist() == expected
+
+
+def test_cache_key_ignores_how_the_exit_multiple_is_given():
+    model = build_model("end")
+    cache = ValuationCache()
+
+    assert cache.key(model, "multiple", None) == cache.key(model, "multiple", 10)
+    assert cache.key(model, "multiple", 12) != cache.key(model, "multiple", 10)
+    assert cache.key(model, "growth", 12) == cache.key(model, "growth")
+
+
+def test_direct_writes_restale_only_dependent_years():
+    model = build_model("end")
+    model.calculate_enterprise_value()
+    fresh = build_model("end", ebitda_margin=[0.23, 0.24, 0.40, 0.25, 0.25])
+
+    model.assumptions["ebitda_margin"][2] = 0.40
+    model._sync_inputs()
+
+    assert model._stale_years == {2}
+    assert model.valuation_results["enterprise_value"] == (
+        fresh.calculate_enterprise_value()["enterprise_value"]
+    )
+
+
+def sweep_inputs(n_rows):
+    rng = np.random.default_rng(5)
+    return {
+        "base_revenue": rng.uniform(500, 1500, n_rows),
+        "revenue_growth": rng.uniform(0.0, 0.2, (n_rows, 5)),
+        "ebitda_margin": rng.uniform(0.1, 0.3, (n_rows, 5)),
+        "capex_percent": 0.04,
+        "nwc_percent": 0.1,
+        "wacc": rng.uniform(0.07, 0.11, n_rows),
+    }
+
+
+def test_small_sweeps_stay_in_process(monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("started a process pool")
+
+    monkeypatch.setattr(dcf_model, "ProcessPoolExecutor", no_pool)
+
+    results = run_dcf_sweep(sweep_inputs(1000), max_workers=4, chunk_size=100)
+
+    assert results["enterprise_value"].shape == (1000,)
+
+
+def test_pooled_sweep_matches_in_process():
+    inputs = sweep_inputs(1000)
+
+    pooled = run_dcf_sweep(inputs, max_workers=2, chunk_size=100, min_rows_per_worker=0)
+    in_process = run_dcf_sweep(inputs, max_workers=1)
+
+    for field, values in in_process.items():
+        assert pooled[field].tolist() == values.tolist(), field
@@ -0,0 +1,56 @@
+"""
+Tests for PeerRanking's percentiles against pandas rank(pct=True).
+Run from this directory: python -m pytest test_interpret_ratios.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from interpret_ratios import PeerRanking
+
+COLUMNS = ["roe", "current_ratio"]
+
+
+def peer_universe():
+    rng = np.random.default_rng(7)
+    ratios = rng.normal(size=(40, 2))
+    ratios[3, 0] = np.nan
+    ratios[5, 1] = ratios[6, 1]  # a tie
+    industries = np.array(["technology", "retail"] * 20)
+    ranking = PeerRanking(COLUMNS)
+    ranking.add(ratios, industries)
+    return ranking, ratios, industries
+
+
+def pandas_percentiles(ratios, industries):
+    return pd.DataFrame(ratios).groupby(industries).rank(pct=True).to_numpy()
+
+
+def test_members_match_pandas():
+    ranking, ratios, industries = peer_universe()
+
+    percentile = ranking.rank(ratios, industries)["percentile"]
+
+    np.testing.assert_allclose(percentile, pandas_percentiles(ratios, industries))
+
+
+def test_outsiders_rank_as_if_added():
+    ranking, ratios, industries = peer_universe()
+    new = np.array([[1e6, ratios[6, 1]], [-1e6, 0.0]])
+    new_industries = [industries[6], "retail"]  # one per industry: each joins alone
+
+    percentile = ranking.rank(new, new_industries, added=False)["percentile"]
+
+    expected = pandas_percentiles(
+        np.vstack([ratios, new]), np.concatenate([industries, new_industries])
+    )[-2:]
+    np.testing.assert_allclose(percentile, expected)
+    assert percentile[0, 0] == 1.0
+
+
+def test_rank_rejects_companies_never_added():
+    ranking, _, _ = peer_universe()
+
+    with pytest.raises(ValueError, match="added=False"):
+        ranking.rank([[1e6, 0.0]], ["technology"])
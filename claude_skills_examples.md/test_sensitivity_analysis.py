@@ -0,0 +1,87 @@
+"""
+Tests for SensitivityAnalyzer's estimators and solvers.
+Run from this directory: python -m pytest test_sensitivity_analysis.py
+"""
+
+import pytest
+
+from sensitivity_analysis import SensitivityAnalyzer, accepts_array
+
+UNIT_VARIABLES = {"a": {"low": 0.0, "high": 1.0}, "b": {"low": 0.0, "high": 1.0}}
+
+
+@accepts_array
+def additive_with_offset(samples):
+    """f = 1000 + a + 2b on the unit square: S_a = 0.2 and S_b = 0.8, no interactions."""
+    return 1000 + samples[:, 0] + 2 * samples[:, 1]
+
+
+def test_sobol_indices_of_additive_function_ignore_offset():
+    analyzer = SensitivityAnalyzer(None)
+    indices = analyzer.sobol_analysis(
+        UNIT_VARIABLES, additive_with_offset, n_samples=4096, seed=0
+    ).set_index("variable")
+
+    assert indices.loc["a", "first_order"] == pytest.approx(0.2, abs=0.03)
+    assert indices.loc["b", "first_order"] == pytest.approx(0.8, abs=0.03)
+    assert indices.loc["a", "total_order"] == pytest.approx(0.2, abs=0.03)
+    assert indices.loc["b", "total_order"] == pytest.approx(0.8, abs=0.03)
+
+
+def test_breakeven_batch_widens_the_search_range_in_both_modes():
+    state = {"x": 0.0}
+
+    def update(value):
+        state["x"] = value
+
+    def cubic():
+        return 3 * state["x"] ** 3 + state["x"] + 5
+
+    cubic_array = accepts_array(lambda x: 3 * x**3 + x + 5)
+    targets = [-500.0, 10.0, 1e4]  # outputs over [0, 1] only span 5 to 9
+    analyzer = SensitivityAnalyzer(None)
+
+    scalar = analyzer.breakeven_batch("x", update, cubic, targets, 0, 1, tolerance=1e-9)
+    vectorized = analyzer.breakeven_batch("x", None, cubic_array, targets, 0, 1, tolerance=1e-9)
+
+    assert vectorized == pytest.approx(scalar, abs=1e-6)
+    assert 3 * vectorized**3 + vectorized + 5 == pytest.approx(targets, abs=1e-6)
+
+
+class MarginModel:
+    def __init__(self):
+        self.assumptions = {"revenue": 1000.0, "margin": [0.2, 0.2]}
+
+    def value(self):
+        return self.assumptions["revenue"] * sum(self.assumptions["margin"])
+
+
+def margin_model_factory():
+    """Picklable factory for the process pool: (model, updates by variable, output)."""
+    model = MarginModel()
+
+    def set_margin(value):
+        model.assumptions["margin"][0] = value
+
+    updates = {
+        "revenue": lambda value: model.assumptions.__setitem__("revenue", value),
+        "margin": set_margin,
+    }
+    return model, updates, model.value
+
+
+def test_parallel_scenarios_restore_the_base_model_between_scenarios():
+    scenarios = {
+        "low_margin": {"margin": 0.1},
+        "high_revenue": {"revenue": 2000.0},
+        "both": {"revenue": 500.0, "margin": 0.3},
+    }
+    model, updates, output = margin_model_factory()
+
+    serial = SensitivityAnalyzer(model).scenario_analysis(scenarios, updates, output)
+    parallel = SensitivityAnalyzer(None).scenario_analysis(
+        scenarios, {}, None, model_factory=margin_model_factory, max_workers=1
+    )
+
+    assert list(parallel["output"]) == pytest.approx([300.0, 800.0, 250.0, 450.0])
+    assert list(parallel["output"]) == pytest.approx(list(serial["output"]))